@@ -0,0 +1,143 @@
+"""Headless command mode: run a stream of JSON commands against one Inventory.
+
+Commands are read one JSON object per line, from a file or stdin, and each
+gets one JSON response line, in the same shape as the network service:
+
+    {"id": 1, "op": "sell", "product_id": "E001", "quantity": 2}
+    {"id": 1, "ok": true, "result": 13}
+
+A command without an "id" is answered with its line number instead. Blank
+lines and lines starting with "#" are skipped. Supported ops:
+
+    add          product (a record as written by save_to_file)
+    remove       product_id
+    sell         product_id, quantity
+    restock      product_id, quantity
+    price        product_id, price
+    get          product_id
+    search       name
+    search_type  product_type
+    value
+    save         filename, optional incremental
+    load         filename
+    purge        remove expired groceries; returns their IDs
+
+Failures come back as {"id": ..., "ok": false, "error": <exception class>,
+"message": ...} and the stream carries on. Nothing clears the screen or
+waits for input, and the interactive menus are never imported.
+"""
+import argparse
+import json
+import sys
+from typing import Callable, Iterable, TextIO
+
+from inventory import Inventory
+
+
+def _add(inventory: Inventory, request: dict):
+    from importer import validate_record  # Pulls in multiprocessing, which only bulk imports need at startup
+    product = validate_record(request["product"])
+    inventory.add_product(product)
+    return product.product_id
+
+
+def _remove(inventory: Inventory, request: dict):
+    inventory.remove_product(request["product_id"])
+    return None
+
+
+def _quantity(request: dict) -> int:
+    quantity = request["quantity"]
+    if not isinstance(quantity, int) or isinstance(quantity, bool):
+        raise ValueError("Quantity must be an integer")
+    return quantity
+
+
+def _update_price(inventory: Inventory, request: dict):
+    inventory.update_price(request["product_id"], request["price"])
+    return request["price"]
+
+
+def _save(inventory: Inventory, request: dict):
+    inventory.save_to_file(request["filename"], request.get("incremental", False))
+    return inventory.total_products
+
+
+def _load(inventory: Inventory, request: dict):
+    inventory.load_from_file(request["filename"])
+    return inventory.total_products
+
+
+COMMANDS: dict[str, Callable[[Inventory, dict], object]] = {
+    "add": _add,
+    "remove": _remove,
+    "sell": lambda inventory, request: inventory.sell_product(request["product_id"], _quantity(request)),
+    "restock": lambda inventory, request: inventory.restock_product(request["product_id"], _quantity(request)),
+    "price": _update_price,
+    "get": lambda inventory, request: inventory.get_product(request["product_id"]).to_dict(),
+    "search": lambda inventory, request: [product.to_dict() for product in inventory.search_by_name(request["name"])],
+    "search_type": lambda inventory, request: [
+        product.to_dict() for product in inventory.search_by_type(request["product_type"])
+    ],
+    "value": lambda inventory, request: inventory.total_inventory_value(),
+    "save": _save,
+    "load": _load,
+    "purge": lambda inventory, request: [product.product_id for product in inventory.remove_expired_products()],
+}
+
+
+def run_batch(inventory: Inventory, lines: Iterable[str], output: TextIO) -> dict[str, int]:
+    """Execute every command in `lines`, writing one response line per command to `output`.
+
+    Returns the number of commands that succeeded and failed.
+    """
+    counts = {"ok": 0, "failed": 0}
+    write = output.write
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        request_id = line_number
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Command must be a JSON object")
+            request_id = request.get("id", line_number)
+            command = COMMANDS.get(request.get("op"))
+            if command is None:
+                raise ValueError(f"Unknown operation: {request.get('op')}")
+            response = {"id": request_id, "ok": True, "result": command(inventory, request)}
+            counts["ok"] += 1
+        except Exception as e:
+            response = {"id": request_id, "ok": False, "error": type(e).__name__, "message": str(e)}
+            counts["failed"] += 1
+        write(json.dumps(response, default=str) + "\n")
+    return counts
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run JSON commands against an inventory without the menus.")
+    parser.add_argument("commands", nargs="?", default="-", help="file of JSON commands, one per line (default: stdin)")
+    parser.add_argument("--file", help="inventory file to load before the first command")
+    parser.add_argument("--output", help="write responses to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    inventory = Inventory()
+    if args.file:
+        inventory.load_from_file(args.file)
+
+    commands = sys.stdin if args.commands == "-" else open(args.commands, "r", encoding="utf-8")
+    output = sys.stdout if args.output is None else open(args.output, "w", encoding="utf-8")
+    try:
+        counts = run_batch(inventory, commands, output)
+    finally:
+        if commands is not sys.stdin:
+            commands.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"{counts['ok']} commands succeeded, {counts['failed']} failed", file=sys.stderr)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
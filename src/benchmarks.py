@@ -0,0 +1,510 @@
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable
+
+from src.exceptions import InsufficientStockError
+
+from columnar import ColumnarInventory
+from concurrent_inventory import ConcurrentInventory
+from inventory import Inventory
+from importer import bulk_import
+from jsonstream import iter_json_array
+from metrics import instrument, uninstrument
+from product import Clothing, Electronics, Grocery, Product, product_from_dict
+from sample_data import generate_catalog
+from sharded import ShardedInventory
+from snapshot import SnapshotReader
+from sqlite_inventory import SQLiteInventory
+
+
+WORDS = ["smart", "phone", "laptop", "cable", "charger", "shirt", "jacket", "denim",
+         "wool", "cotton", "speaker", "monitor", "keyboard", "mouse", "sweater", "boots"]
+
+
+class UncachedInventory(Inventory):
+    """Inventory without the query cache, so that repeated timed calls run the indexes rather than hit the cache."""
+    query_cache_size = 0
+
+
+def build_inventory(size: int, seed: int = 42, inventory_class: type[Inventory] = UncachedInventory) -> Inventory:
+    """Build an inventory of `size` randomly named products."""
+    rng = random.Random(seed)
+    inventory = inventory_class()
+    for i in range(size):
+        name = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+        if i % 2:
+            inventory.add_product(Electronics(f"E{i}", name, 99.99, 10, "Brand", 1))
+        else:
+            inventory.add_product(Clothing(f"C{i}", name, 19.99, 10, "M", "Cotton"))
+    return inventory
+
+
+def timeit(func: Callable[[], object], repeat: int = 5) -> float:
+    """Return the best wall-clock time of `repeat` calls to `func`, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_search_by_name(size: int = 200_000):
+    """Compare the trigram index against a full substring scan."""
+    inventory = build_inventory(size)
+    products = inventory.list_all_products()
+
+    def scan(query: str):
+        return [product for product in products if query.lower() in product.name.lower()]
+
+    print(f"search_by_name over {size} products")
+    for query in ["Laptop", "smart phone", "wool boots cable", "xyz"]:
+        assert scan(query) == inventory.search_by_name(query)
+        scan_time = timeit(lambda: scan(query))
+        index_time = timeit(lambda: inventory.search_by_name(query))
+        print(f"  {query!r:22} scan {scan_time * 1000:8.2f} ms   index {index_time * 1000:8.2f} ms   "
+              f"speedup {scan_time / index_time:6.1f}x")
+
+
+def bench_remove_expired(size: int = 200_000, expired_ratio: float = 0.01):
+    """Time a purge that removes a small fraction of a large grocery catalog."""
+    rng = random.Random(7)
+    now = datetime.now()
+    inventory = Inventory()
+    for i in range(size):
+        days = -rng.randint(1, 30) if rng.random() < expired_ratio else rng.randint(1, 365)
+        inventory.add_product(Grocery(f"G{i}", f"Item {i}", 1.99, 10, now + timedelta(days=days)))
+
+    start = time.perf_counter()
+    expired = inventory.remove_expired_products()
+    purge_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    soon = inventory.expiring_within(7)
+    window_time = time.perf_counter() - start
+
+    print(f"remove_expired_products over {size} groceries")
+    print(f"  purged {len(expired)} in {purge_time * 1000:.2f} ms; "
+          f"{len(soon)} expiring within 7 days found in {window_time * 1000:.2f} ms")
+
+
+def bench_columnar_aggregates(size: int = 200_000):
+    """Compare object-based aggregates against the columnar backend."""
+    inventory = build_inventory(size)
+    columnar = ColumnarInventory()
+    for product in inventory.list_all_products():
+        columnar.add_product(product)
+
+    print(f"aggregates over {size} products (dict backend vs columnar backend)")
+    for label, call in [
+        ("total_inventory_value", lambda inv: inv.total_inventory_value()),
+        ("value_by_type", lambda inv: inv.value_by_type()),
+        ("low_stock_products(10)", lambda inv: inv.low_stock_products(10)),
+    ]:
+        dict_time = timeit(lambda: call(inventory))
+        columnar_time = timeit(lambda: call(columnar))
+        print(f"  {label:24} dict {dict_time * 1000:8.2f} ms   columnar {columnar_time * 1000:8.2f} ms")
+
+
+class _DictElectronics:
+    """Stand-in with the pre-__slots__ layout of Electronics (same six attributes in a __dict__)."""
+
+    def __init__(self, product_id, name, price, quantity_in_stock, brand, warranty_years):
+        self._product_id = product_id
+        self._name = name
+        self._price = price
+        self._quantity_in_stock = quantity_in_stock
+        self._warranty_years = warranty_years
+        self._brand = brand
+
+
+def _bytes_per_object(factory: Callable, rows: list[tuple]) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(*row) for row in rows]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the objects is one pointer per object in both cases
+    return (after - before) / len(objects) - 8
+
+
+def bench_product_memory(size: int = 100_000):
+    """Report bytes per product for dict-backed and slotted products, via tracemalloc."""
+    # Field values are built up front so only the product objects themselves are measured
+    rows = [(f"E{i}", f"Product {i}", 99.99 + i, i, "Brand", 1.0) for i in range(size)]
+    dict_bytes = _bytes_per_object(_DictElectronics, rows)
+    slotted_bytes = _bytes_per_object(Electronics, rows)
+    print(f"memory per Electronics object over {size} products")
+    print(f"  __dict__ {dict_bytes:7.1f} B   __slots__ {slotted_bytes:7.1f} B   "
+          f"saving {1 - slotted_bytes / dict_bytes:.0%}")
+
+
+def bench_cold_start(size: int = 200_000):
+    """Compare loading a pretty-printed JSON inventory against a binary snapshot."""
+    inventory = build_inventory(size)
+    now = datetime.now()
+    for i in range(size // 2):
+        inventory.add_product(Grocery(f"G{i}", f"Grocery {i}", 2.49, 10, now + timedelta(days=i % 30)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_file = os.path.join(directory, "inventory.json")
+        snapshot_file = os.path.join(directory, "inventory.snap")
+        inventory.save_to_file(json_file)
+        inventory.save_snapshot(snapshot_file)
+
+        json_time = timeit(lambda: Inventory().load_from_file(json_file), repeat=1)
+        snapshot_time = timeit(lambda: Inventory().load_snapshot(snapshot_file), repeat=1)
+
+        def decode_json():
+            with open(json_file) as file:
+                for record in iter_json_array(file):
+                    product_from_dict(record)
+
+        def decode_snapshot():
+            with SnapshotReader(snapshot_file) as snapshot:
+                for _ in snapshot:
+                    pass
+        json_decode_time = timeit(decode_json, repeat=1)
+        snapshot_decode_time = timeit(decode_snapshot, repeat=1)
+
+        def first_lookup():
+            with SnapshotReader(snapshot_file) as snapshot:
+                snapshot[len(snapshot) - 1]
+        lookup_time = timeit(first_lookup)
+
+        print(f"cold start with {inventory.total_products} products")
+        print(f"  load_from_file {json_time * 1000:9.1f} ms ({os.path.getsize(json_file) / 1e6:.1f} MB)")
+        print(f"  load_snapshot  {snapshot_time * 1000:9.1f} ms ({os.path.getsize(snapshot_file) / 1e6:.1f} MB)")
+        print(f"  decode only (no indexing): json {json_decode_time * 1000:.1f} ms, snapshot {snapshot_decode_time * 1000:.1f} ms")
+        print(f"  open snapshot + decode one product {lookup_time * 1000:.3f} ms")
+
+
+def _stress(inventory: ConcurrentInventory, product_ids: list[str], threads: int, operations: int) -> tuple[float, int, int]:
+    """Hammer the inventory with random sells and restocks; return (seconds, units sold, units restocked)."""
+    def worker(seed: int) -> tuple[int, int]:
+        rng = random.Random(seed)
+        sold = restocked = 0
+        for _ in range(operations // threads):
+            product_id = rng.choice(product_ids)
+            if rng.random() < 0.9:
+                quantity = rng.randint(1, 3)
+                try:
+                    inventory.sell_product(product_id, quantity)
+                    sold += quantity
+                except InsufficientStockError:
+                    pass
+            else:
+                quantity = rng.randint(1, 5)
+                inventory.restock_product(product_id, quantity)
+                restocked += quantity
+        return sold, restocked
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(sold for sold, _ in results), sum(restocked for _, restocked in results)
+
+
+def bench_concurrent_sales(products: int = 1_000, operations: int = 200_000):
+    """Multi-threaded sell/restock stress test: checks stock never goes negative and reports throughput."""
+    print(f"concurrent sell/restock, {operations} operations over {products} products")
+    for stripes, label in [(1, "single lock"), (64, "64 stripes")]:
+        for threads in [1, 2, 4, 8, 16]:
+            inventory = ConcurrentInventory(stripes=stripes)
+            for i in range(products):
+                inventory.add_product(Clothing(f"C{i}", f"Shirt {i}", 19.99, 20, "M", "Cotton"))
+            product_ids = [f"C{i}" for i in range(products)]
+            initial = sum(product.quantity_in_stock for product in inventory.list_all_products())
+
+            elapsed, sold, restocked = _stress(inventory, product_ids, threads, operations)
+
+            stock = [product.quantity_in_stock for product in inventory.list_all_products()]
+            assert min(stock) >= 0, "stock went negative"
+            assert sum(stock) == initial - sold + restocked, "units were lost or double counted"
+            print(f"  {label:12} {threads:3} threads {operations / elapsed:12,.0f} ops/s")
+
+
+def bench_sharded(size: int = 400_000, shards: int = 4):
+    """Compare scans and aggregates on one Inventory against a process-sharded one."""
+    inventory = build_inventory(size)
+    with tempfile.TemporaryDirectory() as directory, ShardedInventory(shards) as sharded:
+        filename = os.path.join(directory, "inventory.jsonl")
+        inventory.save_to_file(filename)
+        sharded.load_from_file(filename)
+
+        print(f"{size} products, single process vs {shards} shards")
+        for label, call in [
+            ("total_inventory_value", lambda inv: inv.total_inventory_value()),
+            ("search_by_name('wool boots')", lambda inv: inv.search_by_name("wool boots")),
+            ("low_stock_products(5)", lambda inv: inv.low_stock_products(5)),
+        ]:
+            single_time = timeit(lambda: call(inventory), repeat=3)
+            sharded_time = timeit(lambda: call(sharded), repeat=3)
+            print(f"  {label:30} single {single_time * 1000:8.2f} ms   sharded {sharded_time * 1000:8.2f} ms")
+
+
+def bench_range_query(size: int = 200_000, page_size: int = 50):
+    """Compare a type + price range query, sorted by price, against a scan followed by a sort."""
+    rng = random.Random(11)
+    inventory = build_inventory(size)
+    for product in inventory.list_all_products():
+        inventory.update_price(product.product_id, round(rng.uniform(1, 2_000), 2))
+    products = inventory.list_all_products()
+
+    def scan():
+        matches = [product for product in products
+                   if type(product).__name__ == "Electronics" and 100 <= product.price <= 500]
+        return sorted(matches, key=lambda product: (product.price, product.product_id))[:page_size]
+
+    def query():
+        return inventory.query_products("electronics", min_price=100, max_price=500, limit=page_size)[0]
+
+    assert scan() == query()
+    scan_time = timeit(scan)
+    index_time = timeit(query)
+    print(f"electronics priced 100-500, first page of {page_size}, over {size} products")
+    print(f"  scan + sort {scan_time * 1000:8.2f} ms   price index {index_time * 1000:8.2f} ms   "
+          f"speedup {scan_time / index_time:6.1f}x")
+
+
+def bench_query_cache(size: int = 200_000, restocks: int = 1_000):
+    """Compare repeated searches answered from the query cache against the indexes, with and without writes in between."""
+    queries = ["Laptop", "smart phone", "wool boots cable"]
+    print(f"repeated search_by_name over {size} products, query cache vs indexes")
+    for label, inventory_class in [("indexes", UncachedInventory), ("cache", Inventory)]:
+        inventory = build_inventory(size, inventory_class=inventory_class)
+        product_ids = [product.product_id for product in inventory.list_all_products()[:restocks]]
+        hit_time = timeit(lambda: [inventory.search_by_name(query) for query in queries])
+
+        def restock_and_search():
+            # A restock changes stock only, so it does not invalidate cached name searches
+            for product_id in product_ids:
+                inventory.restock_product(product_id, 1)
+                inventory.search_by_name(queries[0])
+        mixed_time = timeit(restock_and_search, repeat=3)
+        print(f"  {label:8} {len(queries)} searches {hit_time * 1000:8.2f} ms   "
+              f"restock + search x {restocks} {mixed_time * 1000:8.2f} ms")
+
+
+def bench_query(sizes: tuple[int, ...] = (100_000, 1_000_000)):
+    """Compare planned queries against a scan that checks the same predicates.
+
+    10**7 products also works but needs several GB of memory; pass it in `sizes` explicitly.
+    """
+    for size in sizes:
+        rng = random.Random(13)
+        inventory = build_inventory(size)
+        for product in inventory.list_all_products():
+            inventory.update_price(product.product_id, round(rng.uniform(1, 2_000), 2))
+        products = inventory.list_all_products()
+
+        print(f"query builder over {size:,} products")
+        for label, query, predicate in [
+            ("electronics 100-500, name 'wool boots'",
+             inventory.query().of_type("electronics").price_between(100, 500).name_contains("wool boots"),
+             lambda p: type(p).__name__ == "Electronics" and 100 <= p.price <= 500 and "wool boots" in p.name.lower()),
+            ("price 10-11",
+             inventory.query().price_between(10, 11),
+             lambda p: 10 <= p.price <= 11),
+            ("clothing, size M, price >= 1990",
+             inventory.query().of_type("clothing").where(size="M").price_between(1_990),
+             lambda p: type(p).__name__ == "Clothing" and p.size == "M" and p.price >= 1_990),
+        ]:
+            def scan():
+                return [product for product in products if predicate(product)]
+            assert sorted(map(id, scan())) == sorted(map(id, query))
+            scan_time = timeit(scan, repeat=3)
+            query_time = timeit(lambda: list(query), repeat=3)
+            access = query.explain().splitlines()[2].split(":", 1)[1].strip()
+            print(f"  {label:40} scan {scan_time * 1000:8.2f} ms   query {query_time * 1000:8.2f} ms   via {access}")
+
+
+def _time_and_peak(run: Callable[[], object], reset: Callable[[], object] | None = None) -> tuple[float, int]:
+    """Time one call of `run`, then repeat it under tracemalloc for its peak allocation in bytes.
+
+    The two calls are separate because tracing slows allocation-heavy code
+    several times over. `reset` restores the state `run` changed, before each call.
+    """
+    if reset is not None:
+        reset()
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+
+    if reset is not None:
+        reset()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_hot_paths(size: int = 500_000, seed: int = 0, sales: int = 100_000):
+    """Time the main Inventory operations on a synthetic catalog and report their peak memory.
+
+    The catalog comes from sample_data.generate_catalog; pass a size in the
+    millions to see behaviour at production scale.
+    """
+    rng = random.Random(seed)
+    products = list(generate_catalog(size, seed))
+    inventory = UncachedInventory()
+    removed: list[Product] = []
+    results: list[tuple[str, int, float, int]] = []
+
+    def add_all():
+        nonlocal inventory
+        inventory = UncachedInventory()
+        for product in products:
+            inventory.add_product(product)
+
+    def detach():
+        inventory._clear()
+
+    results.append(("add_product", size, *_time_and_peak(add_all, detach)))
+
+    queries = ["pro", "organic milk", "navy wool", "sony headphones", "xyz"]
+    results.append(("search_by_name", len(queries), *_time_and_peak(
+        lambda: [inventory.search_by_name(query) for query in queries])))
+    results.append(("search_by_type", 3, *_time_and_peak(
+        lambda: [inventory.search_by_type(product_type) for product_type in ("electronics", "grocery", "clothing")])))
+    results.append(("total_inventory_value", 1, *_time_and_peak(inventory.total_inventory_value)))
+
+    product_ids = [rng.choice(products).product_id for _ in range(sales)]
+    def sell_all():
+        for product_id in product_ids:
+            try:
+                inventory.sell_product(product_id, 1)
+            except InsufficientStockError:
+                pass
+    results.append(("sell_product", sales, *_time_and_peak(sell_all)))
+
+    def remove_expired():
+        removed.extend(inventory.remove_expired_products())
+    def restore_expired():
+        for product in removed:
+            inventory.add_product(product)
+        removed.clear()
+    results.append(("remove_expired_products", 1, *_time_and_peak(remove_expired, restore_expired)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "inventory.json")
+        results.append(("save_to_file", 1, *_time_and_peak(lambda: inventory.save_to_file(filename))))
+        results.append(("load_from_file", 1, *_time_and_peak(lambda: Inventory().load_from_file(filename))))
+
+    print(f"hot paths over a synthetic catalog of {size:,} products (seed {seed})")
+    for label, calls, elapsed, peak in results:
+        print(f"  {label:24} {elapsed * 1000:10.2f} ms   {elapsed / calls * 1e6:12.2f} us/call   "
+              f"peak {peak / 2 ** 20:8.1f} MiB")
+
+
+def bench_instrumentation(products: int = 10_000, sales: int = 200_000):
+    """Measure what instrumenting an inventory costs on sell_product."""
+    inventory = Inventory()
+    for i in range(products):
+        inventory.add_product(Clothing(f"C{i}", f"Shirt {i}", 19.99, 10 ** 9, "M", "Cotton"))
+    product_ids = [f"C{i % products}" for i in range(sales)]
+
+    def sell_all():
+        for product_id in product_ids:
+            inventory.sell_product(product_id, 1)
+
+    plain_time = timeit(sell_all, repeat=3)
+    registry = instrument(inventory)
+    instrumented_time = timeit(sell_all, repeat=3)
+    uninstrument(inventory)
+    after_time = timeit(sell_all, repeat=3)
+
+    print(f"sell_product x {sales}, plain vs instrumented")
+    print(f"  plain {plain_time / sales * 1e6:6.2f} us   instrumented {instrumented_time / sales * 1e6:6.2f} us   "
+          f"uninstrumented again {after_time / sales * 1e6:6.2f} us   ({registry.calls['sell_product']} recorded)")
+
+
+def bench_bulk_import(rows: int = 200_000, bad_every: int = 1_000):
+    """Time a JSON Lines feed import into an empty inventory, one process vs a pool of all cores."""
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "feed.jsonl")
+        with open(filename, "w") as file:
+            for i, product in enumerate(generate_catalog(rows, seed=5)):
+                file.write("{not json\n" if i % bad_every == 0 else json.dumps(product.to_dict()) + "\n")
+
+        print(f"bulk import of {rows:,} JSON Lines rows")
+        for processes in sorted({1, os.cpu_count() or 1}):
+            inventory = Inventory()
+            start = time.perf_counter()
+            counts = bulk_import(inventory, filename, processes=processes)
+            elapsed = time.perf_counter() - start
+            print(f"  {processes:2} process(es) {rows / elapsed:12,.0f} rows/s   {counts}")
+
+
+def bench_sqlite(size: int = 200_000, seed: int = 0, sales: int = 20_000):
+    """Compare the in-memory Inventory with the SQLite-backed one on the same synthetic catalog.
+
+    Peak memory is what Python allocates during the call; SQLite's page cache is not counted.
+    """
+    rng = random.Random(seed)
+    products = list(generate_catalog(size, seed))
+    product_ids = [rng.choice(products).product_id for _ in range(sales)]
+    queries = ["pro", "organic milk", "navy wool", "sony headphones", "xyz"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "inventory.db")
+        memory, database = UncachedInventory(), SQLiteInventory(filename)
+
+        def add_all(inventory):
+            if isinstance(inventory, SQLiteInventory):
+                inventory.add_many(products)
+            else:
+                for product in products:
+                    inventory.add_product(product)
+
+        def sell_all(inventory):
+            for product_id in product_ids:
+                try:
+                    inventory.sell_product(product_id, 1)
+                except InsufficientStockError:
+                    pass
+
+        operations = [
+            ("add (SQLite: add_many)", size, add_all),
+            ("get_product", sales, lambda inventory: [inventory.get_product(product_id) for product_id in product_ids]),
+            ("sell_product", sales, sell_all),
+            ("search_by_name", len(queries), lambda inventory: [inventory.search_by_name(query) for query in queries]),
+            ("query_products page", 1, lambda inventory: inventory.query_products("electronics", 100, 500, limit=50)),
+            ("low_stock_products(5)", 1, lambda inventory: inventory.low_stock_products(5)),
+            ("total_inventory_value", 1, lambda inventory: inventory.total_inventory_value()),
+        ]
+        print(f"in-memory Inventory vs SQLite, synthetic catalog of {size:,} products")
+        for label, calls, run in operations:
+            memory_time, memory_peak = _time_and_peak(lambda: run(memory), memory._clear if run is add_all else None)
+            database_time, database_peak = _time_and_peak(lambda: run(database), database._clear if run is add_all else None)
+            print(f"  {label:24} memory {memory_time / calls * 1e6:10.2f} us/call  peak {memory_peak / 2 ** 20:7.1f} MiB   "
+                  f"SQLite {database_time / calls * 1e6:10.2f} us/call  peak {database_peak / 2 ** 20:7.1f} MiB")
+        database.close()
+        print(f"  database file {os.path.getsize(filename) / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    bench_search_by_name()
+    bench_remove_expired()
+    bench_columnar_aggregates()
+    bench_product_memory()
+    bench_cold_start()
+    bench_concurrent_sales()
+    bench_sharded()
+    bench_range_query()
+    bench_query_cache()
+    bench_query()
+    bench_hot_paths()
+    bench_instrumentation()
+    bench_bulk_import()
+    bench_sqlite()
@@ -0,0 +1,71 @@
+"""Bounded LRU cache of query results, invalidated by generation stamps.
+
+Each result is stored with the stamp it was computed under: the mutation
+generations of the product types it depends on. A lookup under a different
+stamp finds the entry stale and drops it, so nothing needs to walk the cache
+when the inventory changes.
+"""
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+MISSING = object()
+
+
+class ResultCache:
+    """LRU mapping of query keys to (stamp, result), with hit, miss and eviction counts.
+
+    Every operation holds an internal lock, so threads sharing the cache
+    never corrupt the LRU order or lose counts. Two threads missing the same
+    key may both compute the result; the last put wins.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[Hashable, object]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0      # Entries dropped to stay within maxsize
+        self.invalidations = 0  # Entries found stale on lookup; also counted as misses
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable, stamp: Hashable):
+        """Return the result cached for `key` under `stamp`, or MISSING."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            if entry[0] != stamp:
+                del self._entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, stamp: Hashable, result):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (stamp, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry; the statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "invalidations": self.invalidations, "size": len(self._entries), "maxsize": self.maxsize,
+            }
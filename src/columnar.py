@@ -0,0 +1,199 @@
+from array import array
+from itertools import compress
+from operator import mul
+
+from src.exceptions import DuplicateProductError
+from inventory import Inventory
+from product import Product
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the pure-Python paths below are used instead
+    np = None
+
+
+class _Column:
+    """Descriptor that redirects a Product attribute to a column of its store."""
+
+    def __init__(self, column: str):
+        self.column = column
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        return getattr(view._store, self.column)[view._row]
+
+    def __set__(self, view, value):
+        getattr(view._store, self.column)[view._row] = value
+
+
+_view_classes: dict[type[Product], type[Product]] = {}
+
+
+def _view_class(product_class: type[Product]) -> type[Product]:
+    """Return the row-backed view subclass of a product class.
+
+    The view keeps the original class name, so `to_dict`, `__repr__` and type
+    searches see it as the product class it wraps.
+    """
+    if product_class not in _view_classes:
+        _view_classes[product_class] = type(product_class.__name__, (product_class,), {
+            "__module__": product_class.__module__,
+            "__qualname__": product_class.__qualname__,
+            "__slots__": ("_store", "_row"),
+            "_price": _Column("price"),
+            "_quantity_in_stock": _Column("quantity"),
+        })
+    return _view_classes[product_class]
+
+
+class _DetachedRow:
+    """One-row stand-in store that keeps a removed view readable."""
+
+    def __init__(self, price: float, quantity: int):
+        self.price = [price]
+        self.quantity = [quantity]
+
+
+class ColumnarStore:
+    """Parallel typed arrays for price and stock, with product IDs mapped to row offsets."""
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self._views)
+
+    def clear(self):
+        self.price = array('d')
+        self.quantity = array('q')
+        self.type_code = array('B')
+        self._views: list[Product] = []
+        self._rows: dict[str, int] = {}
+        self._types: list[type[Product]] = []
+        self._type_codes: dict[type[Product], int] = {}
+        self._type_counts: list[int] = []
+
+    def append(self, product: Product) -> Product:
+        """Copy a product into a new row and return the view that wraps it."""
+        product_class = type(product)
+        if product_class not in self._type_codes:
+            self._type_codes[product_class] = len(self._types)
+            self._types.append(product_class)
+            self._type_counts.append(0)
+
+        row = len(self._views)
+        self.price.append(product.price)
+        self.quantity.append(product.quantity_in_stock)
+        self.type_code.append(self._type_codes[product_class])
+        self._type_counts[self._type_codes[product_class]] += 1
+
+        # Constructor arguments share their names with the keys of to_dict()
+        fields = {key: getattr(product, key) for key in product.to_dict() if key != "type"}
+        view_class = _view_class(product_class)
+        view = view_class.__new__(view_class)
+        view._store = self
+        view._row = row
+        view.__init__(**fields)
+
+        self._views.append(view)
+        self._rows[product.product_id] = row
+        return view
+
+    def delete(self, product_id: str):
+        """Drop a row by moving the last row into its place."""
+        row = self._rows.pop(product_id)
+        last = len(self._views) - 1
+        self._type_counts[self.type_code[row]] -= 1
+
+        removed = self._views[row]
+        removed._store = _DetachedRow(self.price[row], self.quantity[row])
+        removed._row = 0
+
+        if row != last:
+            self.price[row] = self.price[last]
+            self.quantity[row] = self.quantity[last]
+            self.type_code[row] = self.type_code[last]
+            moved = self._views[last]
+            moved._row = row
+            self._views[row] = moved
+            self._rows[moved.product_id] = row
+        self.price.pop()
+        self.quantity.pop()
+        self.type_code.pop()
+        self._views.pop()
+
+    def total_value(self) -> float:
+        if np is not None:
+            return float(np.dot(np.frombuffer(self.price), np.frombuffer(self.quantity, dtype=np.int64)))
+        return sum(map(mul, self.price, self.quantity))
+
+    def value_by_type(self) -> dict[str, float]:
+        if np is not None:
+            values = np.frombuffer(self.price) * np.frombuffer(self.quantity, dtype=np.int64)
+            totals = np.bincount(np.frombuffer(self.type_code, dtype=np.uint8),
+                                 weights=values, minlength=len(self._types))
+        else:
+            totals = [0.0] * len(self._types)
+            for code, price, quantity in zip(self.type_code, self.price, self.quantity):
+                totals[code] += price * quantity
+        return {
+            product_class.__name__: float(total)
+            for product_class, total, count in zip(self._types, totals, self._type_counts) if count
+        }
+
+    def rows_at_or_below(self, threshold: int) -> list[Product]:
+        if np is not None:
+            rows = np.flatnonzero(np.frombuffer(self.quantity, dtype=np.int64) <= threshold)
+            return [self._views[row] for row in rows]
+        return list(compress(self._views, (quantity <= threshold for quantity in self.quantity)))
+
+
+class ColumnarInventory(Inventory):
+    """Inventory whose prices and stock levels live in a ColumnarStore.
+
+    Products passed to `add_product` are copied into a row; the inventory then
+    holds a view of the same product class whose price and stock read and write
+    the row, so aggregates run over the arrays instead of the product objects.
+    """
+
+    def __init__(self):
+        self._store = ColumnarStore()
+        super().__init__()
+
+    def add_product(self, product: Product):
+        """Add a product to the inventory."""
+        if product.product_id in self._products:
+            raise DuplicateProductError(f"Product with ID {product.product_id} already exists")
+        super().add_product(self._store.append(product))
+
+    def remove_product(self, product_id: str):
+        """Remove a product from the inventory by ID."""
+        super().remove_product(product_id)
+        self._store.delete(product_id)
+
+    def _add_new(self, products: list[Product]):
+        super()._add_new([self._store.append(product) for product in products])
+
+    def _remove_many(self, product_ids: set[str]):
+        super()._remove_many(product_ids)
+        for product_id in product_ids:
+            self._store.delete(product_id)
+
+    def _clear(self):
+        super()._clear()
+        self._store.clear()
+
+    def total_inventory_value(self):
+        """Calculate the total value of all products in inventory."""
+        return self._store.total_value()
+
+    def value_by_type(self) -> dict[str, float]:
+        """Return the inventory value of each product type."""
+        return self._store.value_by_type()
+
+    def low_stock_products(self, threshold: int) -> list[Product]:
+        """Return the products with at most `threshold` units in stock, lowest stock first."""
+        products = self._store.rows_at_or_below(threshold)
+        products.sort(key=lambda product: (product.quantity_in_stock, product.product_id))
+        return products
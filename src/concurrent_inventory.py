@@ -0,0 +1,453 @@
+import copy
+import functools
+import os
+import threading
+from concurrent.futures import Future
+from typing import Iterable, Iterator
+
+from indexes import PartitionedIndex
+from inventory import DELTA_SUFFIX, Inventory
+from jsonstream import replace_json_file
+from product import Product
+
+
+def _with_structure_lock(method):
+    """Wrap an Inventory method so it runs while holding the structure lock."""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._structure_lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def _with_exclusive_lock(method):
+    """Wrap an Inventory method so it runs while holding the structure lock and every stripe."""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._structure_lock:
+            for stripe in self._stripes:
+                stripe.acquire()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                for stripe in reversed(self._stripes):
+                    stripe.release()
+    return locked
+
+
+class _StripeTotals:
+    """Running aggregates of the products on one stripe; the inventory's are the sums over all stripes."""
+    __slots__ = ("total_value", "value_by_type", "units_by_type", "out_of_stock", "value_generations")
+
+    def __init__(self):
+        self.value_generations: dict[type[Product], int] = {}  # Never reset, like Inventory._value_generations
+        self.reset()
+
+    def reset(self):
+        self.total_value = 0
+        self.value_by_type: dict[type[Product], float] = {}
+        self.units_by_type: dict[type[Product], int] = {}
+        self.out_of_stock = 0
+
+
+class ConcurrentInventory(Inventory):
+    """Inventory that can be shared between threads.
+
+    Stock and price changes lock only the stripe that owns the product ID, so
+    sales of products on different stripes never wait for each other: each
+    stripe keeps its own share of the running aggregates and its own part of
+    the stock, price and reorder indexes. Adding and removing products, and
+    reads that walk the catalog, take a separate structure lock that stock
+    changes do not need; reads of the sorted indexes also take every stripe.
+
+    Long reads that must not stall sales can run on a view(): a consistent,
+    copy-on-write snapshot of the inventory that writers keep working around.
+
+    Only the inventory methods are guarded: calling `Product.sell` directly on
+    a shared product is still an unguarded check-then-decrement. Reorder
+    listeners run while the inventory is locked, so they must hand work off
+    (e.g. to a queue) rather than call back into the inventory.
+    """
+
+    def __init__(self, stripes: int = 64):
+        # Reentrant, so that loading a file can add and remove products while holding every stripe
+        self._stripes = [threading.RLock() for _ in range(stripes)]
+        self._structure_lock = threading.RLock()
+        self._totals = [_StripeTotals() for _ in range(stripes)]
+        # One save or load at a time; taken before any other lock
+        self._save_lock = threading.Lock()
+        # Copy-on-write state for views: see view()
+        self._view_lock = threading.Lock()
+        self._epoch = 0                            # Views taken so far; the version of the next one
+        self._open_views: dict[int, int] = {}      # Version of each open view -> how many are open
+        self._oldest_view: int | None = None
+        self._products_shared = False              # An open view holds the current _products dict
+        self._undo: dict[Product, list[tuple[int, int, float]]] = {}  # (epoch, quantity, price) before a write
+        super().__init__()
+        self._stock_index = PartitionedIndex(stripes, self._stripe_index)
+        self._price_index = PartitionedIndex(stripes, self._stripe_index)
+        self._reorder_index = PartitionedIndex(stripes, self._stripe_index)
+
+    def _stripe_index(self, product_id: str) -> int:
+        return hash(product_id) % len(self._stripes)
+
+    def _stripe(self, product_id: str) -> threading.RLock:
+        return self._stripes[self._stripe_index(product_id)]
+
+    def _stripes_for(self, product_ids: Iterable[str]) -> list[threading.RLock]:
+        """Return the stripes covering `product_ids`, in the global order used to avoid deadlocks."""
+        indexes = {hash(product_id) % len(self._stripes) for product_id in product_ids}
+        return [self._stripes[index] for index in sorted(indexes)]
+
+    def _unshare_products(self):
+        """Give the inventory its own products dict before changing it, if a view holds the current one."""
+        if self._products_shared:
+            self._products = dict(self._products)
+            self._products_shared = False
+
+    def _preserve(self, product_ids: Iterable[str]):
+        """Record the stock and price of products about to change, for the views that predate the change.
+
+        Called with the stripes of `product_ids` held, so no view can be taken meanwhile.
+        """
+        oldest = self._oldest_view
+        if oldest is None:
+            return
+        epoch = self._epoch
+        for product_id in product_ids:
+            product = self._products.get(product_id)
+            if product is None:
+                continue
+            chain = self._undo.get(product)
+            if chain and chain[-1][0] == epoch:
+                continue  # Already recorded since the newest view was taken
+            # Build a new list rather than appending, so views reading the old one never see it change
+            kept = [entry for entry in chain if entry[0] > oldest] if chain else []
+            kept.append((epoch, product._quantity_in_stock, product._price))
+            self._undo[product] = kept
+
+    def view(self) -> "InventoryView":
+        """Return a consistent read-only snapshot of the inventory as it is now; release() it when done.
+
+        Taking a view only waits for the writes in progress and copies
+        nothing. Afterwards each stock or price change saves the product's
+        previous state once per view epoch, and the first add or remove
+        copies the product dict, so writers never wait for a view's readers.
+        """
+        with self._structure_lock:
+            for stripe in self._stripes:
+                stripe.acquire()
+            try:
+                with self._view_lock:
+                    version = self._epoch
+                    self._epoch += 1
+                    self._open_views[version] = self._open_views.get(version, 0) + 1
+                    if self._oldest_view is None:
+                        self._oldest_view = version
+                    self._products_shared = True
+                    return InventoryView(self, version, self._products, self._total_value,
+                                         self.value_by_type(), self.units_by_type(), self._out_of_stock)
+            finally:
+                for stripe in reversed(self._stripes):
+                    stripe.release()
+
+    def _release_view(self, version: int):
+        with self._view_lock:
+            self._open_views[version] -= 1
+            if self._open_views[version] == 0:
+                del self._open_views[version]
+            self._oldest_view = min(self._open_views, default=None)
+            if self._oldest_view is None:
+                # Nothing can read the saved states any more; chains still in use are pruned by the next write
+                self._undo = {}
+
+    def save_in_background(self, filename: str) -> Future:
+        """Save a view of the inventory as it is now to `filename` from another thread.
+
+        Returns a Future that completes (or fails) when the file is written.
+        The save does not affect what an incremental save_to_file writes next.
+        It waits for any save or load in progress, so saves to one file are
+        written one at a time.
+        """
+        view = self.view()
+        future: Future = Future()
+
+        def save():
+            try:
+                with self._save_lock:
+                    view.save_to_file(filename)
+                future.set_result(filename)
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                view.release()
+
+        threading.Thread(target=save, name=f"save {filename}").start()
+        return future
+
+    def save_to_file(self, filename: str, incremental: bool = False):
+        """Save the inventory as Inventory.save_to_file does, without stalling writers while the file is written.
+
+        The locks are held only to take the changes since the last save and,
+        for a full save, a view to write out; changes made meanwhile go in
+        the next save.
+        """
+        with self._save_lock:
+            view, (removed, dirty) = self._begin_save(filename, incremental)
+            try:
+                if view is None:
+                    self._save_delta(filename, removed, dirty)
+                else:
+                    view.save_to_file(filename)
+                    if os.path.exists(filename + DELTA_SUFFIX):
+                        os.remove(filename + DELTA_SUFFIX)
+                    self._saved_as_base(filename)
+            except BaseException:
+                self._restore_changes(removed, dirty)
+                raise
+            finally:
+                if view is not None:
+                    view.release()
+
+    @_with_exclusive_lock
+    def _begin_save(self, filename: str, incremental: bool) -> tuple["InventoryView | None", tuple[set[str], set[str]]]:
+        """Take the changes since the last save and, unless they fit in a delta, a view of the whole inventory."""
+        view = None if incremental and self._can_save_delta(filename) else self.view()
+        return view, self._take_changes()
+
+    def load_from_file(self, filename: str):
+        """Load inventory from a JSON array or JSON Lines file, one product at a time, plus its delta file."""
+        with self._save_lock:
+            self._load_from_file(filename)
+
+    def add_product(self, product: Product):
+        """Add a product to the inventory."""
+        with self._structure_lock, self._stripe(product.product_id):
+            self._unshare_products()
+            super().add_product(product)
+
+    @_with_exclusive_lock
+    def upsert_many(self, products: Iterable[Product]) -> tuple[int, int]:
+        """Add products, replacing those already present with the same ID; return how many were inserted and updated."""
+        self._unshare_products()
+        return super().upsert_many(products)
+
+    def remove_product(self, product_id: str):
+        """Remove a product from the inventory by ID."""
+        with self._structure_lock, self._stripe(product_id):
+            self._unshare_products()
+            super().remove_product(product_id)
+
+    def _reset_aggregates(self):
+        for totals in self._totals:
+            totals.reset()
+
+    def _add_totals(self, product: Product, value: float, units: int, out_of_stock: int):
+        # Called with the product's stripe held, which guards that stripe's totals. A batch added
+        # under every stripe books each class under one of its products; only the sums are read
+        totals = self._totals[self._stripe_index(product.product_id)]
+        product_class = type(product)
+        totals.value_generations[product_class] = totals.value_generations.get(product_class, 0) + 1
+        totals.total_value += value
+        totals.value_by_type[product_class] = totals.value_by_type.get(product_class, 0) + value
+        totals.units_by_type[product_class] = totals.units_by_type.get(product_class, 0) + units
+        totals.out_of_stock += out_of_stock
+
+    def _drop_totals(self, product_class: type[Product]):
+        for totals in self._totals:
+            totals.value_by_type.pop(product_class, None)
+            totals.units_by_type.pop(product_class, None)
+
+    def _value_generation(self, product_class: type[Product]) -> int:
+        return sum(totals.value_generations.get(product_class, 0) for totals in self._totals)
+
+    def _stamp(self, product_type: str | None, values: bool) -> tuple:
+        # Adds and removes bump _generations under the structure lock. Stock and price changes bump
+        # their stripe's generations under that stripe, which the reads cached with values=True hold
+        with self._structure_lock:
+            return super()._stamp(product_type, values)
+
+    # The aggregates as Inventory reads them, summed over the stripes. Without every stripe held
+    # (as view() and check_aggregates do), a sum can mix stripes from just before and after a change
+    @property
+    def _total_value(self) -> float:
+        return sum(totals.total_value for totals in self._totals)
+
+    @property
+    def _value_by_type(self) -> dict[type[Product], float]:
+        return self._merge_totals("value_by_type")
+
+    @property
+    def _units_by_type(self) -> dict[type[Product], int]:
+        return self._merge_totals("units_by_type")
+
+    @property
+    def _out_of_stock(self) -> int:
+        return sum(totals.out_of_stock for totals in self._totals)
+
+    def _merge_totals(self, field: str) -> dict:
+        merged = {}
+        for totals in self._totals:
+            for product_class, amount in getattr(totals, field).items():
+                merged[product_class] = merged.get(product_class, 0) + amount
+        return merged
+
+    def sell_product(self, product_id: str, quantity: int):
+        """Sell a given quantity of a product."""
+        with self._stripe(product_id):
+            self._preserve((product_id,))
+            return super().sell_product(product_id, quantity)
+
+    def restock_product(self, product_id: str, quantity: int):
+        """Restock a given quantity of a product."""
+        with self._stripe(product_id):
+            self._preserve((product_id,))
+            return super().restock_product(product_id, quantity)
+
+    def update_price(self, product_id: str, new_price: float):
+        """Change the price of a product."""
+        with self._stripe(product_id):
+            self._preserve((product_id,))
+            super().update_price(product_id, new_price)
+
+    def set_reorder_threshold(self, product_id: str, threshold: int | None):
+        """Set the reorder point of one product; None falls back to its type's threshold."""
+        with self._structure_lock, self._stripe(product_id):
+            super().set_reorder_threshold(product_id, threshold)
+
+    def _run_batch(self, method, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        items = list(items)
+        stripes = self._stripes_for(product_id for product_id, _ in items)
+        for stripe in stripes:
+            stripe.acquire()
+        try:
+            self._preserve(product_id for product_id, _ in items)
+            return method(self, items)
+        finally:
+            for stripe in reversed(stripes):
+                stripe.release()
+
+    def sell_many(self, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Sell a batch of (product_id, quantity) items, all or nothing."""
+        return self._run_batch(Inventory.sell_many, items)
+
+    def restock_many(self, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Restock a batch of (product_id, quantity) items, all or nothing."""
+        return self._run_batch(Inventory.restock_many, items)
+
+    # Replacing the whole catalog blocks every other operation
+    _load_from_file = _with_exclusive_lock(Inventory.load_from_file)
+    load_snapshot = _with_exclusive_lock(Inventory.load_snapshot)
+
+    # Catalog-wide reads must not see the product dicts change size mid-iteration
+    search_by_name = _with_structure_lock(Inventory.search_by_name)
+    search_by_type = _with_structure_lock(Inventory.search_by_type)
+    list_all_products = _with_structure_lock(Inventory.list_all_products)
+    value_by_type = _with_structure_lock(Inventory.value_by_type)
+    units_by_type = _with_structure_lock(Inventory.units_by_type)
+    check_aggregates = _with_exclusive_lock(Inventory.check_aggregates)
+    # The sorted indexes are merged from every stripe's part
+    low_stock_products = _with_exclusive_lock(Inventory.low_stock_products)
+    lowest_stock = _with_exclusive_lock(Inventory.lowest_stock)
+    query_products = _with_exclusive_lock(Inventory.query_products)
+    below_reorder_threshold = _with_exclusive_lock(Inventory.below_reorder_threshold)
+    set_type_reorder_threshold = _with_exclusive_lock(Inventory.set_type_reorder_threshold)
+    remove_expired_products = _with_structure_lock(Inventory.remove_expired_products)
+    expiring_within = _with_structure_lock(Inventory.expiring_within)
+    # Stock changes add to the dirty sets a save takes
+    _restore_changes = _with_exclusive_lock(Inventory._restore_changes)
+    save_snapshot = _with_structure_lock(Inventory.save_snapshot)
+
+
+class InventoryView:
+    """Read-only snapshot of a ConcurrentInventory at one point in time (see ConcurrentInventory.view).
+
+    Products handed out are copies as of the snapshot. Release the view, or
+    use it as a context manager, so the inventory can drop the states kept for it.
+    """
+
+    def __init__(self, inventory: ConcurrentInventory, version: int, products: dict[str, Product],
+                 total_value: float, value_by_type: dict[str, float], units_by_type: dict[str, int], out_of_stock: int):
+        self.version = version
+        self._inventory = inventory
+        self._products = products
+        self._total_value = total_value
+        self._value_by_type = value_by_type
+        self._units_by_type = units_by_type
+        self._out_of_stock = out_of_stock
+        self._released = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def release(self):
+        """Let the inventory reclaim the product states kept for this view."""
+        if not self._released:
+            self._released = True
+            self._inventory._release_view(self.version)
+
+    def _state(self, product: Product) -> tuple[int, float]:
+        """Return the (quantity, price) a product had when the view was taken."""
+        if self._released:
+            raise ValueError("The view has been released")
+        # Read the live values first: a writer saves the old state before changing them
+        quantity, price = product._quantity_in_stock, product._price
+        for epoch, old_quantity, old_price in self._inventory._undo.get(product, ()):
+            if epoch > self.version:
+                return old_quantity, old_price
+        return quantity, price
+
+    def _copy(self, product: Product) -> Product:
+        quantity, price = self._state(product)
+        product = copy.copy(product)
+        product._quantity_in_stock, product._price = quantity, price
+        return product
+
+    def __len__(self):
+        return len(self._products)
+
+    def __iter__(self) -> Iterator[Product]:
+        return (self._copy(product) for product in self._products.values())
+
+    @property
+    def total_products(self):
+        return len(self._products)
+
+    def get_product(self, product_id: str) -> Product:
+        """Return a copy of the product with the given ID as it was when the view was taken."""
+        if product_id not in self._products:
+            raise KeyError(f"No product with ID {product_id} exists in inventory")
+        return self._copy(self._products[product_id])
+
+    def list_all_products(self) -> list[Product]:
+        """Return copies of all products as they were when the view was taken."""
+        return list(self)
+
+    def total_inventory_value(self):
+        """Return the total value of the inventory when the view was taken."""
+        return self._total_value
+
+    def value_by_type(self) -> dict[str, float]:
+        """Return the inventory value of each product type."""
+        return dict(self._value_by_type)
+
+    def units_by_type(self) -> dict[str, int]:
+        """Return the number of units in stock of each product type."""
+        return dict(self._units_by_type)
+
+    def out_of_stock_count(self) -> int:
+        """Return the number of products with no units in stock."""
+        return self._out_of_stock
+
+    def _records(self) -> Iterator[dict]:
+        for product in self._products.values():
+            record = product.to_dict()
+            record["quantity_in_stock"], record["price"] = self._state(product)
+            yield record
+
+    def save_to_file(self, filename: str):
+        """Save the view to a JSON file (JSON Lines if the name ends in .jsonl), replacing it atomically."""
+        replace_json_file(filename, self._records())
@@ -7,3 +7,13 @@ class DuplicateProductError(Exception):
 class InvalidProductTypeError(Exception):
     """Exception raised when the product type is invalid or unsupported."""
 
+class BatchOperationError(Exception):
+    """Exception raised when a batch operation is rejected; `failures` lists every failing item."""
+    
+    def __init__(self, failures: list[tuple[int, str, Exception]]):
+        self.failures = failures  # (position in the batch, product ID, error) for each failing item
+        super().__init__(f"{len(failures)} item(s) in the batch failed validation, nothing was applied")
+    
+    def __reduce__(self):
+        # Rebuild from the failures (not the message) when sent between processes
+        return (type(self), (self.failures,))
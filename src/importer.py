@@ -0,0 +1,189 @@
+"""Validated bulk import of supplier feeds (CSV or JSON Lines) into an existing inventory.
+
+A CSV feed has a header row naming the columns, which are the keys of
+`Product.to_dict()`: type, product_id, name, price, quantity_in_stock and
+the type-specific brand, warranty_years, expiry_date, size and material;
+columns a type does not use are left empty. A JSON Lines feed has one such
+object per line. Records must not contain line breaks.
+
+Rows are parsed and validated in a process pool, chunk by chunk, and merged
+in file order as an upsert: a product whose ID already exists is replaced,
+so a later row for the same ID wins. Rows that fail are not imported; each
+is written to a reject file as {"line": ..., "error": ..., "raw": ...}.
+"""
+import csv
+import gc
+import json
+import multiprocessing
+import os
+from itertools import islice
+from typing import Iterator
+
+from src.exceptions import DuplicateProductError
+from product import Product, product_from_dict
+
+CHUNK_LINES = 20_000
+CLOTHING_SIZES = ("S", "M", "L", "XL")
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_record(record: dict) -> Product:
+    """Build a product from a feed record, raising ValueError if any field is missing or invalid."""
+    product_id = record.get("product_id")
+    if not isinstance(product_id, str) or not product_id:
+        raise ValueError("product_id must be a non-empty string")
+    name = record.get("name")
+    if not isinstance(name, str) or not name:
+        raise ValueError("name must be a non-empty string")
+    price = record.get("price")
+    if not _is_number(price) or price <= 0:
+        raise ValueError(f"price must be a positive number, not {price!r}")
+    quantity = record.get("quantity_in_stock")
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 0:
+        raise ValueError(f"quantity_in_stock must be a non-negative integer, not {quantity!r}")
+
+    product_type = record.get("type")
+    if product_type == "Electronics":
+        warranty_years = record.get("warranty_years")
+        if not _is_number(warranty_years) or warranty_years < 0:
+            raise ValueError(f"warranty_years must be a non-negative number, not {warranty_years!r}")
+    elif product_type == "Clothing" and record.get("size") not in CLOTHING_SIZES:
+        raise ValueError(f"size must be one of {', '.join(CLOTHING_SIZES)}, not {record.get('size')!r}")
+
+    try:
+        return product_from_dict(record)
+    except KeyError as e:
+        raise ValueError(f"missing field {e}")
+    except TypeError as e:
+        raise ValueError(str(e))
+
+
+def _number(text: str) -> int | float:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _csv_record(header: list[str], row: list[str]) -> dict:
+    if len(row) != len(header):
+        raise ValueError(f"expected {len(header)} columns, found {len(row)}")
+    record = {column: value for column, value in zip(header, row) if value != ""}
+    try:
+        for column in ("price", "warranty_years"):
+            if column in record:
+                record[column] = _number(record[column])
+        if "quantity_in_stock" in record:
+            record["quantity_in_stock"] = int(record["quantity_in_stock"])
+    except ValueError as e:
+        raise ValueError(f"bad number: {str(e)}")
+    return record
+
+
+def _parse_chunk(task: tuple[str, list[str] | None, int, list[str]]) -> tuple[list[Product], list[dict]]:
+    """Parse and validate one chunk of lines; runs in a worker process."""
+    kind, header, first_line, lines = task
+    products: list[Product] = []
+    rejects: list[dict] = []
+    for line_number, line in enumerate(lines, first_line):
+        try:
+            if kind == "csv":
+                # Each line is read on its own, so a stray quote cannot pull the lines after it into its row
+                row = next(csv.reader([line]), [])
+                if not row:
+                    continue
+                record = _csv_record(header, row)
+            else:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+            products.append(validate_record(record))
+        except (ValueError, csv.Error) as e:
+            rejects.append({"line": line_number, "error": str(e), "raw": line.rstrip("\r\n")})
+    return products, rejects
+
+
+def _chunks(filename: str, chunk_lines: int) -> Iterator[tuple[str, list[str] | None, int, list[str]]]:
+    kind = "csv" if filename.endswith(".csv") else "jsonl"
+    with open(filename, "r", encoding="utf-8", newline="") as file:
+        header = None
+        line_number = 1
+        if kind == "csv":
+            header = next(csv.reader([file.readline()]), None)
+            if not header:
+                raise ValueError(f"CSV feed {filename} has no header row")
+            line_number = 2
+        while lines := list(islice(file, chunk_lines)):
+            yield kind, header, line_number, lines
+            line_number += len(lines)
+
+
+def bulk_import(inventory, filename: str, reject_filename: str | None = None,
+                processes: int | None = None, chunk_lines: int = CHUNK_LINES) -> dict[str, int]:
+    """Upsert the products of a CSV or JSON Lines feed into `inventory`.
+
+    Returns the number of products inserted and updated and of rows rejected.
+    Rejected rows go to `reject_filename` (by default the feed name plus
+    ".rejects.jsonl"); no reject file is left behind when every row is valid.
+    With `processes` set to 1 the rows are parsed in this process.
+    """
+    if not os.path.exists(filename):
+        raise FileNotFoundError(f"File {filename} not found")
+    if reject_filename is None:
+        reject_filename = filename + ".rejects.jsonl"
+    processes = processes or os.cpu_count() or 1
+    counts = {"inserted": 0, "updated": 0, "rejected": 0}
+
+    # Inventories with a batch upsert index each chunk in one pass; others take the products one by one
+    upsert_many = getattr(inventory, "upsert_many", None)
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    # Rejects go to a temporary file that replaces the reject file only once the import finished
+    temporary = reject_filename + ".tmp"
+    # The import allocates millions of long-lived objects and no garbage cycles; collections
+    # would only rescan the growing inventory again and again
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        results = pool.imap(_parse_chunk, _chunks(filename, chunk_lines)) if pool else map(
+            _parse_chunk, _chunks(filename, chunk_lines))
+        with open(temporary, "w", encoding="utf-8") as rejects_file:
+            for products, rejects in results:
+                if upsert_many is not None:
+                    inserted, updated = upsert_many(products)
+                    counts["inserted"] += inserted
+                    counts["updated"] += updated
+                else:
+                    for product in products:
+                        try:
+                            inventory.add_product(product)
+                            counts["inserted"] += 1
+                        except DuplicateProductError:
+                            inventory.remove_product(product.product_id)
+                            inventory.add_product(product)
+                            counts["updated"] += 1
+                for reject in rejects:
+                    rejects_file.write(json.dumps(reject) + "\n")
+                counts["rejected"] += len(rejects)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    finally:
+        if collecting:
+            gc.enable()
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if counts["rejected"]:
+        os.replace(temporary, reject_filename)
+    else:
+        os.remove(temporary)
+        if os.path.exists(reject_filename):
+            os.remove(reject_filename)  # Left by an earlier import of the feed
+    return counts
@@ -0,0 +1,409 @@
+"""Secondary indexes used by the Inventory to avoid full catalog scans."""
+import base64
+import heapq
+import json
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+
+class TrigramIndex:
+    """Inverted index from lowercase name trigrams to product IDs.
+
+    Posting lists are dicts used as insertion-ordered sets, so candidates come
+    back in the same order the products were added to the inventory.
+    """
+    N = 3
+
+    def __init__(self):
+        self._postings: dict[str, dict[str, None]] = {}
+        self._names: dict[str, str] = {}  # product_id -> lowercase name
+
+    def __len__(self):
+        return len(self._names)
+
+    @classmethod
+    def _grams(cls, text: str) -> set[str]:
+        return {text[i:i + cls.N] for i in range(len(text) - cls.N + 1)}
+
+    def add(self, product_id: str, name: str):
+        """Index the name of a product, replacing the name it was indexed under before."""
+        name = name.lower()
+        if product_id in self._names:
+            self.remove(product_id)  # Otherwise the old name's postings would keep the ID forever
+        self._names[product_id] = name
+        postings = self._postings
+        for gram in self._grams(name):
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = {product_id: None}
+            else:
+                posting[product_id] = None
+
+    def add_many(self, items: Iterable[tuple[str, str]]):
+        """Index the names of many (product_id, name) pairs, in order.
+        
+        The IDs are collected per trigram first and each posting list is then
+        extended once; names shared by several products are split only once.
+        """
+        names = self._names
+        new_postings: dict[str, list[str]] = {}
+        appenders: dict[str, list] = {}  # lowercase name -> the append methods of its trigrams' lists
+        for product_id, name in items:
+            name = name.lower()
+            names[product_id] = name
+            appends = appenders.get(name)
+            if appends is None:
+                appends = appenders[name] = [new_postings.setdefault(gram, []).append for gram in self._grams(name)]
+            for append in appends:
+                append(product_id)
+        postings = self._postings
+        for gram, product_ids in new_postings.items():
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = dict.fromkeys(product_ids)
+            else:
+                posting.update(dict.fromkeys(product_ids))
+
+    def remove(self, product_id: str):
+        """Drop a product from the index."""
+        name = self._names.pop(product_id, None)
+        if name is None:
+            return
+        for gram in self._grams(name):
+            posting = self._postings[gram]
+            del posting[product_id]
+            if not posting:
+                del self._postings[gram]
+
+    def remove_many(self, product_ids: Iterable[str]):
+        """Drop many products from the index; names shared by several products are split only once."""
+        names = self._names
+        postings = self._postings
+        grams_of: dict[str, set[str]] = {}
+        for product_id in product_ids:
+            name = names.pop(product_id, None)
+            if name is None:
+                continue
+            grams = grams_of.get(name)
+            if grams is None:
+                grams = grams_of[name] = self._grams(name)
+            for gram in grams:
+                posting = postings[gram]
+                del posting[product_id]
+                if not posting:
+                    del postings[gram]
+
+    def clear(self):
+        self._postings = {}
+        self._names = {}
+
+    def estimate(self, text: str) -> int:
+        """Return an upper bound on the number of products `search(text)` can return."""
+        text = text.lower()
+        if len(text) < self.N:
+            return len(self._names)
+        return min(len(self._postings.get(gram, ())) for gram in self._grams(text))
+
+    def search(self, text: str) -> list[str]:
+        """Return the IDs of products whose name contains `text` (case-insensitive)."""
+        text = text.lower()
+
+        # Queries shorter than a trigram cannot be answered from the postings
+        if len(text) < self.N:
+            return [product_id for product_id, name in self._names.items() if text in name]
+
+        postings = []
+        for gram in self._grams(text):
+            posting = self._postings.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = list(postings[0])
+        for posting in postings[1:]:
+            candidates = [product_id for product_id in candidates if product_id in posting]
+
+        # Trigram hits are only candidates: "abcd" also matches a name with "abc" and "bcd" apart
+        names = self._names
+        return [product_id for product_id in candidates if text in names[product_id]]
+
+
+def _entry_key(entry: tuple) -> object:
+    return entry[0]
+
+
+class SortedIndex:
+    """Product IDs kept sorted by a numeric key such as a stock level or a price.
+
+    Entries are (key, product_id) pairs, so products with equal keys come back
+    ordered by ID. They are stored as a list of sorted chunks of at most
+    2 * LOAD entries plus the largest entry of each chunk: an insert or remove
+    bisects to its chunk and shifts only that chunk, so keys can be updated
+    cheaply even with millions of products.
+    """
+    LOAD = 512
+
+    def __init__(self):
+        self._chunks: list[list[tuple[float, str]]] = []
+        self._maxes: list[tuple[float, str]] = []
+        self._keys: dict[str, float] = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, product_id: str):
+        return product_id in self._keys
+
+    def add(self, product_id: str, key: float):
+        entry = (key, product_id)
+        self._keys[product_id] = key
+        if not self._chunks:
+            self._chunks.append([entry])
+            self._maxes.append(entry)
+            return
+        index = min(bisect_left(self._maxes, entry), len(self._chunks) - 1)
+        chunk = self._chunks[index]
+        insort(chunk, entry)
+        self._maxes[index] = chunk[-1]
+        if len(chunk) > 2 * self.LOAD:
+            half = chunk[self.LOAD:]
+            del chunk[self.LOAD:]
+            self._chunks.insert(index + 1, half)
+            self._maxes[index] = chunk[-1]
+            self._maxes.insert(index + 1, half[-1])
+
+    def add_many(self, items: Iterable[tuple[str, float]]):
+        """Add many (product_id, key) pairs for products not in the index yet.
+        
+        A batch that is large next to the index is sorted in with the
+        existing entries and re-chunked, instead of inserted one by one.
+        """
+        entries = [(key, product_id) for product_id, key in items]
+        if len(entries) * 16 < len(self._keys):
+            for key, product_id in entries:
+                self.add(product_id, key)
+            return
+        self._keys.update((product_id, key) for key, product_id in entries)
+        for chunk in self._chunks:
+            entries.extend(chunk)
+        entries.sort()
+        self._rechunk(entries)
+
+    def remove_many(self, product_ids: Iterable[str]):
+        """Remove many products; a batch that is large next to the index is filtered out in one pass."""
+        keys = self._keys
+        removed = {product_id for product_id in product_ids if product_id in keys}
+        if len(removed) * 16 < len(keys):
+            for product_id in removed:
+                self.remove(product_id)
+            return
+        for product_id in removed:
+            del keys[product_id]
+        self._rechunk([entry for chunk in self._chunks for entry in chunk if entry[1] not in removed])
+
+    def _rechunk(self, entries: list[tuple[float, str]]):
+        """Replace the contents of the index with `entries`, which must be sorted."""
+        load = self.LOAD
+        self._chunks = [entries[start:start + load] for start in range(0, len(entries), load)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+
+    def remove(self, product_id: str):
+        key = self._keys.pop(product_id, None)
+        if key is None:
+            return
+        entry = (key, product_id)
+        index = bisect_left(self._maxes, entry)
+        chunk = self._chunks[index]
+        del chunk[bisect_left(chunk, entry)]
+        if chunk:
+            self._maxes[index] = chunk[-1]
+        else:
+            del self._chunks[index]
+            del self._maxes[index]
+
+    def update(self, product_id: str, key: float):
+        """Move a product to a new key, adding it if it is not indexed yet."""
+        if product_id in self._keys and self._keys[product_id] == key:
+            return
+        self.remove(product_id)
+        self.add(product_id, key)
+
+    def clear(self):
+        self._chunks = []
+        self._maxes = []
+        self._keys = {}
+
+    def key_of(self, product_id: str) -> float | None:
+        return self._keys.get(product_id)
+
+    def _position(self, value, right: bool, key=None) -> tuple[int, int]:
+        """Return the (chunk, offset) where `value` would be inserted, left or right of equal entries."""
+        bisect = bisect_right if right else bisect_left
+        index = bisect(self._maxes, value, key=key)
+        if index == len(self._chunks):
+            return index, 0
+        return index, bisect(self._chunks[index], value, key=key)
+
+    def _bounds(self, low: float | None, high: float | None) -> tuple[tuple[int, int], tuple[int, int]]:
+        start = (0, 0) if low is None else self._position(low, right=False, key=_entry_key)
+        end = (len(self._chunks), 0) if high is None else self._position(high, right=True, key=_entry_key)
+        return start, end
+
+    def _offset(self, position: tuple[int, int]) -> int:
+        index, offset = position
+        return sum(map(len, self._chunks[:index])) + offset
+
+    def count(self, low: float | None = None, high: float | None = None) -> int:
+        """Return the number of entries with low <= key <= high, without visiting them."""
+        start, end = self._bounds(low, high)
+        return max(0, self._offset(end) - self._offset(start))
+
+    def range(self, low: float | None = None, high: float | None = None) -> list[str]:
+        """Return the IDs with low <= key <= high (either bound may be None), in key order."""
+        return [product_id for _, product_id in self.scan(low, high)]
+
+    def first(self, count: int) -> list[str]:
+        """Return the IDs of the `count` entries with the smallest keys."""
+        return [product_id for _, product_id in islice(self.scan(), count)]
+
+    def scan(self, low: float | None = None, high: float | None = None,
+             after: tuple[float, str] | None = None, descending: bool = False) -> Iterator[tuple[float, str]]:
+        """Yield (key, product_id) entries with low <= key <= high, in key order.
+
+        `after` is the last entry of a previous scan; the scan resumes just past
+        it, even if that entry has since been removed or moved.
+        """
+        start, end = self._bounds(low, high)
+        chunks = self._chunks
+        if descending:
+            if after is not None:
+                end = min(end, self._position(after, right=False))
+            index, offset = end
+            while (index, offset) > start:
+                if offset == 0:
+                    index -= 1
+                    offset = len(chunks[index])
+                    continue
+                offset -= 1
+                yield chunks[index][offset]
+        else:
+            if after is not None:
+                start = max(start, self._position(after, right=True))
+            index, offset = start
+            while (index, offset) < end:
+                chunk = chunks[index]
+                stop = end[1] if index == end[0] else len(chunk)
+                yield from chunk[offset:stop]
+                index, offset = index + 1, 0
+
+
+class PartitionedIndex:
+    """SortedIndex split into partitions, so that writers owning different partitions share nothing.
+
+    `partition_of(product_id)` picks the partition of each product, e.g. its
+    lock stripe. Reads merge the partitions and return the same entries, in
+    the same order, as one SortedIndex would; they must not run while any
+    partition is being written.
+    """
+
+    def __init__(self, partitions: int, partition_of: Callable[[str], int]):
+        self._parts = [SortedIndex() for _ in range(partitions)]
+        self._partition_of = partition_of
+
+    def _part(self, product_id: str) -> SortedIndex:
+        return self._parts[self._partition_of(product_id)]
+
+    def __len__(self):
+        return sum(map(len, self._parts))
+
+    def __contains__(self, product_id: str):
+        return product_id in self._part(product_id)
+
+    def add(self, product_id: str, key: float):
+        self._part(product_id).add(product_id, key)
+
+    def add_many(self, items: Iterable[tuple[str, float]]):
+        batches: dict[int, list[tuple[str, float]]] = {}
+        for product_id, key in items:
+            batches.setdefault(self._partition_of(product_id), []).append((product_id, key))
+        for partition, batch in batches.items():
+            self._parts[partition].add_many(batch)
+
+    def remove_many(self, product_ids: Iterable[str]):
+        batches: dict[int, list[str]] = {}
+        for product_id in product_ids:
+            batches.setdefault(self._partition_of(product_id), []).append(product_id)
+        for partition, batch in batches.items():
+            self._parts[partition].remove_many(batch)
+
+    def remove(self, product_id: str):
+        self._part(product_id).remove(product_id)
+
+    def update(self, product_id: str, key: float):
+        """Move a product to a new key, adding it if it is not indexed yet."""
+        self._part(product_id).update(product_id, key)
+
+    def clear(self):
+        for part in self._parts:
+            part.clear()
+
+    def key_of(self, product_id: str) -> float | None:
+        return self._part(product_id).key_of(product_id)
+
+    def count(self, low: float | None = None, high: float | None = None) -> int:
+        """Return the number of entries with low <= key <= high, without visiting them."""
+        return sum(part.count(low, high) for part in self._parts)
+
+    def range(self, low: float | None = None, high: float | None = None) -> list[str]:
+        """Return the IDs with low <= key <= high (either bound may be None), in key order."""
+        return [product_id for _, product_id in self.scan(low, high)]
+
+    def first(self, count: int) -> list[str]:
+        """Return the IDs of the `count` entries with the smallest keys."""
+        return [product_id for _, product_id in islice(self.scan(), count)]
+
+    def scan(self, low: float | None = None, high: float | None = None,
+             after: tuple[float, str] | None = None, descending: bool = False) -> Iterator[tuple[float, str]]:
+        """Yield (key, product_id) entries with low <= key <= high, in key order (see SortedIndex.scan)."""
+        return heapq.merge(*(part.scan(low, high, after, descending) for part in self._parts), reverse=descending)
+
+
+class ExpiryIndex(SortedIndex):
+    """Product IDs kept sorted by expiry time.
+
+    A sorted index (rather than a heap) also answers range queries such as
+    "what expires in the next N days" with two binary searches.
+    """
+
+    def pop_expired(self, now: datetime) -> list[str]:
+        """Remove and return the IDs of products that expired strictly before `now`."""
+        expired = []
+        for expires_at, product_id in self.scan(high=now):
+            if expires_at >= now:
+                break
+            expired.append(product_id)
+        for product_id in expired:
+            self.remove(product_id)
+        return expired
+
+    def between(self, start: datetime | None, end: datetime | None) -> list[str]:
+        """Return the IDs of products expiring in [start, end] (either bound may be None), soonest first."""
+        return self.range(start, end)
+
+
+def encode_cursor(key: float, product_id: str) -> str:
+    """Encode the sort position of the last result of a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps([key, product_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    try:
+        key, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor {cursor!r}: {str(e)}")
+    if not isinstance(key, (int, float)) or not isinstance(product_id, str):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return key, product_id
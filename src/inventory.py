@@ -1,13 +1,50 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
-from src.exceptions import DuplicateProductError, InsufficientStockError
-from product import Clothing, Electronics, Grocery, Product
+import math
+import os
+from typing import Callable, Iterable
+from src.exceptions import BatchOperationError, DuplicateProductError, InsufficientStockError
+from cache import MISSING, ResultCache
+from indexes import ExpiryIndex, SortedIndex, TrigramIndex, decode_cursor, encode_cursor
+from jsonstream import iter_json_array, iter_json_lines, replace_json_file
+from product import Grocery, Product, product_from_dict
+from query import Query
+from snapshot import SnapshotReader, save_snapshot
+
+DELTA_SUFFIX = ".delta"
+
+
+def _file_signature(filename: str) -> list[int]:
+    """Identify one version of a file, so a delta file can tell whether it still belongs to its base."""
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime_ns]
 
 
 class Inventory:
     """Class to manage a collection of products."""
+    # An incremental save rewrites the whole file once the delta would hold more records than this share of the catalog
+    delta_compact_ratio = 0.5
+    # Results of this many distinct searches and pages are kept; 0 disables the cache
+    query_cache_size = 256
+    
     def __init__(self):
         self._products: dict[str, Product] = {}  # Dictionary with product_id as key and product object as value
+        self._name_index = TrigramIndex()
+        self._by_type: dict[type[Product], dict[str, Product]] = {}  # Products bucketed by their exact class
+        self._expiry_index = ExpiryIndex()
+        self._stock_index = SortedIndex()
+        self._price_index = SortedIndex()
+        self._reorder_index = SortedIndex()  # Stock minus reorder threshold, for products that have one
+        self._reorder_thresholds: dict[str, int] = {}  # product_id -> threshold, overrides the type threshold
+        self._type_reorder_thresholds: dict[str, int] = {}  # lowercase type name -> threshold
+        self._reorder_listeners: list[Callable[[Product, bool], None]] = []
+        self._reset_aggregates()
+        self._reset_save_tracking()
+        # Bumped per product class: by adds and removes, and by stock and price changes. Never reset,
+        # so a stamp taken before a change can never match again
+        self._generations: dict[type[Product], int] = {}
+        self._value_generations: dict[type[Product], int] = {}
+        self._query_cache = ResultCache(self.query_cache_size)
     
     @property
     def total_products(self):
@@ -17,33 +54,353 @@ class Inventory:
         """Add a product to the inventory."""
         if product.product_id in self._products:
             raise DuplicateProductError(f"Product with ID {product.product_id} already exists")
+        if product._owner is not None:
+            raise ValueError(f"Product {product.product_id} already belongs to another inventory")
+        product._owner = self
+        self._account(product, 1)
         self._products[product.product_id] = product
+        self._generations[type(product)] = self._generations.get(type(product), 0) + 1
+        self._dirty.add(product.product_id)
+        self._removed.discard(product.product_id)
+        self._name_index.add(product.product_id, product.name)
+        self._by_type.setdefault(type(product), {})[product.product_id] = product
+        if isinstance(product, Grocery):
+            self._expiry_index.add(product.product_id, product.expires_at)
+        self._stock_index.add(product.product_id, product.quantity_in_stock)
+        self._price_index.add(product.product_id, product.price)
+        threshold = self._reorder_threshold_of(product)
+        if threshold is not None:
+            self._reorder_index.add(product.product_id, product.quantity_in_stock - threshold)
     
     
     def remove_product(self, product_id: str):
         """Remove a product from the inventory by ID."""
         if product_id not in self._products:
             raise KeyError(f"No product with ID {product_id} exists in inventory")
-        del self._products[product_id]
+        product = self._products.pop(product_id)
+        product._owner = None
+        self._generations[type(product)] += 1
+        self._account(product, -1)
+        self._dirty.discard(product_id)
+        self._removed.add(product_id)
+        self._name_index.remove(product_id)
+        
+        bucket = self._by_type[type(product)]
+        del bucket[product_id]
+        if not bucket:
+            # Last product of its type is gone; drop the (possibly drifted) running sums with it
+            del self._by_type[type(product)]
+            self._drop_totals(type(product))
+        self._expiry_index.remove(product_id)
+        self._stock_index.remove(product_id)
+        self._price_index.remove(product_id)
+        self._reorder_index.remove(product_id)
+        # A product added later under the same ID starts from its type's threshold
+        self._reorder_thresholds.pop(product_id, None)
+    
+    
+    def upsert_many(self, products: Iterable[Product]) -> tuple[int, int]:
+        """Add products, replacing those already present with the same ID; return how many were inserted and updated.
+        
+        A later product in `products` replaces an earlier one with the same ID.
+        The new products are indexed in one pass over the batch rather than one
+        product at a time.
+        """
+        batch: dict[str, Product] = {}
+        rows = 0
+        for product in products:
+            if product._owner is not None:
+                raise ValueError(f"Product {product.product_id} already belongs to another inventory")
+            batch[product.product_id] = product
+            rows += 1
+        existing = batch.keys() & self._products.keys()
+        self._remove_many(existing)
+        self._add_new(list(batch.values()))
+        inserted = len(batch) - len(existing)
+        return inserted, rows - inserted
+    
+    
+    def _add_new(self, products: list[Product]):
+        """Add products whose IDs are not in the inventory, building their index entries and aggregates in one pass."""
+        totals: dict[type[Product], list] = {}  # class -> [a product of it, value, units, out of stock]
+        stocks, prices, expiries, reorders = [], [], [], []
+        has_thresholds = bool(self._reorder_thresholds or self._type_reorder_thresholds)
+        for product in products:
+            product._owner = self
+            product_id, quantity, price = product.product_id, product.quantity_in_stock, product.price
+            product_class = type(product)
+            total = totals.get(product_class)
+            if total is None:
+                total = totals[product_class] = [product, 0, 0, 0]
+            total[1] += price * quantity
+            total[2] += quantity
+            total[3] += quantity == 0
+            self._products[product_id] = product
+            self._by_type.setdefault(product_class, {})[product_id] = product
+            stocks.append((product_id, quantity))
+            prices.append((product_id, price))
+            if isinstance(product, Grocery):
+                expiries.append((product_id, product.expires_at))
+            if has_thresholds:
+                threshold = self._reorder_threshold_of(product)
+                if threshold is not None:
+                    reorders.append((product_id, quantity - threshold))
+        
+        for product_class, (product, value, units, out_of_stock) in totals.items():
+            self._generations[product_class] = self._generations.get(product_class, 0) + 1
+            self._add_totals(product, value, units, out_of_stock)
+        ids = [product_id for product_id, _ in stocks]
+        self._dirty.update(ids)
+        self._removed.difference_update(ids)
+        self._name_index.add_many((product.product_id, product.name) for product in products)
+        self._expiry_index.add_many(expiries)
+        self._stock_index.add_many(stocks)
+        self._price_index.add_many(prices)
+        self._reorder_index.add_many(reorders)
+    
+    
+    def _remove_many(self, product_ids: set[str]):
+        """Remove products that are in the inventory, dropping their index entries and aggregates in one pass."""
+        totals: dict[type[Product], list] = {}  # class -> [a product of it, value, units, out of stock]
+        for product_id in product_ids:
+            product = self._products.pop(product_id)
+            product._owner = None
+            product_class = type(product)
+            quantity = product.quantity_in_stock
+            total = totals.get(product_class)
+            if total is None:
+                total = totals[product_class] = [product, 0, 0, 0]
+            total[1] -= product.price * quantity
+            total[2] -= quantity
+            total[3] -= quantity == 0
+            del self._by_type[product_class][product_id]
+            self._reorder_thresholds.pop(product_id, None)
+        
+        for product_class, (product, value, units, out_of_stock) in totals.items():
+            self._generations[product_class] += 1
+            self._add_totals(product, value, units, out_of_stock)
+            if not self._by_type[product_class]:
+                del self._by_type[product_class]
+                self._drop_totals(product_class)
+        self._dirty.difference_update(product_ids)
+        self._removed.update(product_ids)
+        self._name_index.remove_many(product_ids)
+        self._expiry_index.remove_many(product_ids)
+        self._stock_index.remove_many(product_ids)
+        self._price_index.remove_many(product_ids)
+        self._reorder_index.remove_many(product_ids)
+    
+    
+    def _clear(self):
+        """Remove every product and reset the indexes."""
+        for product in self._products.values():
+            product._owner = None
+        self._products = {}
+        self._name_index.clear()
+        self._by_type = {}
+        self._expiry_index.clear()
+        self._stock_index.clear()
+        self._price_index.clear()
+        self._reorder_index.clear()
+        # Like remove_product, so a product added later under one of these IDs starts from its type's threshold
+        self._reorder_thresholds = {}
+        self._reset_aggregates()
+        self._reset_save_tracking()
+        self._query_cache.clear()
+    
+    
+    @staticmethod
+    def _stage(products: Iterable[Product]) -> dict[str, Product]:
+        """Collect products that are about to replace the catalog by ID, rejecting duplicates as add_product does."""
+        staged: dict[str, Product] = {}
+        for product in products:
+            if product.product_id in staged:
+                raise DuplicateProductError(f"Product with ID {product.product_id} already exists")
+            staged[product.product_id] = product
+        return staged
+    
+    
+    def _replace_products(self, products: list[Product]):
+        """Make `products`, whose IDs are distinct, the whole catalog, indexing them in one pass.
+        
+        Per-product reorder thresholds are kept for the IDs that are still in the catalog.
+        """
+        thresholds = self._reorder_thresholds
+        kept = {product.product_id: thresholds[product.product_id] for product in products if product.product_id in thresholds}
+        self._clear()
+        self._reorder_thresholds = kept
+        self._add_new(products)
+    
+    
+    def _reset_save_tracking(self):
+        """Forget which file the inventory was last saved to or loaded from, and what changed since."""
+        self._dirty: set[str] = set()    # IDs added or changed since the last save
+        self._removed: set[str] = set()  # IDs removed since the last save
+        self._base_file: str | None = None
+        self._base_signature: list[int] | None = None
+        self._delta_records = 0
+    
+    
+    def _reset_aggregates(self):
+        self._total_value = 0
+        self._value_by_type: dict[type[Product], float] = {}
+        self._units_by_type: dict[type[Product], int] = {}
+        self._out_of_stock = 0
+    
+    
+    def _add_totals(self, product: Product, value: float, units: int, out_of_stock: int):
+        """Add changes in value, units and out-of-stock count to the running aggregates of a product's class.
+        
+        Also marks the stock and price of the class as changed for cached query results.
+        """
+        product_class = type(product)
+        self._value_generations[product_class] = self._value_generations.get(product_class, 0) + 1
+        self._total_value += value
+        self._value_by_type[product_class] = self._value_by_type.get(product_class, 0) + value
+        self._units_by_type[product_class] = self._units_by_type.get(product_class, 0) + units
+        self._out_of_stock += out_of_stock
+    
+    
+    def _drop_totals(self, product_class: type[Product]):
+        """Forget the running sums of a product class that has no products left."""
+        del self._value_by_type[product_class]
+        del self._units_by_type[product_class]
+    
+    
+    def _value_generation(self, product_class: type[Product]) -> int:
+        return self._value_generations.get(product_class, 0)
+    
+    
+    def _account(self, product: Product, sign: int):
+        """Add (sign=1) or subtract (sign=-1) a product's contribution to the running aggregates."""
+        quantity = product.quantity_in_stock
+        self._add_totals(product, sign * product.price * quantity, sign * quantity, sign if quantity == 0 else 0)
+    
+    
+    def _stock_changed(self, product: Product, old_quantity: int):
+        """Called by a product after its stock level changed."""
+        self._dirty.add(product.product_id)
+        delta = product.quantity_in_stock - old_quantity
+        self._add_totals(product, product.price * delta, delta,
+                         (product.quantity_in_stock == 0) - (old_quantity == 0))
+        
+        self._stock_index.update(product.product_id, product.quantity_in_stock)
+        threshold = self._reorder_threshold_of(product)
+        if threshold is not None:
+            self._reorder_index.update(product.product_id, product.quantity_in_stock - threshold)
+            below = product.quantity_in_stock <= threshold
+            if below != (old_quantity <= threshold):
+                self._notify_reorder(product, below)
+    
+    
+    def _price_changed(self, product: Product, old_price: float):
+        """Called by a product after its price changed."""
+        self._dirty.add(product.product_id)
+        self._add_totals(product, (product.price - old_price) * product.quantity_in_stock, 0, 0)
+        self._price_index.update(product.product_id, product.price)
+    
+    
+    def query(self) -> Query:
+        """Start a lazy query over the products (see query.py), e.g.
+        
+            inventory.query().of_type("electronics").price_between(100, 500).where(brand="Apple")
+        """
+        return Query(self)
+    
+    
+    def _stamp(self, product_type: str | None, values: bool) -> tuple:
+        """Return the generations a cached result depends on: those of one type (lowercase name) or of all types.
+        
+        With values=False only adds and removes count, for results that do not depend on stock or price.
+        """
+        return tuple(
+            (product_class, generation, self._value_generation(product_class) if values else 0)
+            for product_class, generation in self._generations.items()
+            if product_type is None or product_class.__name__.lower() == product_type
+        )
+    
+    
+    def _cached(self, key: tuple, product_type: str | None, values: bool, compute: Callable[[], object]):
+        """Return the cached result for `key` if nothing it depends on changed since, else compute and cache it."""
+        stamp = self._stamp(product_type, values)
+        result = self._query_cache.get(key, stamp)
+        if result is MISSING:
+            result = compute()
+            self._query_cache.put(key, stamp, result)
+        return result
+    
+    
+    def query_cache_stats(self) -> dict[str, int]:
+        """Return the hits, misses, evictions, stale entries dropped (invalidations) and size of the query cache."""
+        return self._query_cache.stats()
     
     
     def search_by_name(self, name: str) -> list[Product]:
-        """Search for products by name (case-insensitive partial match)."""
-        return [
-            product for product in self._products.values() 
-            if name.lower() in product.name.lower()
-        ]
+        """Search for products by name (case-insensitive partial match); results are cached until a product is added or removed."""
+        name = name.lower()
+        return list(self._cached(("name", name), None, False, lambda: list(self.query().name_contains(name))))
 
 
     def search_by_type(self, product_type: str) -> list[Product]:
-        """Search for products by type."""
-        products: list[Product] = []
+        """Search for products by type; results are cached until a product of that type is added or removed."""
+        product_type = product_type.lower()
+        return list(self._cached(("type", product_type), product_type, False,
+                                 lambda: list(self.query().of_type(product_type))))
+
+
+    def query_products(self, product_type: str | None = None,
+                       min_price: float | None = None, max_price: float | None = None,
+                       min_stock: int | None = None, max_stock: int | None = None,
+                       sort_by: str = "price", descending: bool = False,
+                       limit: int = 50, cursor: str | None = None) -> tuple[list[Product], str | None]:
+        """Return one page of products filtered by type, price and stock, sorted by price or stock.
         
-        for product in self._products.values():
-            if product.__class__.__name__.lower() == product_type.lower():
-                products.append(product)
+        Results come from the sorted index of the `sort_by` field ("price" or
+        "quantity_in_stock"); ties are ordered by product ID. Returns the page
+        and a cursor for the next page (None after the last page). Pass the
+        cursor back to continue where the page ended: products added or
+        removed meanwhile do not shift the following pages.
+        """
+        if sort_by == "price":
+            index, low, high = self._price_index, min_price, max_price
+            other, other_low, other_high = "quantity_in_stock", min_stock, max_stock
+        elif sort_by == "quantity_in_stock":
+            index, low, high = self._stock_index, min_stock, max_stock
+            other, other_low, other_high = "price", min_price, max_price
+        else:
+            raise ValueError(f"Cannot sort by {sort_by}; use 'price' or 'quantity_in_stock'")
+        if limit <= 0:
+            raise ValueError("Limit must be positive")
+        if product_type is not None:
+            product_type = product_type.lower()
+        after = decode_cursor(cursor) if cursor is not None else None
+        
+        def scan() -> tuple[list[Product], str | None]:
+            page: list[Product] = []
+            for key, product_id in index.scan(low, high, after, descending):
+                product = self._products[product_id]
+                if product_type is not None and type(product).__name__.lower() != product_type:
+                    continue
+                value = getattr(product, other)
+                if (other_low is not None and value < other_low) or (other_high is not None and value > other_high):
+                    continue
+                page.append(product)
+                if len(page) == limit:
+                    return page, encode_cursor(key, product_id)
+            return page, None
         
-        return products 
+        page, next_cursor = self._cached(
+            ("page", product_type, min_price, max_price, min_stock, max_stock, sort_by, descending, limit, cursor),
+            product_type, True, scan,
+        )
+        return list(page), next_cursor
+
+
+    def get_product(self, product_id: str) -> Product:
+        """Return the product with the given ID."""
+        if product_id not in self._products:
+            raise KeyError(f"No product with ID {product_id} exists in inventory")
+        return self._products[product_id]
 
 
     def list_all_products(self) -> list[Product]:
@@ -73,67 +430,382 @@ class Inventory:
         return product.restock(quantity)
 
 
+    def _validate_batch(self, items: Iterable[tuple[str, int]], selling: bool) -> dict[str, int]:
+        """Check every (product_id, quantity) pair and return the total quantity per product.
+        
+        Raises BatchOperationError listing every failing item; nothing is applied in that case.
+        """
+        totals: dict[str, int] = {}
+        failures: list[tuple[int, str, Exception]] = []
+        products = self._products
+        
+        for position, (product_id, quantity) in enumerate(items):
+            product = products.get(product_id)
+            if product is None:
+                failures.append((position, product_id, KeyError(f"No product with ID {product_id} exists in inventory")))
+            elif not isinstance(quantity, int) or quantity <= 0:
+                failures.append((position, product_id, ValueError("Quantity must be a positive integer")))
+            elif selling and totals.get(product_id, 0) + quantity > product.quantity_in_stock:
+                available = product.quantity_in_stock - totals.get(product_id, 0)
+                failures.append((position, product_id, InsufficientStockError(
+                    f"Cannot sell product {product.name}: Only {available} units available")))
+            else:
+                totals[product_id] = totals.get(product_id, 0) + quantity
+        
+        if failures:
+            raise BatchOperationError(failures)
+        return totals
+
+
+    def sell_many(self, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Sell a batch of (product_id, quantity) items, all or nothing.
+        
+        Returns the remaining stock of each product sold.
+        """
+        totals = self._validate_batch(items, selling=True)
+        products = self._products
+        return {product_id: products[product_id].sell(quantity) for product_id, quantity in totals.items()}
+
+
+    def restock_many(self, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Restock a batch of (product_id, quantity) items, all or nothing.
+        
+        Returns the new stock level of each product restocked.
+        """
+        totals = self._validate_batch(items, selling=False)
+        products = self._products
+        return {product_id: products[product_id].restock(quantity) for product_id, quantity in totals.items()}
+
+
+    def update_price(self, product_id: str, new_price: float):
+        """Change the price of a product."""
+        if product_id not in self._products:
+            raise KeyError(f"No product with ID {product_id} exists in inventory")
+        
+        self._products[product_id].price = new_price
+
+
     def total_inventory_value(self):
-        """Calculate the total value of all products in inventory."""
-        return sum([product.get_total_value() for product in self._products.values()])
+        """Return the total value of all products in inventory (maintained incrementally)."""
+        return self._total_value
+    
+    
+    def value_by_type(self) -> dict[str, float]:
+        """Return the inventory value of each product type."""
+        return {product_class.__name__: value for product_class, value in self._value_by_type.items()}
+    
+    
+    def units_by_type(self) -> dict[str, int]:
+        """Return the number of units in stock of each product type."""
+        return {product_class.__name__: units for product_class, units in self._units_by_type.items()}
+    
+    
+    def out_of_stock_count(self) -> int:
+        """Return the number of products with no units in stock."""
+        return self._out_of_stock
+    
+    
+    def check_aggregates(self):
+        """Recompute every running aggregate from scratch and raise AssertionError on any mismatch.
+        
+        Values are compared with a small tolerance, since running float sums drift slightly.
+        """
+        def close(a: float, b: float) -> bool:
+            return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+        
+        expected_value = {
+            product_class: math.fsum(product.get_total_value() for product in bucket.values())
+            for product_class, bucket in self._by_type.items()
+        }
+        expected_units = {
+            product_class: sum(product.quantity_in_stock for product in bucket.values())
+            for product_class, bucket in self._by_type.items()
+        }
+        expected_out_of_stock = sum(1 for product in self._products.values() if product.quantity_in_stock == 0)
+        
+        problems = []
+        if not close(self._total_value, math.fsum(expected_value.values())):
+            problems.append(f"total value {self._total_value} != {math.fsum(expected_value.values())}")
+        if self._value_by_type.keys() != expected_value.keys() or not all(
+            close(self._value_by_type[product_class], value) for product_class, value in expected_value.items()
+        ):
+            problems.append(f"value by type {self._value_by_type} != {expected_value}")
+        if self._units_by_type != expected_units:
+            problems.append(f"units by type {self._units_by_type} != {expected_units}")
+        if self._out_of_stock != expected_out_of_stock:
+            problems.append(f"out-of-stock count {self._out_of_stock} != {expected_out_of_stock}")
+        if problems:
+            raise AssertionError("Inventory aggregates are inconsistent: " + "; ".join(problems))
+    
+    
+    def low_stock_products(self, threshold: int) -> list[Product]:
+        """Return the products with at most `threshold` units in stock, lowest stock first."""
+        return list(self._cached(("low_stock", threshold), None, True, lambda: [
+            self._products[product_id] for product_id in self._stock_index.range(high=threshold)
+        ]))
+    
+    
+    def lowest_stock(self, count: int) -> list[Product]:
+        """Return the `count` products with the fewest units in stock, lowest first."""
+        return [self._products[product_id] for product_id in self._stock_index.first(count)]
+    
+    
+    def _reorder_threshold_of(self, product: Product) -> int | None:
+        threshold = self._reorder_thresholds.get(product.product_id)
+        if threshold is None:
+            threshold = self._type_reorder_thresholds.get(type(product).__name__.lower())
+        return threshold
+    
+    
+    def set_reorder_threshold(self, product_id: str, threshold: int | None):
+        """Set the reorder point of one product; None falls back to its type's threshold."""
+        if product_id not in self._products:
+            raise KeyError(f"No product with ID {product_id} exists in inventory")
+        if threshold is not None and (not isinstance(threshold, int) or threshold < 0):
+            raise ValueError("Reorder threshold must be a non-negative integer")
+        
+        product = self._products[product_id]
+        previous = self._reorder_threshold_of(product)
+        if threshold is None:
+            self._reorder_thresholds.pop(product_id, None)
+        else:
+            self._reorder_thresholds[product_id] = threshold
+        self._reorder_threshold_changed(product, previous)
+    
+    
+    def set_type_reorder_threshold(self, product_type: str, threshold: int | None):
+        """Set the reorder point of every product of a type that has no threshold of its own."""
+        if threshold is not None and (not isinstance(threshold, int) or threshold < 0):
+            raise ValueError("Reorder threshold must be a non-negative integer")
+        
+        product_type = product_type.lower()
+        previous = self._type_reorder_thresholds.get(product_type)
+        if threshold is None:
+            self._type_reorder_thresholds.pop(product_type, None)
+        else:
+            self._type_reorder_thresholds[product_type] = threshold
+        
+        for product_class, bucket in self._by_type.items():
+            if product_class.__name__.lower() == product_type:
+                for product_id, product in bucket.items():
+                    if product_id not in self._reorder_thresholds:
+                        self._reorder_threshold_changed(product, previous)
+    
+    
+    def _reorder_threshold_changed(self, product: Product, previous: int | None):
+        """Re-index a product after its effective reorder threshold changed from `previous`."""
+        threshold = self._reorder_threshold_of(product)
+        if threshold is None:
+            self._reorder_index.remove(product.product_id)
+        else:
+            self._reorder_index.update(product.product_id, product.quantity_in_stock - threshold)
+        
+        was_below = previous is not None and product.quantity_in_stock <= previous
+        below = threshold is not None and product.quantity_in_stock <= threshold
+        if below != was_below:
+            self._notify_reorder(product, below)
+    
+    
+    def below_reorder_threshold(self) -> list[Product]:
+        """Return the products at or below their reorder threshold, furthest below first."""
+        return [self._products[product_id] for product_id in self._reorder_index.range(high=0)]
+    
+    
+    def add_reorder_listener(self, listener: Callable[[Product, bool], None]):
+        """Call `listener(product, below)` whenever a product crosses its reorder threshold.
+        
+        `below` is True when the product fell to or under its threshold and False
+        when it climbed back above it. Adding and removing products does not
+        notify; only stock and threshold changes do.
+        """
+        self._reorder_listeners.append(listener)
+    
+    
+    def remove_reorder_listener(self, listener: Callable[[Product, bool], None]):
+        self._reorder_listeners.remove(listener)
+    
+    
+    def _notify_reorder(self, product: Product, below: bool):
+        for listener in list(self._reorder_listeners):
+            listener(product, below)
 
     
     def remove_expired_products(self):
         """Remove all expired grocery products from inventory."""
         expired_products: list[Product] = []
         
-        # Find expired products
-        for product_id, product in list(self._products.items()):
-            if isinstance(product, Grocery) and product.is_expired():
-                expired_products.append(product)
-                del self._products[product_id]
+        # The expiry index hands back exactly the expired groceries, oldest first
+        for product_id in self._expiry_index.pop_expired(datetime.now()):
+            expired_products.append(self._products[product_id])
+            self.remove_product(product_id)
         
         return expired_products
     
     
-    def save_to_file(self, filename: str):
-        """Save the inventory to a JSON file."""
-        data = [product.to_dict() for product in self._products.values()]
+    def expiring_within(self, days: int) -> list[Product]:
+        """Return the grocery products that expire within the next `days` days, soonest first."""
+        now = datetime.now()
+        return [self._products[product_id] for product_id in self._expiry_index.between(now, now + timedelta(days=days))]
+    
+    
+    def save_to_file(self, filename: str, incremental: bool = False):
+        """Save the inventory to a JSON file (JSON Lines if the name ends in .jsonl).
         
-        with open(filename, 'w') as file:
-            json.dump(data, file, indent=4)
-            
+        Products are serialized one at a time, so the file is never built in memory.
+        
+        With incremental=True, when `filename` is the file this inventory was
+        last saved to or loaded from, only the products added, changed or
+        removed since then are appended to a delta file next to it (the file
+        name plus ".delta"), which load_from_file applies on top. Once the
+        delta would outgrow `delta_compact_ratio` of the catalog, the whole
+        file is rewritten and the delta dropped instead; a full save always
+        does that.
+        """
+        incremental = incremental and self._can_save_delta(filename)
+        removed, dirty = self._take_changes()
+        try:
+            if incremental:
+                self._save_delta(filename, removed, dirty)
+            else:
+                self._save_base(filename)
+        except BaseException:
+            self._restore_changes(removed, dirty)
+            raise
+    
+    
+    def _save_base(self, filename: str):
+        """Rewrite `filename` with every product and drop its delta file."""
+        # The new file gets a new signature, which disowns any delta left behind by a crash from here on
+        replace_json_file(filename, (product.to_dict() for product in self._products.values()))
+        if os.path.exists(filename + DELTA_SUFFIX):
+            os.remove(filename + DELTA_SUFFIX)
+        self._saved_as_base(filename)
+    
+    
+    def _saved_as_base(self, filename: str):
+        """Make `filename`, as it is on disk now, the base that later deltas apply to."""
+        self._base_file = os.path.abspath(filename)
+        self._base_signature = _file_signature(filename)
+        self._delta_records = 0
+    
+    
+    def _can_save_delta(self, filename: str) -> bool:
+        if self._base_file != os.path.abspath(filename) or not os.path.exists(filename):
+            return False
+        if _file_signature(filename) != self._base_signature:
+            return False  # Someone else rewrote the base file
+        pending = self._delta_records + len(self._dirty) + len(self._removed)
+        return pending <= self.delta_compact_ratio * max(1, len(self._products))
+    
+    
+    def _take_changes(self) -> tuple[set[str], set[str]]:
+        """Return the IDs removed and the IDs added or changed since the last save, and start tracking anew."""
+        removed, dirty = self._removed, self._dirty
+        self._removed, self._dirty = set(), set()
+        return removed, dirty
+    
+    
+    def _restore_changes(self, removed: set[str], dirty: set[str]):
+        """Put back changes taken by a save that failed, so the next save writes them."""
+        self._removed |= removed - self._dirty
+        self._dirty |= dirty - self._removed
+    
+    
+    def _save_delta(self, filename: str, removed: set[str], dirty: set[str]):
+        """Append the given removed and changed IDs to the delta file of `filename`."""
+        with open(filename + DELTA_SUFFIX, 'a' if self._delta_records else 'w') as file:
+            start = file.tell()
+            try:
+                if not self._delta_records:
+                    file.write(json.dumps({"base": self._base_signature}) + "\n")
+                for product_id in removed:
+                    file.write(json.dumps({"op": "remove", "id": product_id}) + "\n")
+                written = len(removed)
+                for product_id in dirty:
+                    product = self._products.get(product_id)
+                    if product is None:
+                        continue  # Removed since the changes were taken; the next delta records that
+                    file.write(json.dumps({"op": "upsert", "product": product.to_dict()}) + "\n")
+                    written += 1
+                file.flush()
+            except BaseException:
+                # Leave no partial record behind for the next append to run into
+                file.truncate(start)
+                raise
+        self._delta_records += written
+    
+    
+    def _apply_delta(self, filename: str, staged: dict[str, Product]) -> int:
+        """Apply the delta file of `filename`, if it belongs to the current base file, to the products staged
+        for loading; return its record count.
+        
+        A torn last line, left by a save that was interrupted, is cut off the
+        file, so that the next incremental save appends after whole records.
+        """
+        try:
+            file = open(filename + DELTA_SUFFIX, 'rb')
+        except FileNotFoundError:
+            return 0
+        with file:
+            header = file.readline()
+            if not header.endswith(b"\n") or json.loads(header).get("base") != _file_signature(filename):
+                return 0  # Left over from before the base file was last rewritten; the next save replaces it
+            applied = 0
+            complete = file.tell()  # End of the last whole line
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # Torn tail of an interrupted save
+                record = json.loads(line)
+                if record["op"] == "upsert":
+                    product = product_from_dict(record["product"])
+                    staged[product.product_id] = product
+                elif record["op"] == "remove":
+                    staged.pop(record["id"], None)
+                else:
+                    raise ValueError(f"Unknown delta operation: {record['op']}")
+                applied += 1
+                complete += len(line)
+            torn = file.tell() != complete
+        if torn:
+            os.truncate(filename + DELTA_SUFFIX, complete)
+        return applied
+    
 
     def load_from_file(self, filename: str):
-        """Load inventory from a JSON file."""
-
-        product_classes = {
-            "Electronics": Electronics,
-            "Clothing": Clothing,
-            "Grocery": Grocery,
-        }
-
+        """Load inventory from a JSON array or JSON Lines file, one product at a time, plus its delta file.
+        
+        The inventory is only replaced once both files have been read, so a
+        file that fails to load leaves it as it was.
+        """
         try:
             with open(filename, 'r') as file:
-                json_products: list[dict] = json.load(file)
+                records = iter_json_lines(file) if filename.endswith(".jsonl") else iter_json_array(file)
+                staged = self._stage(product_from_dict(record) for record in records)
+            delta_records = self._apply_delta(filename, staged)
             
-                # Clear current inventory
-                self._products = {}
-                
-                for product in json_products:
-                    product_type = product.pop("type", '')
-                    
-                    if product_type in product_classes:
-                        product_class = product_classes[product_type]
-                        
-                        if "expiry_date" in product:
-                            product["expiry_date"] = datetime.fromisoformat(product['expiry_date'])
-                        
-                        self.add_product(product_class(**product))
-                    else:
-                        raise ValueError(f"Unknown product type: {product_type}")
-        
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            self._replace_products(list(staged.values()))
+            self._take_changes()  # Everything loaded is already in the files
+            self._saved_as_base(filename)
+            self._delta_records = delta_records
+        
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
             raise ValueError(f"Invalid inventory file format: {str(e)}")
         except FileNotFoundError:
-            raise FileNotFoundError(f"File {filename} not found") 
-        
-               
-
-
-
+            raise FileNotFoundError(f"File {filename} not found")
+    
+    
+    def save_snapshot(self, filename: str):
+        """Save the inventory to a binary snapshot file (see snapshot.py)."""
+        save_snapshot(self._products.values(), filename)
+    
+    
+    def load_snapshot(self, filename: str):
+        """Load inventory from a binary snapshot file written by save_snapshot."""
+        try:
+            with SnapshotReader(filename) as snapshot:
+                staged = self._stage(snapshot)
+            self._replace_products(list(staged.values()))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File {filename} not found")
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid snapshot file format: {str(e)}")
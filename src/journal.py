@@ -0,0 +1,318 @@
+"""Append-only operation log with snapshot compaction for crash-safe inventories.
+
+A journaled inventory lives in a directory:
+
+    manifest.json         {"snapshot": <file name or null>, "seq": <last seq in the snapshot>}
+    snapshot-<seq>.snap   binary snapshot (see snapshot.py) of the state up to `seq`
+    journal.log           one JSON record per mutation, each stamped with a sequence number
+
+The manifest is replaced atomically and is the commit point of a compaction:
+on startup the snapshot it names is loaded and only log records with a higher
+sequence number are replayed, so a crash at any step of compaction is safe.
+"""
+import json
+import os
+import threading
+import time
+from typing import Iterable, Iterator
+
+from inventory import Inventory
+from product import Product, product_from_dict
+
+MANIFEST = "manifest.json"
+LOG = "journal.log"
+
+
+def _fsync_directory(directory: str):
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class OperationLog:
+    """Append-only JSON Lines log with group-commit fsync.
+
+    Records are buffered and made durable together once `group_size` records
+    are pending or an append comes `sync_interval` seconds or more after the
+    last fsync, whichever comes first. When no such append comes along, a
+    timer thread syncs the pending records `sync_interval` seconds after the
+    first of them was appended. Call `sync()` to force durability immediately.
+    """
+
+    def __init__(self, filename: str, group_size: int = 64, sync_interval: float = 0.05):
+        self.filename = filename
+        self.group_size = group_size
+        self.sync_interval = sync_interval
+        self._file = open(filename, "a", encoding="utf-8")
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()  # Serializes appends with syncs from the timer thread
+        self._timer: threading.Timer | None = None
+
+    def append(self, record: dict):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._pending += 1
+            if self._pending >= self.group_size or time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.sync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def sync(self):
+        """Flush buffered records and fsync them to disk."""
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+
+    def _sync(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def truncate(self):
+        """Discard every record in the log."""
+        with self._lock:
+            self._file.flush()
+            self._file.truncate(0)
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+
+def read_log(filename: str) -> Iterator[dict]:
+    """Yield the records of an operation log.
+
+    A final line without its newline is the tail of a write interrupted by a
+    crash; it was never acknowledged as durable, so it is skipped.
+    """
+    try:
+        file = open(filename, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with file:
+        for number, line in enumerate(file, 1):
+            if not line.endswith("\n"):
+                return
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Corrupt operation log {filename} at line {number}: {str(e)}")
+
+
+def _cut_torn_tail(filename: str, block_size: int = 65536):
+    """Truncate a log to the byte after its last newline, dropping the torn tail of an interrupted append.
+
+    Otherwise the next append would be written onto the fragment and turn it
+    into a corrupt line in the middle of the log.
+    """
+    try:
+        file = open(filename, "r+b")
+    except FileNotFoundError:
+        return
+    with file:
+        end = file.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            file.seek(start)
+            newline = file.read(position - start).rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            file.truncate(position)
+            os.fsync(file.fileno())
+
+
+class JournaledInventory(Inventory):
+    """Inventory that records every mutation in an operation log.
+
+    Mutations made through the inventory methods are logged; the log is
+    compacted into a snapshot every `compact_every` records. Changing a
+    product object directly (e.g. `product.price = ...`) bypasses the log, so
+    use `update_price` instead.
+    """
+
+    def __init__(self, directory: str, compact_every: int = 100_000, group_size: int = 64, sync_interval: float = 0.05):
+        super().__init__()
+        self.directory = directory
+        self.compact_every = compact_every
+        os.makedirs(directory, exist_ok=True)
+
+        self._seq = 0
+        self._logged_since_compaction = 0
+        self._logging = False
+        self._recover()
+        self._log = OperationLog(os.path.join(directory, LOG), group_size, sync_interval)
+        self._logging = True
+
+    def _recover(self):
+        """Rebuild the state from the latest snapshot plus the log records after it."""
+        manifest = {"snapshot": None, "seq": 0}
+        manifest_path = os.path.join(self.directory, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as file:
+                manifest = json.load(file)
+
+        if manifest["snapshot"]:
+            Inventory.load_snapshot(self, os.path.join(self.directory, manifest["snapshot"]))
+        self._seq = manifest["seq"]
+
+        for record in read_log(os.path.join(self.directory, LOG)):
+            if record["seq"] <= self._seq:
+                continue  # Already part of the snapshot
+            self._apply(record)
+            self._seq = record["seq"]
+            self._logged_since_compaction += 1
+        _cut_torn_tail(os.path.join(self.directory, LOG))
+
+    def _apply(self, record: dict):
+        op = record["op"]
+        if op == "add":
+            self.add_product(product_from_dict(record["product"]))
+        elif op == "remove":
+            self.remove_product(record["id"])
+        elif op == "sell":
+            self.sell_product(record["id"], record["quantity"])
+        elif op == "restock":
+            self.restock_product(record["id"], record["quantity"])
+        elif op == "sell_many":
+            self.sell_many(record["items"])
+        elif op == "restock_many":
+            self.restock_many(record["items"])
+        elif op == "price":
+            self.update_price(record["id"], record["price"])
+        else:
+            raise ValueError(f"Unknown operation in log: {op}")
+
+    def _record(self, record: dict):
+        if not self._logging:
+            return
+        self._seq += 1
+        record["seq"] = self._seq
+        self._log.append(record)
+        self._logged_since_compaction += 1
+        if self._logged_since_compaction >= self.compact_every:
+            self.compact()
+
+    def add_product(self, product: Product):
+        """Add a product to the inventory."""
+        super().add_product(product)
+        self._record({"op": "add", "product": product.to_dict()})
+
+    def remove_product(self, product_id: str):
+        """Remove a product from the inventory by ID."""
+        super().remove_product(product_id)
+        self._record({"op": "remove", "id": product_id})
+
+    def upsert_many(self, products: Iterable[Product]) -> tuple[int, int]:
+        """Add products, replacing those already present with the same ID; each change is logged on its own."""
+        inserted = updated = 0
+        for product in products:
+            if product.product_id in self._products:
+                self.remove_product(product.product_id)
+                updated += 1
+            else:
+                inserted += 1
+            self.add_product(product)
+        return inserted, updated
+
+    def sell_product(self, product_id: str, quantity: int):
+        """Sell a given quantity of a product."""
+        remaining = super().sell_product(product_id, quantity)
+        self._record({"op": "sell", "id": product_id, "quantity": quantity})
+        return remaining
+
+    def restock_product(self, product_id: str, quantity: int):
+        """Restock a given quantity of a product."""
+        new_stock = super().restock_product(product_id, quantity)
+        self._record({"op": "restock", "id": product_id, "quantity": quantity})
+        return new_stock
+
+    def sell_many(self, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Sell a batch of (product_id, quantity) items, all or nothing."""
+        items = list(items)
+        remaining = super().sell_many(items)
+        self._record({"op": "sell_many", "items": items})
+        return remaining
+
+    def restock_many(self, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Restock a batch of (product_id, quantity) items, all or nothing."""
+        items = list(items)
+        new_stock = super().restock_many(items)
+        self._record({"op": "restock_many", "items": items})
+        return new_stock
+
+    def update_price(self, product_id: str, new_price: float):
+        """Change the price of a product."""
+        super().update_price(product_id, new_price)
+        self._record({"op": "price", "id": product_id, "price": new_price})
+
+    def load_from_file(self, filename: str):
+        """Replace the inventory with the contents of a JSON file and checkpoint it."""
+        self._logging = False
+        try:
+            super().load_from_file(filename)
+        finally:
+            self._logging = True
+        # The loaded state is not in the log, so it has to become the new snapshot
+        self._seq += 1
+        self.compact()
+
+    def load_snapshot(self, filename: str):
+        """Replace the inventory with the contents of a binary snapshot file and checkpoint it."""
+        self._logging = False
+        try:
+            super().load_snapshot(filename)
+        finally:
+            self._logging = True
+        self._seq += 1
+        self.compact()
+
+    def commit(self):
+        """Make every logged operation durable now."""
+        self._log.sync()
+
+    def compact(self):
+        """Write a snapshot of the current state and truncate the log."""
+        self._log.sync()
+        snapshot = f"snapshot-{self._seq}.snap"
+        self.save_snapshot(os.path.join(self.directory, snapshot))  # Written to a temporary file, fsynced and renamed
+
+        manifest_path = os.path.join(self.directory, MANIFEST)
+        previous = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as file:
+                previous = json.load(file)["snapshot"]
+        with open(manifest_path + ".tmp", "w") as file:
+            json.dump({"snapshot": snapshot, "seq": self._seq}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(manifest_path + ".tmp", manifest_path)
+        _fsync_directory(self.directory)
+
+        self._log.truncate()
+        self._logged_since_compaction = 0
+        if previous and previous != snapshot:
+            os.remove(os.path.join(self.directory, previous))
+
+    def close(self):
+        """Flush the log and release the log file."""
+        self._log.close()
@@ -0,0 +1,125 @@
+"""Incremental JSON readers and writers that hold one record in memory at a time."""
+import json
+import os
+import tempfile
+from typing import IO, Any, Iterable, Iterator
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(file: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time."""
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, position, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def skip_whitespace() -> str:
+        """Advance past whitespace and return the next character ('' at end of file)."""
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not fill():
+                return ""
+
+    if skip_whitespace() != "[":
+        raise json.JSONDecodeError("Expected '['", buffer, position)
+    position += 1
+
+    if skip_whitespace() == "]":
+        position += 1
+    else:
+        while True:
+            skip_whitespace()
+            while True:
+                try:
+                    value, end = _decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof or not fill():
+                        raise
+                    continue
+                # A scalar cut off by the chunk boundary ("699." of "699.99") decodes as a shorter
+                # value, so only accept a value once the separator after it has been read
+                following = end
+                while following < len(buffer) and buffer[following] in _WHITESPACE:
+                    following += 1
+                if buffer[following:following + 1] not in (",", "]") and not eof and fill():
+                    continue
+                break
+            position = end
+            yield value
+
+            separator = skip_whitespace()
+            position += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                raise json.JSONDecodeError("Expected ',' or ']'", buffer, position - 1)
+
+    if skip_whitespace():
+        raise json.JSONDecodeError("Extra data", buffer, position)
+
+
+def iter_json_lines(file: IO[str]) -> Iterator[Any]:
+    """Yield one value per non-blank line of a JSON Lines file."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_json_array(file: IO[str], values: Iterable[Any], indent: int = 4):
+    """Write values as a JSON array, laid out exactly like `json.dump(values, file, indent=indent)`."""
+    pad = " " * indent
+    first = True
+    for value in values:
+        file.write("[\n" if first else ",\n")
+        first = False
+        file.write(pad + json.dumps(value, indent=indent).replace("\n", "\n" + pad))
+    file.write("[]" if first else "\n]")
+
+
+def write_json_lines(file: IO[str], values: Iterable[Any]):
+    """Write one compact JSON value per line."""
+    for value in values:
+        file.write(json.dumps(value, separators=(",", ":")))
+        file.write("\n")
+
+
+def replace_json_file(filename: str, values: Iterable[Any]):
+    """Write values to `filename` (JSON Lines if the name ends in .jsonl, else a JSON array) and swap it in atomically.
+
+    The values go to a temporary file of its own in the same directory, so
+    concurrent writers of one file never write to or rename each other's.
+    """
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(filename) or ".", prefix=os.path.basename(filename) + ".", suffix=".tmp")
+    try:
+        with open(fd, 'w') as file:
+            if filename.endswith(".jsonl"):
+                write_json_lines(file, values)
+            else:
+                write_json_array(file, values, indent=4)
+        try:
+            mode = os.stat(filename).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644  # mkstemp creates the file readable by its owner only
+        os.chmod(temporary, mode)
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
@@ -0,0 +1,94 @@
+"""Load generator for the inventory service: many pipelined clients, p50/p99 latency."""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from inventory import Inventory
+from product import Clothing
+from service import InventoryService
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_client(host: str, port: int, product_ids: list[str], requests: int, depth: int,
+                     seed: int, latencies: list[float], errors: list[str]):
+    """Send `requests` random requests, keeping up to `depth` of them in flight."""
+    rng = random.Random(seed)
+    # Search responses carry whole product lists, so allow long lines
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+    sent_at: dict[int, float] = {}
+    window = asyncio.Semaphore(depth)
+
+    async def receive():
+        for _ in range(requests):
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - sent_at.pop(response["id"]))
+            if not response["ok"]:
+                errors.append(response["error"])
+            window.release()
+
+    receiver = asyncio.create_task(receive())
+    for request_id in range(requests):
+        await window.acquire()
+        roll = rng.random()
+        if roll < 0.80:
+            request = {"op": "sell", "product_id": rng.choice(product_ids), "quantity": rng.randint(1, 3)}
+        elif roll < 0.95:
+            request = {"op": "restock", "product_id": rng.choice(product_ids), "quantity": rng.randint(1, 10)}
+        else:
+            request = {"op": "search", "name": f"Shirt {rng.choice(product_ids)[1:]}"}
+        request["id"] = request_id
+        sent_at[request_id] = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+    await receiver
+    writer.close()
+
+
+async def run_load(clients: int, requests: int, depth: int, products: int, hot_products: int):
+    """Start an in-process service and drive it with `clients` concurrent connections."""
+    inventory = Inventory()
+    for i in range(products):
+        inventory.add_product(Clothing(f"C{i}", f"Shirt {i}", 19.99, 1_000, "M", "Cotton"))
+    # Most traffic goes to a few hot SKUs, which is where coalescing pays off
+    product_ids = [f"C{i}" for i in range(min(hot_products, products))]
+
+    service = InventoryService(inventory)
+    server = await service.start_tcp("127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    start = time.perf_counter()
+    async with server:
+        await asyncio.gather(*(
+            run_client(host, port, product_ids, requests, depth, seed, latencies, errors)
+            for seed in range(clients)
+        ))
+    elapsed = time.perf_counter() - start
+
+    total = clients * requests
+    print(f"{clients} clients x {requests} requests (pipeline depth {depth}) over {len(product_ids)} hot SKUs")
+    print(f"  throughput {total / elapsed:,.0f} req/s")
+    print(f"  latency p50 {percentile(latencies, 0.50) * 1000:.2f} ms   p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"  {service.batches} stock batches, {service.coalesced} requests coalesced, {len(errors)} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive an in-process inventory service and report latency.")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2_000, help="requests per client")
+    parser.add_argument("--depth", type=int, default=16, help="requests in flight per client")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--hot-products", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run_load(args.clients, args.requests, args.depth, args.products, args.hot_products))
+
+
+if __name__ == "__main__":
+    main()
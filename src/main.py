@@ -1,9 +1,11 @@
 import sys
 from inventory import Inventory
-from utils import add_product_menu, file_operations_menu, get_input, print_header, remove_expired_menu, restock_product_menu, search_menu, sell_product_menu
 
 def main_menu():
     """Main menu of the inventory management system."""
+    # Imported here so that batch mode starts without loading the menus
+    from utils import add_product_menu, file_operations_menu, get_input, print_header, remove_expired_menu, restock_product_menu, search_menu, sell_product_menu
+    
     inventory = Inventory()
     
     while True:
@@ -36,4 +38,8 @@ def main_menu():
 
 
 if __name__ == "__main__":
-    main_menu() 
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        # python main.py --batch [commands.jsonl] [--file inventory.json] [--output responses.jsonl]
+        from batch import main
+        sys.exit(main(sys.argv[2:]))
+    main_menu()
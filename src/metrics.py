@@ -0,0 +1,182 @@
+"""Opt-in instrumentation of Inventory operations, exported in the Prometheus text format.
+
+    registry = instrument(inventory)
+    ...
+    registry.write_textfile("/var/lib/node_exporter/inventory.prom", inventory)
+    # or: serve_metrics(registry, inventory, port=9108)  ->  GET /metrics
+
+`instrument` replaces the operation methods of one inventory object with
+timed wrappers, so inventories that are not instrumented run the plain class
+methods and pay nothing. `uninstrument` puts the plain methods back.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INSTRUMENTED_OPERATIONS = (
+    "add_product", "remove_product", "upsert_many", "sell_product", "restock_product", "sell_many", "restock_many",
+    "update_price", "search_by_name", "search_by_type", "query_products", "list_all_products",
+    "total_inventory_value", "low_stock_products", "remove_expired_products",
+    "save_to_file", "load_from_file", "save_snapshot", "load_snapshot",
+)
+
+# Upper bounds in seconds, from 10 microseconds (a sale) to 10 seconds (loading a large file)
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is the +Inf bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Return (le label, cumulative count) pairs, ending with +Inf."""
+        pairs, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            pairs.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return pairs
+
+
+class MetricsRegistry:
+    """Per-operation call counts, error counts by exception type and latency histograms."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.calls: dict[str, int] = {}
+        self.errors: dict[tuple[str, str], int] = {}
+        self.latency: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, operation: str, seconds: float, error: str | None = None):
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            if error is not None:
+                self.errors[operation, error] = self.errors.get((operation, error), 0) + 1
+            histogram = self.latency.get(operation)
+            if histogram is None:
+                histogram = self.latency[operation] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def render(self, inventory=None) -> str:
+        """Return the metrics in the Prometheus text exposition format.
+
+        With an inventory, its size, value and out-of-stock count are included as gauges.
+        """
+        lines = []
+        with self._lock:
+            lines += ["# HELP inventory_operations_total Inventory operations performed, failed ones included.",
+                      "# TYPE inventory_operations_total counter"]
+            for operation, count in sorted(self.calls.items()):
+                lines.append(f'inventory_operations_total{{operation="{operation}"}} {count}')
+
+            lines += ["# HELP inventory_operation_errors_total Inventory operations that raised, by exception type.",
+                      "# TYPE inventory_operation_errors_total counter"]
+            for (operation, error), count in sorted(self.errors.items()):
+                lines.append(f'inventory_operation_errors_total{{operation="{operation}",error="{error}"}} {count}')
+
+            lines += ["# HELP inventory_operation_duration_seconds Wall-clock duration of inventory operations.",
+                      "# TYPE inventory_operation_duration_seconds histogram"]
+            for operation, histogram in sorted(self.latency.items()):
+                for le, count in histogram.cumulative():
+                    lines.append(f'inventory_operation_duration_seconds_bucket{{operation="{operation}",le="{le}"}} {count}')
+                lines.append(f'inventory_operation_duration_seconds_sum{{operation="{operation}"}} {histogram.sum!r}')
+                lines.append(f'inventory_operation_duration_seconds_count{{operation="{operation}"}} {histogram.count}')
+
+        if inventory is not None:
+            # Read through the class so a scrape is not recorded as an operation of the inventory
+            cls = type(inventory)
+            for name, help_text, value in [
+                ("inventory_products", "Products in the inventory.", inventory.total_products),
+                ("inventory_value", "Total value of the stock.", cls.total_inventory_value(inventory)),
+                ("inventory_out_of_stock_products", "Products with no units in stock.", cls.out_of_stock_count(inventory)),
+            ]:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value!r}"]
+            cache_stats = getattr(inventory, "query_cache_stats", None)
+            if cache_stats is not None:
+                stats = cache_stats()
+                for event, help_text in [("hits", "Searches answered from the query cache."),
+                                         ("misses", "Searches the query cache could not answer, stale entries included."),
+                                         ("evictions", "Query cache entries dropped to stay within its size.")]:
+                    name = f"inventory_query_cache_{event}_total"
+                    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {stats[event]}"]
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, filename: str, inventory=None):
+        """Write the metrics to a file atomically, e.g. for the node_exporter textfile collector."""
+        temporary = filename + ".tmp"
+        with open(temporary, "w") as file:
+            file.write(self.render(inventory))
+        os.replace(temporary, filename)
+
+
+def _timed(method, operation: str, registry: MetricsRegistry):
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except Exception as e:
+            registry.observe(operation, time.perf_counter() - start, type(e).__name__)
+            raise
+        registry.observe(operation, time.perf_counter() - start)
+        return result
+    timed.__name__ = method.__name__
+    timed.__doc__ = method.__doc__
+    timed.__wrapped__ = method
+    return timed
+
+
+def instrument(inventory, registry: MetricsRegistry | None = None) -> MetricsRegistry:
+    """Record every operation of `inventory` in `registry` (a new one by default) and return the registry.
+
+    Only this inventory object is affected. Operations an inventory makes on
+    itself are recorded too: remove_expired_products also counts the
+    remove_product calls it makes.
+    """
+    registry = registry if registry is not None else MetricsRegistry()
+    uninstrument(inventory)
+    for operation in INSTRUMENTED_OPERATIONS:
+        method = getattr(inventory, operation, None)
+        if method is not None:
+            setattr(inventory, operation, _timed(method, operation, registry))
+    return registry
+
+
+def uninstrument(inventory):
+    """Stop recording the operations of `inventory`."""
+    for operation in INSTRUMENTED_OPERATIONS:
+        inventory.__dict__.pop(operation, None)
+
+
+def serve_metrics(registry: MetricsRegistry, inventory=None, port: int = 9108, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve the metrics at http://host:port/metrics from a daemon thread; call shutdown() on the result to stop."""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render(inventory).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds would flood stderr
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
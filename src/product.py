@@ -1,22 +1,29 @@
 from abc import ABC, abstractmethod
-from datetime import date, datetime
+from datetime import date, datetime, time
 from typing import Literal
 
 from src.exceptions import InsufficientStockError
 
 
 class Product(ABC):
+    __slots__ = ("_product_id", "_name", "_price", "_quantity_in_stock", "_owner")
+    
     def __init__(self, product_id: str, name: str, price: float, quantity_in_stock: int):
         self._product_id = product_id
         self._name = name
         self._price = price
         self._quantity_in_stock = quantity_in_stock
+        self._owner = None  # Inventory holding this product; told about stock and price changes
     
    
     def restock(self, amount: int):
         if amount <= 0:
             raise ValueError("Amount must be positive")
+        old_quantity = self._quantity_in_stock
         self._quantity_in_stock += amount
+        if self._owner is not None:
+            self._owner._stock_changed(self, old_quantity)
+        return self._quantity_in_stock
 
     
     def sell(self, quantity: int):
@@ -25,7 +32,11 @@ class Product(ABC):
         
         if quantity > self._quantity_in_stock:
             raise InsufficientStockError(f"Only {self._quantity_in_stock} units available")
+        old_quantity = self._quantity_in_stock
         self._quantity_in_stock -= quantity
+        if self._owner is not None:
+            self._owner._stock_changed(self, old_quantity)
+        return self._quantity_in_stock
 
     
     def get_total_value(self):
@@ -59,7 +70,10 @@ class Product(ABC):
     def price(self, new_price: int):
         if new_price <= 0:
             raise ValueError("Price cannot be negative")
+        old_price = self._price
         self._price = new_price
+        if self._owner is not None:
+            self._owner._price_changed(self, old_price)
     
     @property
     def quantity_in_stock(self):
@@ -67,6 +81,20 @@ class Product(ABC):
 
     
     
+    def __getstate__(self):
+        # The owning inventory is not part of the product: copies and pickles start unowned
+        slots = {
+            slot: getattr(self, slot)
+            for cls in type(self).__mro__ for slot in getattr(cls, "__slots__", ())
+            if slot != "_owner" and hasattr(self, slot)
+        }
+        return None, slots
+    
+    def __setstate__(self, state):
+        for slot, value in state[1].items():
+            setattr(self, slot, value)
+        self._owner = None
+    
     @abstractmethod
     def __str__(self) -> str:
         pass
@@ -78,6 +106,7 @@ class Product(ABC):
 
 
 class Electronics(Product):
+    __slots__ = ("_warranty_years", "_brand")
     
     def __init__(self, product_id: str, name: str, price: float, quantity_in_stock: int, brand: str, warranty_years: float):
         super().__init__(product_id, name, price, quantity_in_stock)
@@ -112,6 +141,7 @@ class Electronics(Product):
 
 
 class Grocery(Product):
+    __slots__ = ("_expiry_date",)
     
     def __init__(self, product_id: str, name: str, price: float, quantity_in_stock: int, expiry_date: date | str):
         super().__init__(product_id, name, price, quantity_in_stock)
@@ -123,12 +153,19 @@ class Grocery(Product):
             self._expiry_date = expiry_date
         
     def is_expired(self) -> bool:
-        return datetime.now() > self._expiry_date
+        return datetime.now() > self.expires_at
     
     @property
     def expiry_date(self):
         return self._expiry_date
     
+    @property
+    def expires_at(self) -> datetime:
+        """Expiry as a datetime; plain dates expire at the start of the day."""
+        if isinstance(self._expiry_date, datetime):
+            return self._expiry_date
+        return datetime.combine(self._expiry_date, time.min)
+    
     def to_dict(self) -> dict[str, str | float]:
         data = super().to_dict()
         data.update({
@@ -145,6 +182,7 @@ class Grocery(Product):
     
     
 class Clothing(Product):
+    __slots__ = ("_size", "_material")
     
     def __init__(self, product_id: str, name: str, price: float, quantity_in_stock: int, size: Literal['S', 'M', 'L', 'XL'], material: str):
         super().__init__(product_id, name, price, quantity_in_stock)
@@ -173,4 +211,24 @@ class Clothing(Product):
     
     def __repr__(self) -> str:
         return f"Clothing(product_id={self._product_id}, name={self._name}, price={self._price}, quantity_in_stock={self._quantity_in_stock}, size={self._size}, material={self._material})"
+
+
+PRODUCT_CLASSES: dict[str, type[Product]] = {
+    "Electronics": Electronics,
+    "Clothing": Clothing,
+    "Grocery": Grocery,
+}
+
+
+def product_from_dict(data: dict) -> Product:
+    """Build a product from a dictionary produced by `to_dict()`, dispatching on its "type" field."""
+    data = dict(data)
+    product_type = data.pop("type", '')
+    
+    if product_type not in PRODUCT_CLASSES:
+        raise ValueError(f"Unknown product type: {product_type}")
+    
+    if "expiry_date" in data:
+        data["expiry_date"] = datetime.fromisoformat(data['expiry_date'])
     
+    return PRODUCT_CLASSES[product_type](**data)
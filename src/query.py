@@ -0,0 +1,213 @@
+"""Composable, lazily evaluated queries over an Inventory.
+
+    inventory.query().of_type("electronics").price_between(100, 500).where(brand="Apple")
+
+Every builder method returns a new Query, so a partial query can be shared
+as the base of several others; calling a filter again replaces it. Nothing
+runs until the query is iterated. Then the planner estimates how many
+candidates each applicable index would produce, walks the most selective
+one and checks the remaining filters on each candidate as it is yielded.
+`explain()` shows that plan without running it.
+
+As with a dict, do not change the inventory while iterating one of its
+queries; take `list(query)` first.
+"""
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Callable, Iterator
+
+from product import PRODUCT_CLASSES, Product
+
+_MISSING = object()
+
+
+def _describe_range(field: str, low, high) -> str:
+    if low is not None and high is not None:
+        return f"{low} <= {field} <= {high}"
+    if low is not None:
+        return f"{field} >= {low}"
+    if high is not None:
+        return f"{field} <= {high}"
+    return f"any {field}"
+
+
+class _AccessPath:
+    """One way of producing candidate products, with the filter it already guarantees."""
+
+    def __init__(self, description: str, estimate: int, products: Callable[[], Iterator[Product]], covers: str | None = None):
+        self.description = description
+        self.estimate = estimate
+        self.products = products
+        self.covers = covers
+
+
+class Query:
+    """A lazy, immutable set of filters over the products of an inventory."""
+
+    def __init__(self, inventory):
+        self._inventory = inventory
+        self._type: str | None = None
+        self._name: str | None = None
+        self._price: tuple[float | None, float | None] | None = None
+        self._stock: tuple[int | None, int | None] | None = None
+        self._expiry: tuple[datetime | None, datetime | None] | None = None
+        self._fields: dict[str, object] = {}
+
+    def _with(self, **changes) -> "Query":
+        query = Query.__new__(Query)
+        query.__dict__.update(self.__dict__)
+        query.__dict__.update(changes)
+        return query
+
+    def of_type(self, product_type: str) -> "Query":
+        """Keep only products of a type (case-insensitive class name, e.g. "electronics")."""
+        return self._with(_type=product_type.lower())
+
+    def name_contains(self, text: str) -> "Query":
+        """Keep only products whose name contains `text` (case-insensitive)."""
+        return self._with(_name=text.lower())
+
+    def price_between(self, low: float | None = None, high: float | None = None) -> "Query":
+        """Keep only products priced in [low, high]; either bound may be None."""
+        return self._with(_price=(low, high))
+
+    def stock_between(self, low: int | None = None, high: int | None = None) -> "Query":
+        """Keep only products with [low, high] units in stock; either bound may be None."""
+        return self._with(_stock=(low, high))
+
+    def expiring_between(self, start: datetime | None = None, end: datetime | None = None) -> "Query":
+        """Keep only groceries expiring in [start, end]; either bound may be None."""
+        return self._with(_expiry=(start, end))
+
+    def expiring_within(self, days: int) -> "Query":
+        """Keep only groceries expiring between now and `days` days from now."""
+        now = datetime.now()
+        return self.expiring_between(now, now + timedelta(days=days))
+
+    def where(self, **fields) -> "Query":
+        """Keep only products whose type-specific fields equal the given values, e.g. where(brand="Apple").
+
+        Products without such a field (a Clothing item has no brand) never match.
+        """
+        for field in fields:
+            if not any(hasattr(product_class, field) for product_class in PRODUCT_CLASSES.values()):
+                raise ValueError(f"Unknown product field: {field}")
+        return self._with(_fields={**self._fields, **fields})
+
+    def _filters(self) -> list[tuple[str, str, Callable[[Product], bool]]]:
+        """Return (filter key, description, predicate) for every filter of the query."""
+        filters = []
+        if self._type is not None:
+            product_type = self._type
+            filters.append(("type", f"type = {product_type!r}",
+                            lambda product: type(product).__name__.lower() == product_type))
+        if self._name is not None:
+            text = self._name
+            filters.append(("name", f"name contains {text!r}",
+                            lambda product: text in product.name.lower()))
+        if self._price is not None:
+            min_price, max_price = self._price
+            filters.append(("price", _describe_range("price", min_price, max_price),
+                            lambda product: (min_price is None or product.price >= min_price)
+                            and (max_price is None or product.price <= max_price)))
+        if self._stock is not None:
+            min_stock, max_stock = self._stock
+            filters.append(("stock", _describe_range("quantity_in_stock", min_stock, max_stock),
+                            lambda product: (min_stock is None or product.quantity_in_stock >= min_stock)
+                            and (max_stock is None or product.quantity_in_stock <= max_stock)))
+        if self._expiry is not None:
+            start, end = self._expiry
+            def expires_in_window(product: Product) -> bool:
+                expires_at = getattr(product, "expires_at", None)
+                return expires_at is not None and (start is None or expires_at >= start) and (end is None or expires_at <= end)
+            filters.append(("expiry", _describe_range("expires_at", start, end), expires_in_window))
+        for field, value in self._fields.items():
+            filters.append((field, f"{field} = {value!r}",
+                            lambda product, field=field, value=value: getattr(product, field, _MISSING) == value))
+        return filters
+
+    def _access_paths(self) -> list[_AccessPath]:
+        """Return every way of producing candidates for this query, preferred ones first on ties."""
+        inventory = self._inventory
+        paths = []
+        if self._name is not None:
+            text = self._name
+            paths.append(_AccessPath(
+                f"name trigram index, {text!r}", inventory._name_index.estimate(text),
+                lambda: (inventory._products[product_id] for product_id in inventory._name_index.search(text)),
+                covers="name",
+            ))
+        if self._price is not None:
+            min_price, max_price = self._price
+            paths.append(_AccessPath(
+                f"price index, {_describe_range('price', min_price, max_price)}",
+                inventory._price_index.count(min_price, max_price),
+                lambda: (inventory._products[product_id]
+                         for _, product_id in inventory._price_index.scan(min_price, max_price)),
+                covers="price",
+            ))
+        if self._stock is not None:
+            min_stock, max_stock = self._stock
+            paths.append(_AccessPath(
+                f"stock index, {_describe_range('quantity_in_stock', min_stock, max_stock)}",
+                inventory._stock_index.count(min_stock, max_stock),
+                lambda: (inventory._products[product_id]
+                         for _, product_id in inventory._stock_index.scan(min_stock, max_stock)),
+                covers="stock",
+            ))
+        if self._expiry is not None:
+            start, end = self._expiry
+            paths.append(_AccessPath(
+                f"expiry index, {_describe_range('expires_at', start, end)}", inventory._expiry_index.count(start, end),
+                lambda: (inventory._products[product_id] for product_id in inventory._expiry_index.between(start, end)),
+                covers="expiry",
+            ))
+        if self._type is not None:
+            type_buckets = [bucket for product_class, bucket in inventory._by_type.items()
+                            if product_class.__name__.lower() == self._type]
+            paths.append(_AccessPath(
+                f"type bucket {self._type!r}", sum(map(len, type_buckets)),
+                lambda: chain.from_iterable(bucket.values() for bucket in type_buckets),
+                covers="type",
+            ))
+        if self._fields:
+            # Only types that have every requested field can match
+            field_buckets = [(product_class, bucket) for product_class, bucket in inventory._by_type.items()
+                             if all(hasattr(product_class, field) for field in self._fields)]
+            names = sorted({product_class.__name__ for product_class, _ in field_buckets})
+            paths.append(_AccessPath(
+                f"type buckets with {', '.join(self._fields)}: {', '.join(names) or 'none'}",
+                sum(len(bucket) for _, bucket in field_buckets),
+                lambda: chain.from_iterable(bucket.values() for _, bucket in field_buckets),
+            ))
+        paths.append(_AccessPath(
+            "full scan", len(inventory._products), lambda: iter(inventory._products.values()),
+        ))
+        return paths
+
+    def _plan(self) -> tuple[_AccessPath, list[_AccessPath], list[tuple[str, str, Callable[[Product], bool]]]]:
+        paths = self._access_paths()
+        best = min(paths, key=lambda path: path.estimate)
+        others = [path for path in paths if path is not best]
+        residual = [entry for entry in self._filters() if entry[0] != best.covers]
+        return best, others, residual
+
+    def __iter__(self) -> Iterator[Product]:
+        best, _, residual = self._plan()
+        predicates = [predicate for _, _, predicate in residual]
+        for product in best.products():
+            if all(predicate(product) for predicate in predicates):
+                yield product
+
+    def explain(self) -> str:
+        """Describe the plan the query would run: the index it walks and the filters it checks afterwards."""
+        best, others, residual = self._plan()
+        lines = [
+            "Query plan",
+            f"  filters:    {', '.join(description for _, description, _ in self._filters()) or 'none'}",
+            f"  access:     {best.description} (~{best.estimate:,} candidates)",
+            f"  then check: {', '.join(description for _, description, _ in residual) or 'nothing'}",
+        ]
+        if others:
+            lines.append("  rejected:   " + "; ".join(f"{path.description} (~{path.estimate:,})" for path in others))
+        return "\n".join(lines)
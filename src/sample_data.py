@@ -1,8 +1,34 @@
+import random
 from datetime import date, datetime, timedelta
-from product import Electronics, Grocery, Clothing
+from typing import Iterator
+from product import Electronics, Grocery, Clothing, Product
 from inventory import Inventory
 
 
+# (product, typical price) pairs and the vocabularies synthetic names are drawn from
+ELECTRONICS = [("Smartphone", 650), ("Laptop", 1100), ("Headphones", 120), ("Earbuds", 90), ("Smart TV", 800),
+               ("Monitor", 250), ("Keyboard", 60), ("Mouse", 30), ("Tablet", 450), ("Smartwatch", 250),
+               ("Speaker", 90), ("Camera", 650), ("Charger", 25), ("Router", 110), ("Power Bank", 40)]
+ELECTRONICS_BRANDS = ["Apple", "Samsung", "Sony", "Dell", "HP", "Lenovo", "LG", "Asus", "Bose", "Logitech",
+                      "Xiaomi", "Anker", "Canon", "Philips", "JBL"]
+ELECTRONICS_MODELS = ["Pro", "Max", "Mini", "Ultra", "Air", "Plus", "Lite", "Neo", "Wireless", "Gaming"]
+
+# (product, typical price, shelf life in days)
+GROCERIES = [("Milk", 3.5, 10), ("Bread", 3, 5), ("Eggs", 5, 28), ("Cheese", 7, 45), ("Yogurt", 2, 21),
+             ("Butter", 4.5, 60), ("Chicken Breast", 9, 4), ("Ground Beef", 8, 3), ("Salmon Fillet", 12, 3),
+             ("Apples", 4, 30), ("Bananas", 2, 7), ("Spinach", 3, 6), ("Rice", 6, 540), ("Pasta", 2.5, 720),
+             ("Canned Beans", 1.5, 900), ("Coffee", 11, 365), ("Orange Juice", 4, 14), ("Cereal", 5, 270)]
+GROCERY_QUALIFIERS = ["Organic", "Fresh", "Whole", "Low Fat", "Family Size", "Free Range", "Store Brand", "Premium"]
+
+CLOTHING = [("T-Shirt", 20), ("Jeans", 45), ("Sweater", 50), ("Jacket", 90), ("Hoodie", 40), ("Dress", 60),
+            ("Shorts", 25), ("Skirt", 35), ("Coat", 140), ("Socks", 8), ("Polo Shirt", 30), ("Chinos", 45)]
+CLOTHING_STYLES = ["Slim Fit", "Relaxed", "Classic", "Vintage", "Oversized", "Cropped", "Essential", "Athletic"]
+CLOTHING_COLORS = ["Black", "White", "Navy", "Grey", "Olive", "Beige", "Red", "Blue", "Green", "Burgundy"]
+CLOTHING_MATERIALS = ["Cotton", "Denim", "Wool", "Polyester", "Linen", "Cashmere", "Nylon", "Fleece"]
+CLOTHING_SIZES = ["S", "M", "L", "XL"]
+CLOTHING_SIZE_WEIGHTS = [20, 35, 30, 15]
+
+
 def create_sample_inventory():
     """Create and return an inventory with sample products."""
     inventory = Inventory()
@@ -36,6 +62,53 @@ def create_sample_inventory():
     return inventory
 
 
+def generate_catalog(size: int, seed: int = 0, electronics: float = 0.3, grocery: float = 0.4) -> Iterator[Product]:
+    """Yield `size` synthetic products, the same ones for the same seed.
+    
+    `electronics` and `grocery` are the shares of those types; the rest is
+    clothing. Prices scatter log-normally around a typical price per product
+    kind, stock levels are skewed towards small numbers with a few percent
+    out of stock, and each grocery expires somewhere between a tenth of its
+    shelf life ago and a full shelf life from today, so roughly one in ten
+    groceries is already expired.
+    """
+    rng = random.Random(seed)
+    today = datetime.now().date()
+    
+    def quantity() -> int:
+        return 0 if rng.random() < 0.03 else int(rng.expovariate(1 / 40))
+    
+    def price(typical: float) -> float:
+        return max(0.49, round(typical * rng.lognormvariate(0, 0.3), 2))
+    
+    for i in range(size):
+        roll = rng.random()
+        if roll < electronics:
+            kind, typical = rng.choice(ELECTRONICS)
+            brand = rng.choice(ELECTRONICS_BRANDS)
+            name = f"{brand} {kind} {rng.choice(ELECTRONICS_MODELS)} {rng.randint(1, 20)}"
+            yield Electronics(f"E{i}", name, price(typical), quantity(), brand, rng.choice([1, 1, 1, 2, 2, 3]))
+        elif roll < electronics + grocery:
+            kind, typical, shelf_life = rng.choice(GROCERIES)
+            name = f"{rng.choice(GROCERY_QUALIFIERS)} {kind}"
+            expires = today + timedelta(days=round(shelf_life * rng.uniform(-0.1, 1.0)))
+            yield Grocery(f"G{i}", name, price(typical), quantity(), expires)
+        else:
+            kind, typical = rng.choice(CLOTHING)
+            material = rng.choice(CLOTHING_MATERIALS)
+            name = f"{rng.choice(CLOTHING_STYLES)} {rng.choice(CLOTHING_COLORS)} {material} {kind}"
+            size_label = rng.choices(CLOTHING_SIZES, CLOTHING_SIZE_WEIGHTS)[0]
+            yield Clothing(f"C{i}", name, price(typical), quantity(), size_label, material)
+
+
+def create_synthetic_inventory(size: int, seed: int = 0) -> Inventory:
+    """Create an inventory of `size` products from generate_catalog."""
+    inventory = Inventory()
+    for product in generate_catalog(size, seed):
+        inventory.add_product(product)
+    return inventory
+
+
 def save_sample_data():
     """Create sample inventory and save it to a file."""
     inventory = create_sample_inventory()
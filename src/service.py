@@ -0,0 +1,190 @@
+"""asyncio network front-end for an Inventory.
+
+Clients send one JSON request per line and get one JSON response per line,
+tagged with the request's "id" so requests can be pipelined:
+
+    {"id": 1, "op": "sell", "product_id": "E001", "quantity": 2}
+    {"id": 1, "ok": true, "result": 13}
+
+Supported ops: sell, restock (product_id, quantity), search (name),
+search_type (product_type) and value. Failures come back as
+{"id": ..., "ok": false, "error": <exception class>, "message": ...}.
+
+Concurrent sell/restock requests for the same SKU are coalesced: they queue
+behind a single work item for that SKU, and each run of same-kind requests is
+applied to the inventory as one batch. A bound on in-flight requests stops
+the service from reading more input once it is saturated, which pushes back
+on clients through TCP flow control.
+"""
+import argparse
+import asyncio
+import json
+
+from src.exceptions import BatchOperationError
+from inventory import Inventory
+
+STOCK_OPERATIONS = ("sell", "restock")
+
+
+class InventoryService:
+    """Serves an Inventory to many clients over a stream socket."""
+
+    def __init__(self, inventory: Inventory, max_in_flight: int = 10_000):
+        self.inventory = inventory
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._pending: dict[str, list[tuple[str, int, asyncio.Future]]] = {}
+        self._ready: asyncio.Queue[str] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        self.batches = 0     # Batches applied to the inventory
+        self.coalesced = 0   # Stock requests that shared a batch with an earlier request
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        self._start_worker()
+        return await asyncio.start_server(self._handle_client, host, port)
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        self._start_worker()
+        return await asyncio.start_unix_server(self._handle_client, path)
+
+    def _start_worker(self):
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._apply_stock_changes())
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks: set[asyncio.Task] = set()
+        try:
+            while line := await reader.readline():
+                # Stop reading while saturated: unread input backs up to the client
+                await self._in_flight.acquire()
+                task = asyncio.create_task(self._respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            response = {"id": request_id, "ok": True, "result": await self.handle(request)}
+        except Exception as e:
+            response = {"id": request_id, "ok": False, "error": type(e).__name__, "message": str(e)}
+        finally:
+            self._in_flight.release()
+        try:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass  # The client went away; nobody is left to read the response
+
+    async def handle(self, request: dict):
+        """Execute one decoded request and return its JSON-serializable result."""
+        op = request.get("op")
+        if op in STOCK_OPERATIONS:
+            quantity = request["quantity"]
+            if not isinstance(quantity, int) or isinstance(quantity, bool):
+                raise ValueError("Quantity must be an integer")
+            return await self._submit(op, request["product_id"], quantity)
+        if op == "search":
+            return [product.to_dict() for product in self.inventory.search_by_name(request["name"])]
+        if op == "search_type":
+            return [product.to_dict() for product in self.inventory.search_by_type(request["product_type"])]
+        if op == "value":
+            return self.inventory.total_inventory_value()
+        raise ValueError(f"Unknown operation: {op}")
+
+    def _submit(self, op: str, product_id: str, quantity: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        queue = self._pending.get(product_id)
+        if queue is None:
+            self._pending[product_id] = [(op, quantity, future)]
+            self._ready.put_nowait(product_id)
+        else:
+            queue.append((op, quantity, future))
+            self.coalesced += 1
+        return future
+
+    async def _apply_stock_changes(self):
+        while True:
+            product_id = await self._ready.get()
+            requests = self._pending.pop(product_id)
+            start = 0
+            while start < len(requests):
+                end = start
+                while end < len(requests) and requests[end][0] == requests[start][0]:
+                    end += 1
+                run = requests[start:end]
+                try:
+                    self._apply_run(product_id, run)
+                except Exception as e:
+                    # Fail this run's requests instead of the worker, which every later request needs
+                    for _, _, future in run:
+                        if not future.done():
+                            future.set_exception(e)
+                start = end
+            # Let clients run between SKUs so new requests can join later batches
+            await asyncio.sleep(0)
+
+    def _apply_run(self, product_id: str, run: list[tuple[str, int, asyncio.Future]]):
+        """Apply consecutive requests of one kind for one SKU, as a single batch when possible."""
+        op = run[0][0]
+        batch = self.inventory.sell_many if op == "sell" else self.inventory.restock_many
+        self.batches += 1
+        try:
+            stock = batch([(product_id, sum(quantity for _, quantity, _ in run))])[product_id]
+        except BatchOperationError:
+            # Some request in the run cannot be honoured; apply them one by one so the rest still succeed
+            single = self.inventory.sell_product if op == "sell" else self.inventory.restock_product
+            for _, quantity, future in run:
+                try:
+                    future.set_result(single(product_id, quantity))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+
+        # Report the stock level each request would have seen had it run on its own, in order
+        sign = 1 if op == "sell" else -1
+        for _, quantity, future in reversed(run):
+            future.set_result(stock)
+            stock += sign * quantity
+
+
+async def serve(inventory: Inventory, host: str, port: int, unix_path: str | None = None):
+    service = InventoryService(inventory)
+    server = await (service.start_unix(unix_path) if unix_path else service.start_tcp(host, port))
+    print(f"Serving inventory of {inventory.total_products} products on {unix_path or f'{host}:{port}'}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an inventory over TCP or a Unix socket.")
+    parser.add_argument("--file", help="inventory JSON file to load (default: sample inventory)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--metrics-port", type=int, help="record operation metrics and serve them on this port at /metrics")
+    args = parser.parse_args()
+
+    if args.file:
+        inventory = Inventory()
+        inventory.load_from_file(args.file)
+    else:
+        from sample_data import create_sample_inventory
+        inventory = create_sample_inventory()
+
+    if args.metrics_port is not None:
+        from metrics import instrument, serve_metrics
+        serve_metrics(instrument(inventory), inventory, args.metrics_port, args.host)
+
+    try:
+        asyncio.run(serve(inventory, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
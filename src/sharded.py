@@ -0,0 +1,364 @@
+"""Inventory hash-partitioned across worker processes.
+
+Every shard is a plain Inventory living in its own process. Point operations
+are routed to the shard that owns the product ID; scans and aggregates are
+sent to every shard at once, run in parallel, and merged in the parent.
+Products handed back by a sharded inventory are copies, so change them
+through the inventory methods rather than by mutating the returned objects.
+"""
+import heapq
+import multiprocessing
+import os
+import zlib
+from multiprocessing.connection import Connection
+from typing import Iterable
+
+from src.exceptions import BatchOperationError, DuplicateProductError
+from indexes import encode_cursor
+from inventory import Inventory
+from jsonstream import iter_json_array, iter_json_lines, replace_json_file
+from product import Product, product_from_dict
+from snapshot import save_snapshot
+
+LOAD_CHUNK = 10_000
+
+
+def _shard_main(connection: Connection):
+    """Serve Inventory method calls received over `connection` until told to stop."""
+    inventory = Inventory()
+    staged: dict[str, Product] = {}  # Products of a load in progress, swapped in once the whole file was read
+
+    def stage_many(products: list[Product]):
+        for product in products:
+            if product.product_id in staged:
+                raise DuplicateProductError(f"Product with ID {product.product_id} already exists")
+            staged[product.product_id] = product
+
+    def load_staged():
+        inventory._replace_products(list(staged.values()))
+        staged.clear()
+
+    commands = {
+        "_stage_many": stage_many,
+        "_load_staged": load_staged,
+        "_discard_staged": staged.clear,
+        "_validate_sell": lambda items: inventory._validate_batch(items, selling=True),
+        "_validate_restock": lambda items: inventory._validate_batch(items, selling=False),
+        "_to_dicts": lambda: [product.to_dict() for product in inventory.list_all_products()],
+        "_below_reorder": lambda: [
+            (inventory._reorder_index.key_of(product.product_id), product)
+            for product in inventory.below_reorder_threshold()
+        ],
+    }
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        name, args = message
+        try:
+            command = commands.get(name) or getattr(inventory, name)
+            result = command(*args) if callable(command) else command
+            connection.send((True, result))
+        except Exception as e:
+            try:
+                connection.send((False, e))
+            except Exception:
+                connection.send((False, RuntimeError(repr(e))))
+    connection.close()
+
+
+class ShardedInventory:
+    """Inventory API backed by `shards` worker processes.
+
+    Not thread-safe: the pipes to the shards carry one request at a time, so
+    share a ShardedInventory between threads only behind a lock.
+    """
+
+    def __init__(self, shards: int | None = None):
+        shards = shards or os.cpu_count() or 1
+        self._connections: list[Connection] = []
+        self._processes: list[multiprocessing.Process] = []
+        for _ in range(shards):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shard_main, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the worker processes."""
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
+
+    def _shard_of(self, product_id: str) -> int:
+        # crc32 rather than hash(): string hashes are salted differently in every process
+        return zlib.crc32(product_id.encode()) % len(self._connections)
+
+    @staticmethod
+    def _receive(connection: Connection):
+        ok, result = connection.recv()
+        if not ok:
+            raise result
+        return result
+
+    def _call(self, shard: int, name: str, *args):
+        connection = self._connections[shard]
+        connection.send((name, args))
+        return self._receive(connection)
+
+    def _broadcast(self, name: str, *args) -> list:
+        """Run a method on every shard in parallel and return the per-shard results."""
+        return self._scatter([(name, args)] * len(self._connections))
+
+    def _scatter(self, messages: list[tuple[str, tuple] | None]) -> list:
+        """Send one message per shard (None to skip a shard), then collect the replies in shard order."""
+        for connection, message in zip(self._connections, messages):
+            if message is not None:
+                connection.send(message)
+        results, error = [], None
+        for connection, message in zip(self._connections, messages):
+            if message is None:
+                results.append(None)
+                continue
+            # Drain every reply even after a failure so the pipes stay in step
+            try:
+                results.append(self._receive(connection))
+            except Exception as e:
+                results.append(None)
+                error = error or e
+        if error is not None:
+            raise error
+        return results
+
+    @property
+    def total_products(self):
+        return sum(self._broadcast("total_products"))
+
+    def add_product(self, product: Product):
+        """Add a product to the inventory."""
+        self._call(self._shard_of(product.product_id), "add_product", product)
+
+    def remove_product(self, product_id: str):
+        """Remove a product from the inventory by ID."""
+        self._call(self._shard_of(product_id), "remove_product", product_id)
+
+    def sell_product(self, product_id: str, quantity: int):
+        """Sell a given quantity of a product."""
+        return self._call(self._shard_of(product_id), "sell_product", product_id, quantity)
+
+    def restock_product(self, product_id: str, quantity: int):
+        """Restock a given quantity of a product."""
+        return self._call(self._shard_of(product_id), "restock_product", product_id, quantity)
+
+    def update_price(self, product_id: str, new_price: float):
+        """Change the price of a product."""
+        self._call(self._shard_of(product_id), "update_price", product_id, new_price)
+
+    def _run_batch(self, items: Iterable[tuple[str, int]], selling: bool) -> dict[str, int]:
+        """Validate a batch on every shard involved, then apply it; all or nothing across shards."""
+        per_shard: list[list[tuple[str, int]]] = [[] for _ in self._connections]
+        positions: list[list[int]] = [[] for _ in self._connections]
+        for position, (product_id, quantity) in enumerate(items):
+            shard = self._shard_of(product_id)
+            per_shard[shard].append((product_id, quantity))
+            positions[shard].append(position)
+
+        validate = "_validate_sell" if selling else "_validate_restock"
+        failures = []
+        for connection, shard_items in zip(self._connections, per_shard):
+            if shard_items:
+                connection.send((validate, (shard_items,)))
+        error = None
+        for shard, (connection, shard_items) in enumerate(zip(self._connections, per_shard)):
+            if not shard_items:
+                continue
+            try:
+                self._receive(connection)
+            except BatchOperationError as e:
+                failures.extend((positions[shard][index], product_id, cause) for index, product_id, cause in e.failures)
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+        if failures:
+            raise BatchOperationError(sorted(failures, key=lambda failure: failure[0]))
+
+        # Shards serve one request at a time, so nothing can change between validation and apply
+        apply = "sell_many" if selling else "restock_many"
+        results = self._scatter([(apply, (shard_items,)) if shard_items else None for shard_items in per_shard])
+        merged: dict[str, int] = {}
+        for result in results:
+            if result:
+                merged.update(result)
+        return merged
+
+    def sell_many(self, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Sell a batch of (product_id, quantity) items, all or nothing."""
+        return self._run_batch(items, selling=True)
+
+    def restock_many(self, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Restock a batch of (product_id, quantity) items, all or nothing."""
+        return self._run_batch(items, selling=False)
+
+    def search_by_name(self, name: str) -> list[Product]:
+        """Search for products by name (case-insensitive partial match)."""
+        return [product for products in self._broadcast("search_by_name", name) for product in products]
+
+    def search_by_type(self, product_type: str) -> list[Product]:
+        """Search for products by type."""
+        return [product for products in self._broadcast("search_by_type", product_type) for product in products]
+
+    def query_products(self, product_type: str | None = None,
+                       min_price: float | None = None, max_price: float | None = None,
+                       min_stock: int | None = None, max_stock: int | None = None,
+                       sort_by: str = "price", descending: bool = False,
+                       limit: int = 50, cursor: str | None = None) -> tuple[list[Product], str | None]:
+        """Return one page of products filtered by type, price and stock, sorted by price or stock."""
+        pages = self._broadcast("query_products", product_type, min_price, max_price, min_stock, max_stock,
+                                sort_by, descending, limit, cursor)
+        # Every shard resumes from the same cursor, so merging the shard pages gives the global page
+        def sort_key(product: Product):
+            return getattr(product, sort_by), product.product_id
+        merged = heapq.merge(*(page for page, _ in pages), key=sort_key, reverse=descending)
+        page = list(merged)[:limit]
+        if len(page) < limit:
+            return page, None
+        return page, encode_cursor(*sort_key(page[-1]))
+
+    def get_product(self, product_id: str) -> Product:
+        """Return a copy of the product with the given ID."""
+        return self._call(self._shard_of(product_id), "get_product", product_id)
+
+    def list_all_products(self) -> list[Product]:
+        """Return a list of all products in inventory."""
+        return [product for products in self._broadcast("list_all_products") for product in products]
+
+    def total_inventory_value(self):
+        """Calculate the total value of all products in inventory."""
+        return sum(self._broadcast("total_inventory_value"))
+
+    def value_by_type(self) -> dict[str, float]:
+        """Return the inventory value of each product type."""
+        merged: dict[str, float] = {}
+        for values in self._broadcast("value_by_type"):
+            for product_type, value in values.items():
+                merged[product_type] = merged.get(product_type, 0) + value
+        return merged
+
+    def units_by_type(self) -> dict[str, int]:
+        """Return the number of units in stock of each product type."""
+        merged: dict[str, int] = {}
+        for units in self._broadcast("units_by_type"):
+            for product_type, count in units.items():
+                merged[product_type] = merged.get(product_type, 0) + count
+        return merged
+
+    def out_of_stock_count(self) -> int:
+        """Return the number of products with no units in stock."""
+        return sum(self._broadcast("out_of_stock_count"))
+
+    def check_aggregates(self):
+        """Check the running aggregates of every shard against a full recompute."""
+        self._broadcast("check_aggregates")
+
+    def low_stock_products(self, threshold: int) -> list[Product]:
+        """Return the products with at most `threshold` units in stock, lowest stock first."""
+        merged = heapq.merge(*self._broadcast("low_stock_products", threshold),
+                             key=lambda product: (product.quantity_in_stock, product.product_id))
+        return list(merged)
+
+    def lowest_stock(self, count: int) -> list[Product]:
+        """Return the `count` products with the fewest units in stock, lowest first."""
+        merged = heapq.merge(*self._broadcast("lowest_stock", count),
+                             key=lambda product: (product.quantity_in_stock, product.product_id))
+        return list(merged)[:count]
+
+    def set_reorder_threshold(self, product_id: str, threshold: int | None):
+        """Set the reorder point of one product; None falls back to its type's threshold."""
+        self._call(self._shard_of(product_id), "set_reorder_threshold", product_id, threshold)
+
+    def set_type_reorder_threshold(self, product_type: str, threshold: int | None):
+        """Set the reorder point of every product of a type that has no threshold of its own."""
+        self._broadcast("set_type_reorder_threshold", product_type, threshold)
+
+    def below_reorder_threshold(self) -> list[Product]:
+        """Return the products at or below their reorder threshold, furthest below first.
+
+        Reorder listeners are not supported: they would run inside the shard processes.
+        """
+        merged = heapq.merge(*self._broadcast("_below_reorder"),
+                             key=lambda entry: (entry[0], entry[1].product_id))
+        return [product for _, product in merged]
+
+    def remove_expired_products(self):
+        """Remove all expired grocery products from inventory."""
+        return [product for products in self._broadcast("remove_expired_products") for product in products]
+
+    def expiring_within(self, days: int) -> list[Product]:
+        """Return the grocery products that expire within the next `days` days, soonest first."""
+        products = [product for products in self._broadcast("expiring_within", days) for product in products]
+        return sorted(products, key=lambda product: product.expires_at)
+
+    def _iter_dicts(self):
+        # One shard's products at a time, so the parent never holds the whole catalog
+        for shard in range(len(self._connections)):
+            yield from self._call(shard, "_to_dicts")
+
+    def save_to_file(self, filename: str, incremental: bool = False):
+        """Save the inventory to a JSON file (JSON Lines if the name ends in .jsonl), replacing it atomically.
+
+        The shards do not track changes between saves, so an incremental save
+        writes the whole file, as Inventory.save_to_file does when it cannot
+        write a delta.
+        """
+        replace_json_file(filename, self._iter_dicts())
+
+    def save_snapshot(self, filename: str):
+        """Save the inventory to a binary snapshot file (see snapshot.py)."""
+        save_snapshot((product_from_dict(data) for data in self._iter_dicts()), filename)
+
+    def load_from_file(self, filename: str):
+        """Load inventory from a JSON array or JSON Lines file, routing products to their shards.
+
+        The shards set the products aside until the whole file has been read
+        and only then replace their catalogs, so a file that fails to load
+        leaves the inventory as it was.
+        """
+        try:
+            try:
+                with open(filename, 'r') as file:
+                    records = iter_json_lines(file) if filename.endswith(".jsonl") else iter_json_array(file)
+
+                    chunks: list[list[Product]] = [[] for _ in self._connections]
+                    for record in records:
+                        product = product_from_dict(record)
+                        chunk = chunks[self._shard_of(product.product_id)]
+                        chunk.append(product)
+                        if len(chunk) >= LOAD_CHUNK:
+                            self._call(self._shard_of(product.product_id), "_stage_many", chunk)
+                            chunk.clear()
+                    self._scatter([("_stage_many", (chunk,)) if chunk else None for chunk in chunks])
+            except BaseException:
+                self._broadcast("_discard_staged")
+                raise
+            self._broadcast("_load_staged")
+
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid inventory file format: {str(e)}")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File {filename} not found")
@@ -0,0 +1,253 @@
+"""Fixed-layout binary snapshots of an inventory, read lazily through mmap.
+
+Layout (native byte order, recorded in the header):
+
+    header      magic, version, byte order, product count, string count
+    offsets     uint64[strings + 1]   start of every interned string in the blob
+    blob        UTF-8 bytes of all interned strings
+    columns     one typed array per field, `count` entries each, 8-byte aligned
+
+Strings (IDs, names, types, brands, sizes, materials) are interned once in the
+blob and referenced by index. Expiry dates are stored as proleptic ordinals plus
+the microseconds into the day, or -1 for plain dates.
+
+Version 2 added the number_is_int column; version 1 files are still read,
+with Electronics.warranty_years coming back as a float.
+"""
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator
+
+from product import PRODUCT_CLASSES, Clothing, Electronics, Grocery, Product
+
+MAGIC = b"INVSNAP\0"
+VERSION = 2
+_HEADER = struct.Struct("<8sHH4xQQ")
+_BYTE_ORDERS = {"little": 0, "big": 1}
+
+# (column name, array typecode); all columns have one entry per product
+_COLUMNS = [
+    ("price", "d"),
+    ("quantity", "q"),
+    ("number", "d"),          # Electronics.warranty_years
+    ("expiry_micros", "q"),   # Grocery: microseconds into the expiry day, -1 for a plain date
+    ("type", "I"),
+    ("product_id", "I"),
+    ("name", "I"),
+    ("text1", "I"),           # Electronics.brand / Clothing.size
+    ("text2", "I"),           # Clothing.material
+    ("expiry_day", "i"),      # Grocery: date.toordinal() of the expiry date
+    ("number_is_int", "B"),   # 1 if `number` was an int, so it round-trips with its type (version 2+)
+]
+# Columns present in the files written by each readable version
+_VERSION_COLUMNS = {1: _COLUMNS[:-1], VERSION: _COLUMNS}
+
+
+def _pad(size: int) -> bytes:
+    return b"\0" * (-size % 8)
+
+
+def save_snapshot(products: Iterable[Product], filename: str):
+    """Write products to a binary snapshot file.
+
+    The snapshot is written and fsynced to a temporary file in the same
+    directory and then swapped in, so a crash never leaves a truncated
+    snapshot in place of the previous one.
+    """
+    strings: dict[str, int] = {"": 0}
+
+    def intern(text: str) -> int:
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    columns = {name: array(typecode) for name, typecode in _COLUMNS}
+    for product in products:
+        text1 = text2 = expiry_day = number_is_int = 0
+        number = 0.0
+        expiry_micros = -1
+        if isinstance(product, Electronics):
+            text1, number = intern(product.brand), float(product.warranty_years)
+            number_is_int = isinstance(product.warranty_years, int)
+        elif isinstance(product, Clothing):
+            text1, text2 = intern(product.size), intern(product.material)
+        elif isinstance(product, Grocery):
+            expiry = product.expiry_date
+            expiry_day = expiry.toordinal()
+            if isinstance(expiry, datetime):
+                expiry_micros = (expiry - datetime.combine(expiry.date(), datetime.min.time())) // timedelta(microseconds=1)
+
+        columns["price"].append(product.price)
+        columns["quantity"].append(product.quantity_in_stock)
+        columns["number"].append(number)
+        columns["expiry_micros"].append(expiry_micros)
+        columns["type"].append(intern(product.__class__.__name__))
+        columns["product_id"].append(intern(product.product_id))
+        columns["name"].append(intern(product.name))
+        columns["text1"].append(text1)
+        columns["text2"].append(text2)
+        columns["expiry_day"].append(expiry_day)
+        columns["number_is_int"].append(number_is_int)
+
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = array("Q", [0])
+    for text in encoded:
+        offsets.append(offsets[-1] + len(text))
+    blob = b"".join(encoded)
+
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(filename) or ".", prefix=os.path.basename(filename) + ".", suffix=".tmp")
+    try:
+        with open(fd, "wb") as file:
+            file.write(_HEADER.pack(MAGIC, VERSION, _BYTE_ORDERS[sys.byteorder], len(columns["price"]), len(strings)))
+            file.write(offsets.tobytes())
+            file.write(blob + _pad(len(blob)))
+            for name, _ in _COLUMNS:
+                data = columns[name].tobytes()
+                file.write(data + _pad(len(data)))
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            mode = os.stat(filename).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644  # mkstemp creates the file readable by its owner only
+        os.chmod(temporary, mode)
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+class SnapshotReader:
+    """Memory-mapped view of a snapshot file.
+
+    Opening a snapshot only maps the file and slices out the columns; strings
+    and products are decoded on first access and cached.
+    """
+
+    def __init__(self, filename: str):
+        with open(filename, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._map_columns(filename)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _map_columns(self, filename: str):
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"{filename} is not an inventory snapshot")
+        magic, version, byte_order, count, string_count = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not an inventory snapshot")
+        layout = _VERSION_COLUMNS.get(version)
+        if layout is None:
+            raise ValueError(f"Unsupported snapshot version: {version}")
+        if byte_order != _BYTE_ORDERS[sys.byteorder]:
+            raise ValueError("Snapshot was written on a machine with a different byte order")
+
+        # Check the file is long enough for every section before any view is exported
+        position = _HEADER.size
+        offsets_size = 8 * (string_count + 1)
+        if position + offsets_size > len(self._mmap):
+            raise ValueError(f"Snapshot {filename} is truncated")
+        blob_size = struct.unpack_from("Q", self._mmap, position + offsets_size - 8)[0]
+        sections = [offsets_size, blob_size] + [array(typecode).itemsize * count for _, typecode in layout]
+        if position + sum(size + len(_pad(size)) for size in sections) > len(self._mmap):
+            raise ValueError(f"Snapshot {filename} is truncated")
+
+        view = memoryview(self._mmap)
+        self._offsets = view[position:position + offsets_size].cast("Q")
+        position += offsets_size
+        self._blob = view[position:position + blob_size]
+        position += blob_size + len(_pad(blob_size))
+
+        self._columns: dict[str, memoryview] = {}
+        for (name, typecode), size in zip(layout, sections[2:]):
+            self._columns[name] = view[position:position + size].cast(typecode)
+            position += size + len(_pad(size))
+        self._view = view
+
+        self._count = count
+        self._strings: list[str | None] = [None] * string_count
+        self._products: list[Product | None] = [None] * count
+        self._rows: dict[str, int] | None = None
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the column views and unmap the file."""
+        if self._mmap.closed:
+            return
+        for column in self._columns.values():
+            column.release()
+        self._offsets.release()
+        self._blob.release()
+        self._view.release()
+        self._mmap.close()
+
+    def _string(self, index: int) -> str:
+        text = self._strings[index]
+        if text is None:
+            text = self._strings[index] = str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+        return text
+
+    def __getitem__(self, row: int) -> Product:
+        """Return the product stored in `row`, decoding it on first access."""
+        product = self._products[row]
+        if product is None:
+            product = self._products[row] = self._decode(row)
+        return product
+
+    def __iter__(self) -> Iterator[Product]:
+        for row in range(self._count):
+            yield self[row]
+
+    def get(self, product_id: str) -> Product | None:
+        """Look a product up by ID; the ID → row map is built on the first lookup."""
+        if self._rows is None:
+            ids = self._columns["product_id"]
+            self._rows = {self._string(ids[row]): row for row in range(self._count)}
+        row = self._rows.get(product_id)
+        return None if row is None else self[row]
+
+    def _decode(self, row: int) -> Product:
+        columns = self._columns
+        product_type = self._string(columns["type"][row])
+        if product_type not in PRODUCT_CLASSES:
+            raise ValueError(f"Unknown product type: {product_type}")
+        product_class = PRODUCT_CLASSES[product_type]
+        common = (
+            self._string(columns["product_id"][row]),
+            self._string(columns["name"][row]),
+            columns["price"][row],
+            columns["quantity"][row],
+        )
+
+        if issubclass(product_class, Electronics):
+            number = columns["number"][row]
+            if "number_is_int" in columns and columns["number_is_int"][row]:
+                number = int(number)
+            return product_class(*common, self._string(columns["text1"][row]), number)
+        if issubclass(product_class, Clothing):
+            return product_class(*common, self._string(columns["text1"][row]), self._string(columns["text2"][row]))
+        if issubclass(product_class, Grocery):
+            expiry: date = date.fromordinal(columns["expiry_day"][row])
+            micros = columns["expiry_micros"][row]
+            if micros >= 0:
+                expiry = datetime.combine(expiry, datetime.min.time()) + timedelta(microseconds=micros)
+            return product_class(*common, expiry)
+        raise ValueError(f"Unsupported product type in snapshot: {product_type}")
@@ -0,0 +1,466 @@
+"""Inventory API backed by a SQLite database file instead of in-memory dicts.
+
+Only the rows a call asks for are read into Python, so a catalog larger than
+RAM stays queryable: point operations go through the primary key, range
+scans and pages through B-tree indexes on price, stock and expiry, name
+searches through an FTS5 trigram index, and the per-type totals that
+total_inventory_value and friends report are kept up to date by triggers.
+
+Every statement is a fixed SQL string with parameters, so each connection
+prepares it once and reuses it from its statement cache. Writes go through
+one connection, one transaction per call; bulk calls (add_many, sell_many,
+restock_many, load_from_file) write in a single transaction. The database
+runs in WAL mode, so a small pool of reader connections serves searches and
+scans from other threads while a write is in progress.
+
+Products handed back are copies, as with ShardedInventory: change them
+through the inventory methods. Reorder thresholds, listeners, snapshots and
+query() are not supported.
+"""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator
+
+from src.exceptions import BatchOperationError, DuplicateProductError, InsufficientStockError
+from indexes import decode_cursor, encode_cursor
+from jsonstream import iter_json_array, iter_json_lines, replace_json_file
+from product import Grocery, PRODUCT_CLASSES, Product, product_from_dict
+
+LOAD_CHUNK = 10_000
+EXPIRY_FORMAT = "%Y-%m-%d %H:%M:%S.%f"  # Fixed width, so expiry times compare correctly as text
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,  -- Declared, so VACUUM keeps the IDs the name index refers to
+    product_id TEXT NOT NULL UNIQUE,
+    type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    quantity_in_stock INTEGER NOT NULL,
+    brand TEXT,
+    warranty_years REAL,
+    expiry_date TEXT,
+    expires_at TEXT,
+    size TEXT,
+    material TEXT
+);
+CREATE INDEX IF NOT EXISTS products_by_price ON products (price, product_id);
+CREATE INDEX IF NOT EXISTS products_by_stock ON products (quantity_in_stock, product_id);
+CREATE INDEX IF NOT EXISTS products_by_type ON products (type, price, product_id);
+CREATE INDEX IF NOT EXISTS products_by_expiry ON products (expires_at) WHERE expires_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS type_totals (
+    type TEXT PRIMARY KEY,
+    products INTEGER NOT NULL,
+    units INTEGER NOT NULL,
+    value REAL NOT NULL,
+    out_of_stock INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS products_inserted AFTER INSERT ON products BEGIN
+    INSERT INTO type_totals VALUES (new.type, 1, new.quantity_in_stock, new.price * new.quantity_in_stock,
+                                    new.quantity_in_stock = 0)
+    ON CONFLICT (type) DO UPDATE SET products = products + 1, units = units + excluded.units,
+                                     value = value + excluded.value, out_of_stock = out_of_stock + excluded.out_of_stock;
+END;
+CREATE TRIGGER IF NOT EXISTS products_deleted AFTER DELETE ON products BEGIN
+    UPDATE type_totals SET products = products - 1, units = units - old.quantity_in_stock,
+                           value = value - old.price * old.quantity_in_stock,
+                           out_of_stock = out_of_stock - (old.quantity_in_stock = 0)
+    WHERE type = old.type;
+    DELETE FROM type_totals WHERE type = old.type AND products = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS products_updated AFTER UPDATE OF price, quantity_in_stock ON products BEGIN
+    UPDATE type_totals SET units = units + new.quantity_in_stock - old.quantity_in_stock,
+                           value = value + new.price * new.quantity_in_stock - old.price * old.quantity_in_stock,
+                           out_of_stock = out_of_stock + (new.quantity_in_stock = 0) - (old.quantity_in_stock = 0)
+    WHERE type = new.type;
+END;
+"""
+
+# External-content FTS5 table: the index holds only trigrams, the names stay in products
+NAME_INDEX_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS product_names USING fts5(
+    name, content = 'products', content_rowid = 'id', tokenize = 'trigram'
+);
+CREATE TRIGGER IF NOT EXISTS product_names_inserted AFTER INSERT ON products BEGIN
+    INSERT INTO product_names (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS product_names_deleted AFTER DELETE ON products BEGIN
+    INSERT INTO product_names (product_names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+
+COLUMNS = ("product_id, type, name, price, quantity_in_stock, brand, warranty_years, expiry_date, expires_at, "
+           "size, material")
+SELECT_PRODUCTS = f"SELECT {COLUMNS} FROM products"
+INSERT_PRODUCT = f"INSERT INTO products ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+SELECT_PRODUCT = SELECT_PRODUCTS + " WHERE product_id = ?"
+SELECT_STOCK = "SELECT name, quantity_in_stock FROM products WHERE product_id = ?"
+UPDATE_STOCK = "UPDATE products SET quantity_in_stock = ? WHERE product_id = ?"
+UPDATE_PRICE = "UPDATE products SET price = ? WHERE product_id = ?"
+DELETE_PRODUCT = "DELETE FROM products WHERE product_id = ?"
+
+
+def _row_of(product: Product) -> tuple:
+    data = product.to_dict()
+    expires_at = product.expires_at.strftime(EXPIRY_FORMAT) if isinstance(product, Grocery) else None
+    return (product.product_id, data["type"], product.name, product.price, product.quantity_in_stock,
+            data.get("brand"), data.get("warranty_years"), data.get("expiry_date"), expires_at,
+            data.get("size"), data.get("material"))
+
+
+def _product_of(row: tuple) -> Product:
+    product_id, product_type, name, price, quantity, brand, warranty_years, expiry_date, _, size, material = row
+    if product_type == "Electronics":
+        return PRODUCT_CLASSES[product_type](product_id, name, price, quantity, brand, warranty_years)
+    if product_type == "Grocery":
+        # Keep whichever of date or datetime was stored
+        expiry = datetime.fromisoformat(expiry_date) if "T" in expiry_date else date.fromisoformat(expiry_date)
+        return PRODUCT_CLASSES[product_type](product_id, name, price, quantity, expiry)
+    return PRODUCT_CLASSES[product_type](product_id, name, price, quantity, size, material)
+
+
+def _type_name(product_type: str) -> str | None:
+    """Return the stored type name (the class name) for a case-insensitive type, or None if there is no such type."""
+    for name in PRODUCT_CLASSES:
+        if name.lower() == product_type.lower():
+            return name
+    return None
+
+
+def _like(text: str) -> tuple[str, str]:
+    """Return a LIKE clause and pattern matching names that contain `text`."""
+    if not any(character in text for character in "%_\\"):
+        return "LIKE ?", f"%{text}%"
+    # An ESCAPE clause keeps FTS5 from using its trigram index, so only add one when needed
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return "LIKE ? ESCAPE '\\'", f"%{escaped}%"
+
+
+class SQLiteInventory:
+    """Inventory API stored in the SQLite database at `path`.
+
+    `readers` connections are kept for reads from other threads. With
+    path ":memory:" the database lives in this process only, and reads
+    share the writer connection.
+    """
+
+    def __init__(self, path: str, readers: int = 4):
+        self._path = path
+        self._lock = threading.Lock()  # Serializes writers, and everything on an in-memory database
+        self._writer = self._connect()
+        with self._writer:
+            self._writer.executescript(SCHEMA)
+            try:
+                self._writer.executescript(NAME_INDEX_SCHEMA)
+                self._name_index = True
+            except sqlite3.OperationalError:
+                self._name_index = False  # SQLite built without FTS5 or older than 3.34: names are scanned
+        self._readers: queue.Queue[sqlite3.Connection] | None = None
+        if path != ":memory:":
+            self._readers = queue.Queue()
+            for _ in range(readers):
+                self._readers.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._path, check_same_thread=False, cached_statements=256)
+        if self._path != ":memory:":
+            connection.execute("PRAGMA journal_mode = WAL")
+            # In WAL mode a commit survives a process crash without an fsync; only power loss can undo it
+            connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close every connection to the database."""
+        self._writer.execute("PRAGMA optimize")  # Refresh the planner statistics the session's queries could use
+        self._writer.close()
+        if self._readers is not None:
+            while not self._readers.empty():
+                self._readers.get_nowait().close()
+
+    @contextmanager
+    def _writing(self) -> Iterator[sqlite3.Connection]:
+        """Hold the writer connection for one transaction, committed on success and rolled back on error."""
+        with self._lock, self._writer:
+            yield self._writer
+
+    @contextmanager
+    def _reading(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection from the pool, waiting for one if all are in use."""
+        if self._readers is None:
+            with self._lock:
+                yield self._writer
+            return
+        connection = self._readers.get()
+        try:
+            yield connection
+        finally:
+            self._readers.put(connection)
+
+    def _select(self, sql: str, parameters: tuple = ()) -> list[Product]:
+        with self._reading() as connection:
+            return [_product_of(row) for row in connection.execute(sql, parameters)]
+
+    @property
+    def total_products(self):
+        with self._reading() as connection:
+            return connection.execute("SELECT COALESCE(SUM(products), 0) FROM type_totals").fetchone()[0]
+
+    def _clear(self):
+        with self._writing() as connection:
+            connection.execute("DELETE FROM products")
+
+    def add_product(self, product: Product):
+        """Add a product to the inventory."""
+        try:
+            with self._writing() as connection:
+                connection.execute(INSERT_PRODUCT, _row_of(product))
+        except sqlite3.IntegrityError:
+            raise DuplicateProductError(f"Product with ID {product.product_id} already exists")
+
+    def add_many(self, products: Iterable[Product]):
+        """Add products in one transaction; if any ID already exists, none are added."""
+        try:
+            with self._writing() as connection:
+                connection.executemany(INSERT_PRODUCT, map(_row_of, products))
+        except sqlite3.IntegrityError as e:
+            raise DuplicateProductError(f"A product in the batch already exists: {str(e)}")
+
+    def remove_product(self, product_id: str):
+        """Remove a product from the inventory by ID."""
+        with self._writing() as connection:
+            if connection.execute(DELETE_PRODUCT, (product_id,)).rowcount == 0:
+                raise KeyError(f"No product with ID {product_id} exists in inventory")
+
+    def get_product(self, product_id: str) -> Product:
+        """Return a copy of the product with the given ID."""
+        products = self._select(SELECT_PRODUCT, (product_id,))
+        if not products:
+            raise KeyError(f"No product with ID {product_id} exists in inventory")
+        return products[0]
+
+    def _stock_of(self, connection: sqlite3.Connection, product_id: str) -> tuple[str, int]:
+        row = connection.execute(SELECT_STOCK, (product_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No product with ID {product_id} exists in inventory")
+        return row
+
+    def sell_product(self, product_id: str, quantity: int):
+        """Sell a given quantity of a product."""
+        with self._writing() as connection:
+            name, stock = self._stock_of(connection, product_id)
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive")
+            if quantity > stock:
+                raise InsufficientStockError(f"Cannot sell product {name}: Only {stock} units available")
+            connection.execute(UPDATE_STOCK, (stock - quantity, product_id))
+            return stock - quantity
+
+    def restock_product(self, product_id: str, quantity: int):
+        """Restock a given quantity of a product."""
+        with self._writing() as connection:
+            _, stock = self._stock_of(connection, product_id)
+            if quantity <= 0:
+                raise ValueError("Amount must be positive")
+            connection.execute(UPDATE_STOCK, (stock + quantity, product_id))
+            return stock + quantity
+
+    def _run_batch(self, items: Iterable[tuple[str, int]], selling: bool) -> dict[str, int]:
+        """Validate a batch as Inventory._validate_batch does, then apply it in the same transaction."""
+        with self._writing() as connection:
+            totals: dict[str, int] = {}
+            stock: dict[str, tuple[str, int] | None] = {}
+            failures: list[tuple[int, str, Exception]] = []
+            for position, (product_id, quantity) in enumerate(items):
+                if product_id not in stock:
+                    stock[product_id] = connection.execute(SELECT_STOCK, (product_id,)).fetchone()
+                row = stock[product_id]
+                if row is None:
+                    failures.append((position, product_id, KeyError(f"No product with ID {product_id} exists in inventory")))
+                elif not isinstance(quantity, int) or quantity <= 0:
+                    failures.append((position, product_id, ValueError("Quantity must be a positive integer")))
+                elif selling and totals.get(product_id, 0) + quantity > row[1]:
+                    available = row[1] - totals.get(product_id, 0)
+                    failures.append((position, product_id, InsufficientStockError(
+                        f"Cannot sell product {row[0]}: Only {available} units available")))
+                else:
+                    totals[product_id] = totals.get(product_id, 0) + quantity
+            if failures:
+                raise BatchOperationError(failures)
+
+            sign = -1 if selling else 1
+            results = {product_id: stock[product_id][1] + sign * quantity for product_id, quantity in totals.items()}
+            connection.executemany(UPDATE_STOCK, ((level, product_id) for product_id, level in results.items()))
+            return results
+
+    def sell_many(self, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Sell a batch of (product_id, quantity) items, all or nothing."""
+        return self._run_batch(items, selling=True)
+
+    def restock_many(self, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        """Restock a batch of (product_id, quantity) items, all or nothing."""
+        return self._run_batch(items, selling=False)
+
+    def update_price(self, product_id: str, new_price: float):
+        """Change the price of a product."""
+        with self._writing() as connection:
+            self._stock_of(connection, product_id)  # An unknown ID is reported before a bad price, as Inventory does
+            if new_price <= 0:
+                raise ValueError("Price cannot be negative")
+            connection.execute(UPDATE_PRICE, (new_price, product_id))
+
+    def search_by_name(self, name: str) -> list[Product]:
+        """Search for products by name (case-insensitive partial match)."""
+        clause, pattern = _like(name)
+        if self._name_index:
+            sql = SELECT_PRODUCTS + f" WHERE id IN (SELECT rowid FROM product_names WHERE name {clause})"
+        else:
+            sql = SELECT_PRODUCTS + f" WHERE name {clause}"
+        return self._select(sql, (pattern,))
+
+    def search_by_type(self, product_type: str) -> list[Product]:
+        """Search for products by type."""
+        return self._select(SELECT_PRODUCTS + " WHERE type = ?", (_type_name(product_type),))
+
+    def query_products(self, product_type: str | None = None,
+                       min_price: float | None = None, max_price: float | None = None,
+                       min_stock: int | None = None, max_stock: int | None = None,
+                       sort_by: str = "price", descending: bool = False,
+                       limit: int = 50, cursor: str | None = None) -> tuple[list[Product], str | None]:
+        """Return one page of products filtered by type, price and stock, sorted by price or stock.
+
+        Cursors work as with Inventory.query_products; each page is one index range scan.
+        """
+        if sort_by not in ("price", "quantity_in_stock"):
+            raise ValueError(f"Cannot sort by {sort_by}; use 'price' or 'quantity_in_stock'")
+        if limit <= 0:
+            raise ValueError("Limit must be positive")
+
+        conditions, parameters = [], []
+        if product_type is not None:
+            product_type = _type_name(product_type) or product_type
+        for condition, value in [("type = ?", product_type),
+                                 ("price >= ?", min_price), ("price <= ?", max_price),
+                                 ("quantity_in_stock >= ?", min_stock), ("quantity_in_stock <= ?", max_stock)]:
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        if cursor is not None:
+            conditions.append(f"({sort_by}, product_id) {'<' if descending else '>'} (?, ?)")
+            parameters.extend(decode_cursor(cursor))
+        order = "DESC" if descending else "ASC"
+        sql = (SELECT_PRODUCTS + (" WHERE " + " AND ".join(conditions) if conditions else "")
+               + f" ORDER BY {sort_by} {order}, product_id {order} LIMIT ?")
+        page = self._select(sql, (*parameters, limit))
+        if len(page) < limit:
+            return page, None
+        return page, encode_cursor(getattr(page[-1], sort_by), page[-1].product_id)
+
+    def iter_products(self) -> Iterator[Product]:
+        """Yield every product, reading the table a row at a time.
+
+        Holds a reader connection (on an in-memory database, the writer lock) until exhausted or closed.
+        """
+        with self._reading() as connection:
+            for row in connection.execute(SELECT_PRODUCTS):
+                yield _product_of(row)
+
+    def list_all_products(self) -> list[Product]:
+        """Return a list of all products in inventory."""
+        return self._select(SELECT_PRODUCTS)
+
+    def _totals(self, column: str) -> dict[str, float]:
+        with self._reading() as connection:
+            return dict(connection.execute(f"SELECT type, {column} FROM type_totals"))
+
+    def total_inventory_value(self):
+        """Return the total value of all products in inventory (maintained by triggers)."""
+        return sum(self._totals("value").values())
+
+    def value_by_type(self) -> dict[str, float]:
+        """Return the inventory value of each product type."""
+        return self._totals("value")
+
+    def units_by_type(self) -> dict[str, int]:
+        """Return the number of units in stock of each product type."""
+        return self._totals("units")
+
+    def out_of_stock_count(self) -> int:
+        """Return the number of products with no units in stock."""
+        return sum(self._totals("out_of_stock").values())
+
+    def check_aggregates(self):
+        """Recompute the per-type totals from the products table and raise AssertionError on any mismatch."""
+        with self._reading() as connection:
+            stored = {row[0]: row[1:] for row in connection.execute(
+                "SELECT type, products, units, value, out_of_stock FROM type_totals")}
+            expected = {row[0]: row[1:] for row in connection.execute(
+                "SELECT type, COUNT(*), SUM(quantity_in_stock), SUM(price * quantity_in_stock), "
+                "SUM(quantity_in_stock = 0) FROM products GROUP BY type")}
+        if stored.keys() != expected.keys() or any(
+            stored[key][:2] != expected[key][:2] or stored[key][3] != expected[key][3]
+            or abs(stored[key][2] - expected[key][2]) > 1e-6 + 1e-9 * abs(expected[key][2])
+            for key in expected
+        ):
+            raise AssertionError(f"Inventory aggregates are inconsistent: {stored} != {expected}")
+
+    def low_stock_products(self, threshold: int) -> list[Product]:
+        """Return the products with at most `threshold` units in stock, lowest stock first."""
+        return self._select(SELECT_PRODUCTS + " WHERE quantity_in_stock <= ? ORDER BY quantity_in_stock, product_id",
+                            (threshold,))
+
+    def lowest_stock(self, count: int) -> list[Product]:
+        """Return the `count` products with the fewest units in stock, lowest first."""
+        return self._select(SELECT_PRODUCTS + " ORDER BY quantity_in_stock, product_id LIMIT ?", (count,))
+
+    def remove_expired_products(self):
+        """Remove all expired grocery products from inventory."""
+        now = datetime.now().strftime(EXPIRY_FORMAT)
+        with self._writing() as connection:
+            expired = [_product_of(row) for row in connection.execute(
+                SELECT_PRODUCTS + " WHERE expires_at < ? ORDER BY expires_at", (now,))]
+            connection.execute("DELETE FROM products WHERE expires_at < ?", (now,))
+        return expired
+
+    def expiring_within(self, days: int) -> list[Product]:
+        """Return the grocery products that expire within the next `days` days, soonest first."""
+        now = datetime.now()
+        return self._select(SELECT_PRODUCTS + " WHERE expires_at BETWEEN ? AND ? ORDER BY expires_at",
+                            (now.strftime(EXPIRY_FORMAT), (now + timedelta(days=days)).strftime(EXPIRY_FORMAT)))
+
+    def save_to_file(self, filename: str, incremental: bool = False):
+        """Save the inventory to a JSON file (JSON Lines if the name ends in .jsonl), streaming from the database.
+
+        The file is replaced atomically. The database is the durable copy and
+        tracks no changes between saves, so an incremental save writes the
+        whole file too.
+        """
+        replace_json_file(filename, (product.to_dict() for product in self.iter_products()))
+
+    def load_from_file(self, filename: str):
+        """Replace the inventory with a JSON array or JSON Lines file, in one transaction of chunked inserts."""
+        try:
+            with open(filename, 'r') as file, self._writing() as connection:
+                records = iter_json_lines(file) if filename.endswith(".jsonl") else iter_json_array(file)
+                connection.execute("DELETE FROM products")
+                chunk: list[tuple] = []
+                for record in records:
+                    chunk.append(_row_of(product_from_dict(record)))
+                    if len(chunk) >= LOAD_CHUNK:
+                        connection.executemany(INSERT_PRODUCT, chunk)
+                        chunk.clear()
+                connection.executemany(INSERT_PRODUCT, chunk)
+
+        except (ValueError, KeyError, TypeError, sqlite3.IntegrityError) as e:
+            raise ValueError(f"Invalid inventory file format: {str(e)}")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File {filename} not found")
@@ -1,8 +1,9 @@
 import os
 from datetime import datetime, timedelta
-from typing import Callable, Literal, Optional
+from itertools import islice
+from typing import Callable, Iterable, Literal, Optional
 from src.exceptions import DuplicateProductError, InsufficientStockError, InvalidProductTypeError
-from product import Electronics, Grocery, Clothing
+from product import Electronics, Grocery, Clothing, Product
 from inventory import Inventory
 from typing import TypeVar, Callable, Optional
 
@@ -87,26 +88,121 @@ def add_product_menu(inventory: Inventory):
     input("\nPress Enter to continue...")
 
 
+PAGE_SIZE = 20
+
+PageFetcher = Callable[[Optional[str]], tuple[list[Product], Optional[str]]]
+
+
+def format_product_line(product: Product) -> str:
+    """Format a product as one row of a product listing."""
+    return (f"{product.product_id:<12} {product.name[:28]:<28} {type(product).__name__:<11} "
+            f"{'$' + format(product.price, ',.2f'):>11} {product.quantity_in_stock:>8}")
+
+
+def iter_pages(products: Iterable[Product], page_size: int = PAGE_SIZE) -> PageFetcher:
+    """Page through products from any iterable, e.g. search results, consuming it only as far as the pages viewed so far.
+    
+    The cursor is the position of the first product on the page.
+    """
+    products = iter(products)
+    seen: list[Product] = []
+    
+    def fetch_page(cursor: Optional[str]) -> tuple[list[Product], Optional[str]]:
+        start = int(cursor or 0)
+        # One product past the page tells whether there is a next page
+        seen.extend(islice(products, max(0, start + page_size + 1 - len(seen))))
+        page = seen[start:start + page_size]
+        return page, str(start + page_size) if len(seen) > start + page_size else None
+    return fetch_page
+
+
+def page_products(
+    title: str, 
+    fetch_page: PageFetcher, 
+    summary: Optional[str] = None, 
+    empty_message: str = "No products found.", 
+    choose: bool = False
+    ) -> Optional[Product]:
+    """Show products one page at a time; only the visible page is fetched and formatted.
+    
+    `fetch_page` takes a cursor (None for the first page) and returns the page
+    and the cursor of the next page (None after the last one). Entering a
+    row number shows that product's details, or with choose=True returns it.
+    Returns None when the user leaves the listing.
+    """
+    cursors: list[Optional[str]] = [None]  # Cursor of every page up to the current one
+    while True:
+        page, next_cursor = fetch_page(cursors[-1])
+        print_header(title)
+        if summary:
+            print(summary + "\n")
+        if not page:
+            print(empty_message)
+            input("\nPress Enter to continue...")
+            return None
+        
+        print(f"     {'ID':<12} {'Name':<28} {'Type':<11} {'Price':>11} {'In stock':>8}")
+        for number, product in enumerate(page, 1):
+            print(f"{number:>3}. {format_product_line(product)}")
+        
+        options = []
+        if next_cursor is not None:
+            options.append("n = next page")
+        if len(cursors) > 1:
+            options.append("p = previous page")
+        options.append(f"1-{len(page)} = {'select' if choose else 'details'}")
+        options.append("q = back")
+        print(f"\nPage {len(cursors)}  ({', '.join(options)})")
+        
+        answer = input("> ").strip().lower()
+        if answer == "n" and next_cursor is not None:
+            cursors.append(next_cursor)
+        elif answer == "p" and len(cursors) > 1:
+            cursors.pop()
+        elif answer == "q":
+            return None
+        elif answer.isdigit() and 1 <= int(answer) <= len(page):
+            product = page[int(answer) - 1]
+            if choose:
+                return product
+            print_header(title)
+            print(str(product))
+            input("\nPress Enter to continue...")
+
+
+def select_product(inventory: Inventory, title: str) -> Optional[Product]:
+    """Let the user pick a product by its ID, or by searching its name and choosing from the matches."""
+    print_header(title)
+    text = input("Enter product ID, or part of a name to search (blank to cancel): ").strip()
+    if not text:
+        return None
+    try:
+        return inventory.get_product(text)
+    except KeyError:
+        pass
+    return page_products(f"{title}: names matching '{text}'", iter_pages(inventory.search_by_name(text)), 
+                         empty_message=f"No product has ID '{text}' or a name matching it.", choose=True)
+
+
 def sell_product_menu(inventory: Inventory):
     """Menu for selling a product."""
-    print_header("Sell Product")
-    
-    # List all products first
-    products = inventory.list_all_products()
-    if not products:
+    if not inventory.total_products:
+        print_header("Sell Product")
         print("No products in inventory.")
         input("\nPress Enter to continue...")
         return
     
-    print("Available Products:")
-    for i, product in enumerate(products, 1):
-        print(f"{i}. {product.name} (ID: {product.product_id}) - {product.quantity_in_stock} in stock")
+    product = select_product(inventory, "Sell Product")
+    if product is None:
+        return
+    
+    print(f"\n{product.name} (ID: {product.product_id}) - {product.quantity_in_stock} in stock")
+    if product.quantity_in_stock == 0:
+        print("\nThis product is out of stock.")
+        input("\nPress Enter to continue...")
+        return
     
     try:
-        choice = get_input(f"\nEnter product number (1-{len(products)}): ", 
-                           int, lambda x: 1 <= x <= len(products), "Invalid product number.")
-        
-        product = products[choice-1]
         quantity = get_input(f"Enter quantity to sell (max {product.quantity_in_stock}): ", 
                              int, lambda x: 0 < x <= product.quantity_in_stock, 
                              f"Quantity must be between 1 and {product.quantity_in_stock}.")
@@ -122,24 +218,18 @@ def sell_product_menu(inventory: Inventory):
 
 def restock_product_menu(inventory: Inventory):
     """Menu for restocking a product."""
-    print_header("Restock Product")
-    
-    # List all products first
-    products = inventory.list_all_products()
-    if not products:
+    if not inventory.total_products:
+        print_header("Restock Product")
         print("No products in inventory.")
         input("\nPress Enter to continue...")
         return
     
-    print("Products:")
-    for i, product in enumerate(products, 1):
-        print(f"{i}. {product.name} (ID: {product.product_id}) - {product.quantity_in_stock} in stock")
+    product = select_product(inventory, "Restock Product")
+    if product is None:
+        return
     
+    print(f"\n{product.name} (ID: {product.product_id}) - {product.quantity_in_stock} in stock")
     try:
-        choice = get_input("\nEnter product number (1-" + str(len(products)) + "): ", 
-                           int, lambda x: 1 <= x <= len(products), "Invalid product number.")
-        
-        product = products[choice-1]
         quantity = get_input("Enter quantity to add: ", int, lambda x: x > 0, "Quantity must be positive.")
         
         new_stock = inventory.restock_product(product.product_id, quantity)
@@ -177,17 +267,8 @@ def search_name(inventory: Inventory):
     print_header("Search by Name")
     
     name = get_input("Enter name to search: ", str)
-    products = inventory.search_by_name(name)
-    
-    if products:
-        print(f"\nFound {len(products)} products matching '{name}':\n")
-        for product in products:
-            print(str(product))
-            print("-" * 30)
-    else:
-        print(f"\nNo products found matching '{name}'.")
-    
-    input("\nPress Enter to continue...")
+    page_products(f"Products matching '{name}'", iter_pages(inventory.search_by_name(name)), 
+                  empty_message=f"No products found matching '{name}'.")
 
 
 def search_type(inventory: Inventory):
@@ -202,37 +283,18 @@ def search_type(inventory: Inventory):
     type_choice = get_input("\nEnter choice (1-3): ", int, lambda x: 1 <= x <= 3, "Please enter 1-3.")
     
     type_name = ["Electronics", "Grocery", "Clothing"][type_choice - 1]
-    products = inventory.search_by_type(type_name)
-    
-    if products:
-        print(f"\nFound {len(products)} {type_name} products:\n")
-        for product in products:
-            print(str(product))
-            print("-" * 30)
-    else:
-        print(f"\nNo {type_name} products found in inventory.")
-    
-    input("\nPress Enter to continue...")
+    page_products(f"{type_name} Products (by price)", 
+                  lambda cursor: inventory.query_products(type_name, limit=PAGE_SIZE, cursor=cursor), 
+                  empty_message=f"No {type_name} products found in inventory.")
 
 
 def list_all(inventory: Inventory):
-    """List all products in the inventory."""
-    print_header("All Products")
-    
-    products = inventory.list_all_products()
-    
-    if products:
-        print(f"Total: {len(products)} products\n")
-        for product in products:
-            print(str(product))
-            print("-" * 30)
-        
-        total_value = inventory.total_inventory_value()
-        print(f"\nTotal inventory value: ${total_value:.2f}")
-    else:
-        print("Inventory is empty.")
-    
-    input("\nPress Enter to continue...")
+    """List all products in the inventory, one page at a time."""
+    page_products("All Products (by price)", 
+                  lambda cursor: inventory.query_products(limit=PAGE_SIZE, cursor=cursor), 
+                  summary=f"Total: {inventory.total_products} products, "
+                          f"inventory value ${inventory.total_inventory_value():.2f}", 
+                  empty_message="Inventory is empty.")
 
 
 def file_operations_menu(inventory):
@@ -0,0 +1,80 @@
+"""The running aggregates stay consistent with the products through every kind of mutation.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from inventory import Inventory
+from product import Clothing, Electronics, Grocery
+
+
+class RunningAggregatesTest(unittest.TestCase):
+    def setUp(self):
+        self.inventory = Inventory()
+        self.inventory.add_product(Electronics("E1", "Laptop", 999.0, 10, "Acme", 2))
+        self.inventory.add_product(Electronics("E2", "Phone", 499.0, 0, "Acme", 1))
+        self.inventory.add_product(Clothing("C1", "Shirt", 20.0, 30, "M", "Cotton"))
+        self.inventory.add_product(Grocery("G1", "Milk", 2.5, 40, datetime.now() - timedelta(days=1)))
+        self.inventory.add_product(Grocery("G2", "Bread", 3.0, 20, datetime.now() + timedelta(days=3)))
+        self.inventory.check_aggregates()
+
+    def test_add(self):
+        self.inventory.add_product(Clothing("C2", "Jacket", 80.0, 0, "L", "Wool"))
+        self.inventory.check_aggregates()
+        self.assertEqual(self.inventory.total_inventory_value(), 999.0 * 10 + 20.0 * 30 + 2.5 * 40 + 3.0 * 20)
+        self.assertEqual(self.inventory.out_of_stock_count(), 2)
+
+    def test_remove(self):
+        self.inventory.remove_product("E2")
+        self.inventory.check_aggregates()
+        self.assertEqual(self.inventory.out_of_stock_count(), 0)
+        self.inventory.remove_product("C1")
+        self.inventory.check_aggregates()
+        self.assertNotIn("Clothing", self.inventory.value_by_type())
+
+    def test_sell_and_restock(self):
+        self.inventory.sell_product("E1", 10)
+        self.inventory.check_aggregates()
+        self.assertEqual(self.inventory.out_of_stock_count(), 2)
+        self.inventory.restock_product("E2", 4)
+        self.inventory.check_aggregates()
+        self.assertEqual(self.inventory.units_by_type()["Electronics"], 4)
+        self.assertEqual(self.inventory.out_of_stock_count(), 1)
+
+    def test_batches(self):
+        self.inventory.sell_many([("C1", 5), ("G2", 20), ("C1", 1)])
+        self.inventory.check_aggregates()
+        self.inventory.restock_many([("E2", 2), ("G2", 1)])
+        self.inventory.check_aggregates()
+        self.assertEqual(self.inventory.units_by_type()["Clothing"], 24)
+
+    def test_update_price(self):
+        self.inventory.update_price("E1", 899.0)
+        self.inventory.check_aggregates()
+        self.assertEqual(self.inventory.value_by_type()["Electronics"], 8990.0)
+
+    def test_upsert_many(self):
+        inserted, updated = self.inventory.upsert_many([
+            Electronics("E1", "Laptop", 950.0, 3, "Acme", 2),
+            Clothing("C1", "Shirt", 25.0, 0, "M", "Cotton"),
+            Clothing("C9", "Scarf", 15.0, 7, "S", "Wool"),
+        ])
+        self.assertEqual((inserted, updated), (1, 2))
+        self.inventory.check_aggregates()
+        self.assertEqual(self.inventory.out_of_stock_count(), 2)
+
+    def test_remove_expired_products(self):
+        expired = self.inventory.remove_expired_products()
+        self.assertEqual([product.product_id for product in expired], ["G1"])
+        self.inventory.check_aggregates()
+        self.assertEqual(self.inventory.units_by_type()["Grocery"], 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
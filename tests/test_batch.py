@@ -0,0 +1,57 @@
+"""A batch with a failing item changes nothing.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from src.exceptions import BatchOperationError, InsufficientStockError
+from inventory import Inventory
+from product import Clothing, Electronics
+
+
+def _stock(inventory: Inventory):
+    return {product.product_id: product.quantity_in_stock for product in inventory.list_all_products()}
+
+
+class AllOrNothingTest(unittest.TestCase):
+    def setUp(self):
+        self.inventory = Inventory()
+        self.inventory.add_product(Electronics("E1", "Laptop", 999.0, 10, "Acme", 2))
+        self.inventory.add_product(Clothing("C1", "Shirt", 20.0, 30, "M", "Cotton"))
+        self.stock = _stock(self.inventory)
+        self.value = self.inventory.total_inventory_value()
+
+    def _assert_unchanged(self):
+        self.assertEqual(_stock(self.inventory), self.stock)
+        self.assertEqual(self.inventory.total_inventory_value(), self.value)
+        self.inventory.check_aggregates()
+
+    def test_sell_many_with_one_bad_line(self):
+        with self.assertRaises(BatchOperationError) as raised:
+            self.inventory.sell_many([("E1", 2), ("C1", 5), ("E1", 9)])
+        self.assertEqual([(position, product_id) for position, product_id, _ in raised.exception.failures], [(2, "E1")])
+        self.assertIsInstance(raised.exception.failures[0][2], InsufficientStockError)
+        self._assert_unchanged()
+
+    def test_restock_many_with_one_bad_line(self):
+        with self.assertRaises(BatchOperationError) as raised:
+            self.inventory.restock_many([("E1", 2), ("X9", 1), ("C1", 0)])
+        failures = raised.exception.failures
+        self.assertEqual([(position, product_id) for position, product_id, _ in failures], [(1, "X9"), (2, "C1")])
+        self.assertIsInstance(failures[0][2], KeyError)
+        self.assertIsInstance(failures[1][2], ValueError)
+        self._assert_unchanged()
+
+    def test_good_batch_applies_every_line(self):
+        remaining = self.inventory.sell_many([("E1", 2), ("C1", 5), ("E1", 3)])
+        self.assertEqual(remaining, {"E1": 5, "C1": 25})
+        self.inventory.check_aggregates()
+
+
+if __name__ == "__main__":
+    unittest.main()
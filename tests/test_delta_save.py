@@ -0,0 +1,61 @@
+"""Incremental saves after a crash left a torn line at the end of the delta file.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from inventory import DELTA_SUFFIX, Inventory
+from product import Clothing, Electronics
+
+
+def _state(inventory: Inventory):
+    return sorted((product.product_id, product.price, product.quantity_in_stock) for product in inventory.list_all_products())
+
+
+class TornDeltaTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "inventory.json")
+        self.inventory = Inventory()
+        self.inventory.add_product(Electronics("E001", "Laptop", 999.0, 10, "Acme", 2))
+        self.inventory.add_product(Clothing("C001", "Shirt", 20.0, 30, "M", "Cotton"))
+        self.inventory.save_to_file(self.filename)
+        self.inventory.sell_product("E001", 1)
+        self.inventory.save_to_file(self.filename, incremental=True)
+
+    def _crash_mid_save(self):
+        with open(self.filename + DELTA_SUFFIX, "a") as file:
+            file.write('{"op": "upsert", "product": {"product_id": "E0')
+
+    def test_load_cuts_torn_tail(self):
+        self._crash_mid_save()
+        loaded = Inventory()
+        loaded.load_from_file(self.filename)
+        self.assertEqual(_state(loaded), _state(self.inventory))
+        with open(self.filename + DELTA_SUFFIX, "rb") as file:
+            self.assertTrue(file.read().endswith(b"\n"))
+
+    def test_incremental_save_after_crash_reloads(self):
+        self._crash_mid_save()
+        loaded = Inventory()
+        loaded.load_from_file(self.filename)
+        loaded.sell_product("C001", 5)
+        loaded.update_price("E001", 899.0)
+        loaded.save_to_file(self.filename, incremental=True)
+
+        reloaded = Inventory()
+        reloaded.load_from_file(self.filename)
+        self.assertEqual(_state(reloaded), _state(loaded))
+        self.assertEqual(reloaded.get_product("C001").quantity_in_stock, 25)
+        reloaded.check_aggregates()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Loading a malformed inventory file leaves the inventory as it was.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from inventory import Inventory
+from product import Clothing, Electronics
+from sharded import ShardedInventory
+
+
+def _state(inventory):
+    return sorted((product.product_id, product.price, product.quantity_in_stock) for product in inventory.list_all_products())
+
+
+class FailedLoadTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _write(self, name: str, text: str) -> str:
+        filename = os.path.join(self.directory, name)
+        with open(filename, "w") as file:
+            file.write(text)
+        return filename
+
+    def _bad_files(self):
+        good = Electronics("E9", "Phone", 499.0, 3, "Acme", 1).to_dict()
+        return [
+            self._write("not_json.json", "this is not JSON"),
+            self._write("bad_second.json", json.dumps([good, {"product_id": "X1"}])),
+            self._write("bad_second.jsonl", json.dumps(good) + "\n{\"product_id\"\n"),
+        ]
+
+    def _check(self, inventory):
+        inventory.add_product(Clothing("C1", "Shirt", 20.0, 30, "M", "Cotton"))
+        before = _state(inventory)
+        for filename in self._bad_files():
+            with self.assertRaises(ValueError):
+                inventory.load_from_file(filename)
+            self.assertEqual(_state(inventory), before)
+
+    def test_inventory_unchanged(self):
+        inventory = Inventory()
+        self._check(inventory)
+        inventory.check_aggregates()
+
+    def test_sharded_inventory_unchanged(self):
+        with ShardedInventory(2) as inventory:
+            self._check(inventory)
+
+
+if __name__ == "__main__":
+    unittest.main()
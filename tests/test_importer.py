@@ -0,0 +1,49 @@
+"""A malformed CSV row is rejected on its own; the valid rows around it are still imported.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from importer import bulk_import
+from inventory import Inventory
+
+HEADER = "type,product_id,name,price,quantity_in_stock,brand,warranty_years,expiry_date,size,material\n"
+
+
+class MalformedQuoteTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "feed.csv")
+        with open(self.filename, "w", newline="") as file:
+            file.write(HEADER)
+            file.write("Electronics,E1,Laptop,999.0,10,Acme,2,,,\n")
+            file.write('Clothing,C1,"Shirt,20.0,30,,,,M,Cotton\n')
+            file.write("Clothing,C2,Jacket,80.0,5,,,,L,Wool\n")
+            file.write("Electronics,E2,Phone,499.0,3,Acme,1,,,\n")
+
+    def _check(self, processes: int):
+        inventory = Inventory()
+        counts = bulk_import(inventory, self.filename, processes=processes)
+        self.assertEqual(counts, {"inserted": 3, "updated": 0, "rejected": 1})
+        self.assertEqual(sorted(product.product_id for product in inventory.list_all_products()), ["C2", "E1", "E2"])
+        with open(self.filename + ".rejects.jsonl") as file:
+            rejects = [json.loads(line) for line in file]
+        self.assertEqual([reject["line"] for reject in rejects], [3])
+
+    def test_single_process(self):
+        self._check(1)
+
+    def test_process_pool(self):
+        self._check(2)
+
+
+if __name__ == "__main__":
+    unittest.main()
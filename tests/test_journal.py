@@ -0,0 +1,80 @@
+"""Reopening a journaled inventory after a crash left a torn record at the end of its log.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from journal import LOG, JournaledInventory, OperationLog
+from product import Electronics
+
+
+class TornLogTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        inventory = JournaledInventory(self.directory)
+        inventory.add_product(Electronics("E1", "Laptop", 999.0, 10, "Acme", 2))
+        inventory.sell_product("E1", 1)
+        inventory.close()
+
+    def _crash_mid_append(self):
+        with open(os.path.join(self.directory, LOG), "a") as file:
+            file.write('{"seq":3,"op":"sell","id":"E1","qua')
+
+    def test_append_after_crash_reopens(self):
+        self._crash_mid_append()
+        inventory = JournaledInventory(self.directory)
+        self.assertEqual(inventory.get_product("E1").quantity_in_stock, 9)
+        inventory.sell_product("E1", 2)
+        inventory.restock_product("E1", 5)
+        inventory.close()
+
+        reopened = JournaledInventory(self.directory)
+        self.assertEqual(reopened.get_product("E1").quantity_in_stock, 12)
+        reopened.close()
+        with open(os.path.join(self.directory, LOG), "rb") as file:
+            self.assertTrue(file.read().endswith(b"\n"))
+
+
+class LoadCheckpointTest(unittest.TestCase):
+    def test_loaded_snapshot_survives_reopen(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        snapshot = os.path.join(directory.name, "one.snap")
+        inventory = JournaledInventory(os.path.join(directory.name, "journal"))
+        inventory.add_product(Electronics("E1", "Laptop", 999.0, 10, "Acme", 2))
+        inventory.save_snapshot(snapshot)
+        inventory.add_product(Electronics("E2", "Phone", 499.0, 5, "Acme", 1))
+        inventory.load_snapshot(snapshot)
+        inventory.close()
+
+        reopened = JournaledInventory(os.path.join(directory.name, "journal"))
+        self.addCleanup(reopened.close)
+        self.assertEqual([product.product_id for product in reopened.list_all_products()], ["E1"])
+
+
+class SyncIntervalTest(unittest.TestCase):
+    def test_idle_records_are_synced(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        filename = os.path.join(directory.name, LOG)
+        log = OperationLog(filename, group_size=64, sync_interval=0.02)
+        self.addCleanup(log.close)
+        log.sync()
+        log.append({"seq": 1, "op": "sell", "id": "E1", "quantity": 1})
+        deadline = time.monotonic() + 5
+        while os.path.getsize(filename) == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertGreater(os.path.getsize(filename), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Cursor pagination of query_products: complete walks, mutations between pages and bad cursors.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import base64
+import json
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from inventory import Inventory
+from product import Clothing, Electronics
+
+
+def _walk(inventory: Inventory, **filters) -> list[str]:
+    seen, cursor = [], None
+    while True:
+        page, cursor = inventory.query_products(cursor=cursor, **filters)
+        seen.extend(product.product_id for product in page)
+        if cursor is None:
+            return seen
+
+
+def _walk_from(inventory: Inventory, cursor: str, **filters) -> list[str]:
+    seen = []
+    while cursor is not None:
+        page, cursor = inventory.query_products(cursor=cursor, **filters)
+        seen.extend(product.product_id for product in page)
+    return seen
+
+
+class CursorPaginationTest(unittest.TestCase):
+    def setUp(self):
+        self.inventory = Inventory()
+        for i in range(40):
+            # Only five distinct prices, so most pages end inside a run of ties
+            self.inventory.add_product(Electronics(f"E{i:02}", f"Phone {i}", 100.0 + i % 5, i, "Acme", 1))
+            self.inventory.add_product(Clothing(f"C{i:02}", f"Shirt {i}", 10.0 + i, 40 - i, "M", "Cotton"))
+
+    def _expected(self, product_type=None, key=lambda product: (product.price, product.product_id)):
+        products = [product for product in self.inventory.list_all_products()
+                    if product_type is None or type(product).__name__.lower() == product_type]
+        return [product.product_id for product in sorted(products, key=key)]
+
+    def test_full_walk_has_no_duplicates_or_gaps(self):
+        for limit in (1, 7, 50, 100):
+            self.assertEqual(_walk(self.inventory, limit=limit), self._expected())
+            self.assertEqual(_walk(self.inventory, product_type="electronics", limit=limit), self._expected("electronics"))
+
+    def test_walk_by_stock_descending(self):
+        walked = _walk(self.inventory, sort_by="quantity_in_stock", descending=True, limit=6)
+        products = self.inventory.list_all_products()
+        expected = sorted(products, key=lambda product: (product.quantity_in_stock, product.product_id), reverse=True)
+        self.assertEqual(walked, [product.product_id for product in expected])
+
+    def test_filters_apply_on_every_page(self):
+        walked = _walk(self.inventory, min_price=101, max_price=103, min_stock=10, limit=4)
+        expected = [product_id for product_id in self._expected()
+                    if 101 <= self.inventory.get_product(product_id).price <= 103
+                    and self.inventory.get_product(product_id).quantity_in_stock >= 10]
+        self.assertEqual(walked, expected)
+
+    def test_mutations_between_pages(self):
+        first, cursor = self.inventory.query_products(product_type="electronics", limit=10)
+        self.inventory.add_product(Electronics("A00", "Early", 50.0, 1, "Acme", 1))   # Sorts before the cursor
+        self.inventory.add_product(Electronics("Z99", "Late", 500.0, 1, "Acme", 1))   # Sorts after it
+        self.inventory.remove_product(self._expected("electronics")[-2])
+        rest = _walk_from(self.inventory, cursor, product_type="electronics", limit=10)
+
+        walked = [product.product_id for product in first] + rest
+        self.assertEqual(len(walked), len(set(walked)))
+        self.assertNotIn("A00", walked)
+        self.assertEqual(walked[-1], "Z99")
+        self.assertEqual(rest, [product_id for product_id in self._expected("electronics")
+                                if product_id not in {product.product_id for product in first} and product_id != "A00"])
+
+    def test_cursor_of_removed_product_resumes_after_it(self):
+        first, cursor = self.inventory.query_products(limit=10)
+        self.inventory.remove_product(first[-1].product_id)
+        rest = _walk_from(self.inventory, cursor, limit=10)
+        self.assertEqual(rest, self._expected()[9:])
+
+    def test_bad_cursor_is_rejected(self):
+        for cursor in ["not a cursor!", base64.urlsafe_b64encode(b"{}").decode(),
+                       base64.urlsafe_b64encode(json.dumps(["cheap", "E01"]).encode()).decode(),
+                       base64.urlsafe_b64encode(json.dumps([1.0]).encode()).decode()]:
+            with self.assertRaises(ValueError):
+                self.inventory.query_products(cursor=cursor)
+
+    def test_bad_arguments_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.inventory.query_products(sort_by="name")
+        with self.assertRaises(ValueError):
+            self.inventory.query_products(limit=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
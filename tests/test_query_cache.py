@@ -0,0 +1,87 @@
+"""Cached query results are dropped when, and only when, something they depend on changed.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from inventory import Inventory
+from product import Clothing, Electronics
+
+
+def _ids(products):
+    return [product.product_id for product in products]
+
+
+class QueryCacheInvalidationTest(unittest.TestCase):
+    def setUp(self):
+        self.inventory = Inventory()
+        self.inventory.add_product(Electronics("E1", "Laptop", 999.0, 10, "Acme", 2))
+        self.inventory.add_product(Electronics("E2", "Phone", 499.0, 2, "Acme", 1))
+        self.inventory.add_product(Clothing("C1", "Shirt", 20.0, 30, "M", "Cotton"))
+        self.inventory.add_product(Clothing("C2", "Jacket", 80.0, 4, "L", "Wool"))
+
+    def _counts(self):
+        stats = self.inventory.query_cache_stats()
+        return stats["hits"], stats["misses"]
+
+    def _assert_hit(self, call):
+        hits, misses = self._counts()
+        result = call()
+        self.assertEqual(self._counts(), (hits + 1, misses))
+        return result
+
+    def _assert_miss(self, call):
+        hits, misses = self._counts()
+        result = call()
+        self.assertEqual(self._counts(), (hits, misses + 1))
+        return result
+
+    def test_search_by_type_goes_stale_only_for_the_changed_class(self):
+        self._assert_miss(lambda: self.inventory.search_by_type("electronics"))
+        self._assert_miss(lambda: self.inventory.search_by_type("clothing"))
+        self._assert_hit(lambda: self.inventory.search_by_type("electronics"))
+
+        self.inventory.add_product(Electronics("E3", "Tablet", 299.0, 5, "Acme", 1))
+        self.assertEqual(_ids(self._assert_hit(lambda: self.inventory.search_by_type("clothing"))), ["C1", "C2"])
+        self.assertEqual(_ids(self._assert_miss(lambda: self.inventory.search_by_type("electronics"))), ["E1", "E2", "E3"])
+
+        self.inventory.remove_product("C2")
+        self._assert_hit(lambda: self.inventory.search_by_type("electronics"))
+        self.assertEqual(_ids(self._assert_miss(lambda: self.inventory.search_by_type("clothing"))), ["C1"])
+
+    def test_search_by_type_ignores_stock_and_price_changes(self):
+        self._assert_miss(lambda: self.inventory.search_by_type("electronics"))
+        self.inventory.sell_product("E1", 3)
+        self.inventory.update_price("E2", 450.0)
+        self._assert_hit(lambda: self.inventory.search_by_type("electronics"))
+
+    def test_low_stock_products_is_recomputed_after_a_mutation(self):
+        self.assertEqual(_ids(self._assert_miss(lambda: self.inventory.low_stock_products(5))), ["E2", "C2"])
+        self._assert_hit(lambda: self.inventory.low_stock_products(5))
+
+        self.inventory.sell_product("C1", 27)
+        self.assertEqual(_ids(self._assert_miss(lambda: self.inventory.low_stock_products(5))), ["E2", "C1", "C2"])
+        self.inventory.restock_product("E2", 10)
+        self.assertEqual(_ids(self._assert_miss(lambda: self.inventory.low_stock_products(5))), ["C1", "C2"])
+        self.inventory.add_product(Electronics("E3", "Tablet", 299.0, 0, "Acme", 1))
+        self.assertEqual(_ids(self._assert_miss(lambda: self.inventory.low_stock_products(5))), ["E3", "C1", "C2"])
+        self._assert_hit(lambda: self.inventory.low_stock_products(5))
+
+    def test_disabled_cache_always_recomputes(self):
+        class UncachedInventory(Inventory):
+            query_cache_size = 0
+        inventory = UncachedInventory()
+        inventory.add_product(Clothing("C1", "Shirt", 20.0, 3, "M", "Cotton"))
+        inventory.low_stock_products(5)
+        inventory.low_stock_products(5)
+        self.assertEqual(inventory.query_cache_stats()["hits"], 0)
+        self.assertEqual(inventory.query_cache_stats()["size"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
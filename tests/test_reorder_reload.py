@@ -0,0 +1,39 @@
+"""Reloading an inventory keeps only the reorder thresholds of products that are still in it.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from inventory import Inventory
+from product import Electronics
+
+
+class ReloadThresholdTest(unittest.TestCase):
+    def test_reload_drops_thresholds_of_missing_products(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        filename = os.path.join(directory.name, "inventory.json")
+        saved = Inventory()
+        saved.add_product(Electronics("E1", "Laptop", 999.0, 5, "Acme", 2))
+        saved.save_to_file(filename)
+
+        inventory = Inventory()
+        inventory.add_product(Electronics("E1", "Laptop", 999.0, 5, "Acme", 2))
+        inventory.add_product(Electronics("E2", "Phone", 499.0, 5, "Acme", 1))
+        inventory.set_reorder_threshold("E1", 10)
+        inventory.set_reorder_threshold("E2", 10)
+        inventory.load_from_file(filename)
+        self.assertEqual([product.product_id for product in inventory.below_reorder_threshold()], ["E1"])
+
+        inventory.add_product(Electronics("E2", "Phone", 499.0, 5, "Acme", 1))
+        self.assertEqual([product.product_id for product in inventory.below_reorder_threshold()], ["E1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""A snapshot save that fails partway leaves the previous snapshot in place.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from inventory import Inventory
+from product import Clothing, Electronics
+import snapshot
+
+
+class AtomicSnapshotTest(unittest.TestCase):
+    def test_failed_save_keeps_previous_snapshot(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        filename = os.path.join(directory.name, "inventory.snap")
+        inventory = Inventory()
+        inventory.add_product(Electronics("E1", "Laptop", 999.0, 10, "Acme", 2))
+        inventory.save_snapshot(filename)
+
+        inventory.add_product(Clothing("C1", "Shirt", 20.0, 30, "M", "Cotton"))
+        pad = snapshot._pad
+        calls = 0
+
+        def crash_midway(size: int) -> bytes:
+            # Fail after the header and string table are written, while the columns go out
+            nonlocal calls
+            calls += 1
+            if calls == 3:
+                raise OSError("disk full")
+            return pad(size)
+        with mock.patch.object(snapshot, "_pad", crash_midway), self.assertRaises(OSError):
+            inventory.save_snapshot(filename)
+
+        loaded = Inventory()
+        loaded.load_snapshot(filename)
+        self.assertEqual([product.product_id for product in loaded.list_all_products()], ["E1"])
+        self.assertEqual(os.listdir(directory.name), ["inventory.snap"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""SQLiteInventory reports errors like Inventory does and saves its JSON files atomically.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from inventory import Inventory
+from product import Electronics
+from sqlite_inventory import SQLiteInventory
+
+
+class SQLiteInventoryTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.inventory = SQLiteInventory(os.path.join(self.directory, "inventory.db"))
+        self.addCleanup(self.inventory.close)
+        self.inventory.add_product(Electronics("E1", "Laptop", 999.0, 10, "Acme", 2))
+
+    def test_update_price_checks_the_id_first(self):
+        for inventory in (Inventory(), self.inventory):
+            with self.assertRaises(KeyError):
+                inventory.update_price("X9", -1.0)
+        with self.assertRaises(ValueError):
+            self.inventory.update_price("E1", 0)
+        self.inventory.update_price("E1", 899.0)
+        self.assertEqual(self.inventory.get_product("E1").price, 899.0)
+
+    def test_save_to_file(self):
+        filename = os.path.join(self.directory, "inventory.json")
+        self.inventory.save_to_file(filename)
+        self.inventory.sell_product("E1", 1)
+        self.inventory.save_to_file(filename, incremental=True)
+        with open(filename) as file:
+            self.assertEqual([record["quantity_in_stock"] for record in json.load(file)], [9])
+        self.assertEqual([name for name in os.listdir(self.directory) if name.startswith("inventory.json")], ["inventory.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""TrigramIndex answers substring searches and keeps its postings in step with adds, removes and renames.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+from indexes import TrigramIndex
+from inventory import Inventory
+from product import Clothing, Electronics
+
+
+class TrigramIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = TrigramIndex()
+        self.index.add("E1", "Smart Phone")
+        self.index.add("E2", "Laptop Pro")
+        self.index.add("C1", "Wool Sweater")
+        self.index.add_many([("C2", "Denim Jacket"), ("E3", "Phone Charger")])
+
+    def _postings_of(self, product_id: str) -> set[str]:
+        return {gram for gram, posting in self.index._postings.items() if product_id in posting}
+
+    def test_substring_queries(self):
+        self.assertEqual(self.index.search("phone"), ["E1", "E3"])
+        self.assertEqual(self.index.search("top pr"), ["E2"])
+        self.assertEqual(self.index.search("jacket"), ["C2"])
+        self.assertEqual(self.index.search("xyz"), [])
+
+    def test_trigrams_present_but_not_adjacent(self):
+        # "Abc Bcd" holds both trigrams of "abcd", but apart
+        self.index.add("X1", "Abc Bcd")
+        self.assertEqual(self.index.search("abcd"), [])
+        self.assertEqual(self.index.search("abc b"), ["X1"])
+
+    def test_queries_shorter_than_a_trigram(self):
+        self.assertEqual(self.index.search("o"), ["E1", "E2", "C1", "E3"])
+        self.assertEqual(self.index.search("De"), ["C2"])
+        self.assertEqual(self.index.search(""), ["E1", "E2", "C1", "C2", "E3"])
+        self.assertEqual(self.index.search("zq"), [])
+
+    def test_case_folding(self):
+        for query in ("PHONE", "Phone", "pHoNe"):
+            self.assertEqual(self.index.search(query), ["E1", "E3"])
+        self.assertEqual(self.index.search("LA"), ["E2"])
+
+    def test_remove(self):
+        self.index.remove("E1")
+        self.assertEqual(self.index.search("phone"), ["E3"])
+        self.assertEqual(self._postings_of("E1"), set())
+        self.assertNotIn("sma", self.index._postings)  # Only E1 had it
+        self.index.remove("E1")  # Removing twice is harmless
+        self.index.remove_many(["E2", "C1"])
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.search("o"), ["E3"])
+
+    def test_rename(self):
+        self.index.add("E1", "Smart Watch")
+        self.assertEqual(self.index.search("phone"), ["E3"])
+        self.assertEqual(self.index.search("watch"), ["E1"])
+        self.assertEqual(self._postings_of("E1"), TrigramIndex._grams("smart watch"))
+        self.assertEqual(len(self.index), 5)
+
+
+class SearchByNameTest(unittest.TestCase):
+    def test_search_follows_removes_and_renames(self):
+        inventory = Inventory()
+        inventory.add_product(Electronics("E1", "Smart Phone", 499.0, 5, "Acme", 1))
+        inventory.add_product(Clothing("C1", "Phone Pouch", 9.0, 50, "S", "Leather"))
+        self.assertEqual([product.product_id for product in inventory.search_by_name("PHONE")], ["E1", "C1"])
+
+        inventory.remove_product("C1")
+        self.assertEqual([product.product_id for product in inventory.search_by_name("phone")], ["E1"])
+
+        inventory.upsert_many([Electronics("E1", "Smart Watch", 199.0, 5, "Acme", 1)])
+        self.assertEqual(inventory.search_by_name("phone"), [])
+        self.assertEqual([product.product_id for product in inventory.search_by_name("wa")], ["E1"])
+
+
+if __name__ == "__main__":
+    unittest.main()